@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Times the inference kernels of each board backend on square boards of increasing size, in two ways:
+
+    per sniff: reduce followed by eliminate after every sniff, as a Robot does. The first sniff,
+        which sets up each backend, is not counted.
+    catch up: reduce for the scents of an eighth of the board, then a single eliminate, as when
+        a board is rebuilt from many known scents.
+
+The numpy backend is included when numpy is installed, and for each backend the smallest size from
+which it beats the list backend at every larger size measured is reported (or that it never does).
+
+Usage (from the repository root)
+python -m tests.bench_boards [size ...]
+"""
+
+import sys
+import time
+
+from wumpus.world import random_world
+from wumpus.wumpus import Tile, adjacent_positions, make_board
+
+BACKENDS = ["list", "bits"]
+try:
+    import numpy
+    BACKENDS.append("numpy")
+except ImportError:
+    pass
+
+
+def scent_at(world, x, y):
+    if world[x][y] & Tile.GOLD:
+        return 0b1000
+    scent = 0
+    for adj_x, adj_y in adjacent_positions(x, y, len(world), len(world[0])):
+        scent |= world[adj_x][adj_y]
+    return scent
+
+
+def sniff_positions(size, count):
+    # walk a diagonal band from the start, which is roughly where a robot spends its first steps
+    positions = []
+    for d in range(2 * size):
+        for x in range(d + 1):
+            if len(positions) == count:
+                return positions
+            if x < size and d - x < size:
+                positions.append((x, d - x))
+    return positions
+
+
+def bench_per_sniff(backend, world, positions):
+    size = len(world)
+    board = make_board(size, size, backend)
+    scents = board.new_scents()
+    elapsed = 0
+    for x, y in positions:
+        scent = scent_at(world, x, y)
+        start = time.perf_counter()
+        scents[x][y] = scent
+        board.reduce(scent, x, y)
+        board.eliminate(scents)
+        if (x, y) != positions[0]:
+            elapsed += time.perf_counter() - start
+    return elapsed / (len(positions) - 1)
+
+
+def bench_catch_up(backend, world, positions):
+    size = len(world)
+    board = make_board(size, size, backend)
+    scents = board.new_scents()
+    start = time.perf_counter()
+    for x, y in positions:
+        scent = scent_at(world, x, y)
+        scents[x][y] = scent
+        board.reduce(scent, x, y)
+    board.eliminate(scents)
+    return time.perf_counter() - start
+
+
+def table(title, sizes, bench, count):
+    print("size  " + "  ".join("%12s" % name for name in BACKENDS) + "   (ms %s)" % title)
+    # the smallest size from which each backend beat list at every size after it
+    crossover = {}
+    for size in sizes:
+        world = random_world(size, size, pits=size * size // 10, seed=size)
+        positions = sniff_positions(size, count(size))
+        times = [bench(backend, world, positions) for backend in BACKENDS]
+        print("%4d  " % size + "  ".join("%12.3f" % (t * 1000) for t in times))
+        for backend, t in zip(BACKENDS[1:], times[1:]):
+            if t >= times[0]:
+                crossover[backend] = None
+            elif crossover.get(backend) is None:
+                crossover[backend] = size
+    for backend in BACKENDS[1:]:
+        if crossover.get(backend) is not None:
+            print("%s is faster than list from size %d" % (backend, crossover[backend]))
+        else:
+            print("%s never stays faster than list" % backend)
+    print()
+
+
+def main(sizes):
+    table("per sniff", sizes, bench_per_sniff, lambda size: 20)
+    table("to catch up", sizes, bench_catch_up, lambda size: max(2, size * size // 8))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [4, 8, 16, 32, 64, 128, 256])
@@ -1,5 +1,15 @@
 #!/usr/bin/env python
 
+"""
+BitBot plays one world over stdin/stdout, the protocol of wumpus_tester.py.
+
+    bitbot.py              plays a single world and exits
+    bitbot.py --session    plays a world for every "new" line until "quit" (or end of input),
+                           printing "done" after each, so one process serves many worlds
+"""
+
+import sys
+
 from wumpus import Robot
 
 class BitBot(Robot):
@@ -37,6 +47,31 @@ class BitBot(Robot):
         pass
 
 
+def session():
+    """
+    plays worlds until told to quit, keeping the interpreter and the wumpus import warm
+    """
+    while True:
+        try:
+            command = input()
+        except EOFError:
+            return
+        if command == "quit":
+            return
+        if command != "new":
+            print("unknown command: " + command, file=sys.stderr)
+            continue
+        try:
+            BitBot(log_actions=True).start()
+        except Exception as e:
+            # a single robot crashing ends its world, not the session
+            print(repr(e), file=sys.stderr)
+        print("done", flush=True)
+
+
 if __name__ == "__main__":
-    bot = BitBot(log_actions=True)
-    bot.start()
\ No newline at end of file
+    if "--session" in sys.argv[1:]:
+        session()
+    else:
+        bot = BitBot(log_actions=True)
+        bot.start()
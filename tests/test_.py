@@ -78,3 +78,1114 @@ def test_eliminate(empty_scents):
     assert board.gold_pos == (1, 0)
 
     
+def test_board_dimensions():
+    board = Board(width=6, height=3)
+    assert (board.width, board.height) == (6, 3)
+    assert len(board) == 6 and len(board[0]) == 3
+
+    # dimensions of an existing board are taken from its columns
+    assert (Board([[7, 7, 7]] * 2).width, Board([[7, 7, 7]] * 2).height) == (2, 3)
+
+    assert sorted(adjacent_positions(5, 2, 6, 3)) == [(4, 2), (5, 1)]
+    assert sorted(board.adjacent(3, 1)) == [(2, 1), (3, 0), (3, 2), (4, 1)]
+
+    # shortest_path reads the dimensions from the board it is given
+    wide = Board([[0] * 2 for _ in range(8)])
+    assert shortest_path(0, 0, 7, 1, wide) == [(1, 0)] * 7 + [(0, 1)]
+
+def test_robots_of_different_sizes():
+    from wumpus.world import WorldRobot
+
+    robots = []
+    for size in [4, 12, 32]:
+        world = [[Tile.EMPTY] * size for _ in range(size)]
+        world[size - 1][size - 2] = Tile.GOLD
+        world[size // 2][size - 1] = Tile.WUMPUS
+        robots.append(WorldRobot(world))
+
+    for robot in robots:
+        robot.start()
+
+    for robot, size in zip(robots, [4, 12, 32]):
+        assert (robot.width, robot.height) == (size, size)
+        assert robot.board.gold_pos == (size - 1, size - 2)
+        assert robot.succeeded
+
+def test_large_mission():
+    import time
+    from wumpus.world import WorldRobot, random_world
+
+    # a whole mission on a 128x128 board takes well under a second (the bound leaves room for slow machines)
+    robot = WorldRobot(random_world(128, 128, pits=128 * 128 // 10, seed=128))
+    start = time.perf_counter()
+    robot.start()
+    assert robot.succeeded and robot.moves > 10000
+    assert time.perf_counter() - start < 10
+
+    # missions on large boards turn more than small ones are allowed to before giving up
+    assert WorldRobot.rotation_limit(4, 4) == WorldRobot.MAX_ROTATIONS
+    assert WorldRobot.rotation_limit(512, 512) > 150000
+
+def test_bitboard(empty_scents):
+    # same deductions as test_board_deductions and test_eliminate, on the packed backend
+    board = BitBoard()
+    board.reduce(Tile.GOLD, 1, 1)
+    board.reduce(Tile.GOLD, 2, 2)
+    board.reduce(Tile.GOLD, 1, 3)
+    assert board == Board([[3, 0, 3, 0], 
+                           [0, 3, 4, 3], 
+                           [3, 0, 3, 0], 
+                           [3, 3, 0, 3]])
+    board.eliminate(empty_scents)
+    assert board.gold_pos == (1, 2)
+
+    board = BitBoard([
+        [0, 1, 7, 7],
+        [5, 7, 7, 7],
+        [7, 7, 7, 7],
+        [7, 7, 7, 7]
+    ])
+    scents = board.new_scents()
+    scents[0][0] = 5
+    board.eliminate(scents)
+    assert board[1] == [4, 7, 7, 7]
+    board.reduce(5, 0, 0)
+    board.eliminate(scents)
+    assert board.gold_pos == (1, 0)
+
+def test_bitboard_missions_match_board():
+    from wumpus.world import WorldRobot, random_world
+
+    for seed in range(100):
+        size = 4 + seed % 3
+        world = random_world(size, size, pits=seed % 4, seed=seed)
+        outcomes = []
+        for backend in [Board, BitBoard]:
+            robot = WorldRobot(world, board=backend(width=size, height=size))
+            try:
+                robot.start()
+                outcome = robot.succeeded
+            except Exception as e:
+                outcome = type(e).__name__
+            outcomes.append((outcome, robot.moves, robot.rotations, robot.shots, [list(col) for col in robot.board]))
+        assert outcomes[0] == outcomes[1]
+
+def test_numpy_board(empty_scents):
+    pytest.importorskip("numpy")
+    from wumpus.world import WorldRobot, random_world
+
+    # same deductions as test_board_deductions and test_eliminate, on the numpy backend
+    board = make_board(backend="numpy")
+    board.reduce(Tile.GOLD, 1, 1)
+    board.reduce(Tile.GOLD, 2, 2)
+    board.reduce(Tile.GOLD, 1, 3)
+    assert board == Board([[3, 0, 3, 0], 
+                           [0, 3, 4, 3], 
+                           [3, 0, 3, 0], 
+                           [3, 3, 0, 3]])
+    board.eliminate(empty_scents)
+    assert board.gold_pos == (1, 2)
+
+    for seed in range(60):
+        size = 4 + seed % 3
+        world = random_world(size, size, pits=seed % 4, seed=seed)
+        outcomes = []
+        for backend in ["list", "numpy"]:
+            robot = WorldRobot(world, board=make_board(size, size, backend))
+            try:
+                robot.start()
+                outcome = robot.succeeded
+            except Exception as e:
+                outcome = type(e).__name__
+            outcomes.append((outcome, robot.moves, robot.rotations, robot.shots, [list(col) for col in robot.board]))
+        assert outcomes[0] == outcomes[1]
+
+    with pytest.raises(ValueError):
+        make_board(backend="cuda")
+
+def test_batch_solver():
+    pytest.importorskip("numpy")
+    from wumpus.batch import solve
+    from wumpus.world import WorldRobot, random_world
+
+    def outcome(robot, error):
+        return (type(error).__name__, robot.state, robot.succeeded, robot.moves, robot.rotations, robot.shots,
+                robot.sniffs, robot.x, robot.y, robot.dx, robot.dy, robot.has_arrow,
+                [list(col) for col in robot.board], robot.board.gold_pos, robot.board.wumpus_pos, robot.scents)
+
+    for size, pits in [(4, 0), (4, 3), (6, 5)]:
+        worlds = [random_world(size, size, pits=pits, seed=seed) for seed in range(80)]
+        robots = solve(worlds)
+        for world, robot in zip(worlds, robots):
+            expected = WorldRobot(world)
+            try:
+                expected.start()
+                error = None
+            except Exception as e:
+                error = e
+            assert outcome(robot, robot.error) == outcome(expected, error)
+
+    # routes planned by turning time are not vectorised
+    class TurningRobot(WorldRobot):
+        TURN_COST = 3
+        TURN_180_COST = 5
+
+    with pytest.raises(ValueError):
+        solve([random_world(8, 8, pits=6, seed=0)], TurningRobot)
+
+def test_oracle():
+    np = pytest.importorskip("numpy")
+    from wumpus.oracle import (Oracle, DEDUCIBLE, GUESS, UNREACHABLE, SUCCEEDED, FAILED, DIED, STUCK,
+                               transpose, world_grid)
+    from wumpus.world import RobotDied, WorldRobot
+
+    oracle = Oracle(3, 3)
+    assert len(oracle) == 8 * 7 * 2 ** 6
+    oracle.run(workers=2)
+    assert oracle.runs < len(oracle)
+
+    def index(gold, wumpus, pits):
+        return int(np.flatnonzero((oracle.gold == gold) & (oracle.wumpus == wumpus) & (oracle.pits == pits))[0])
+
+    # tiles are numbered x * 3 + y: gold at (2, 2) behind pits at (1, 2) and (2, 1)
+    assert oracle.classes[index(8, 1, 0b10100000)] == UNREACHABLE
+    # nothing near the start, the gold in the far corner
+    assert oracle.classes[index(8, 6, 0)] == DEDUCIBLE
+    # a breeze right at the start, from a pit at (1, 0)
+    assert oracle.classes[index(8, 6, 0b1000)] == GUESS
+
+    # the classes do not change when a world is mirrored along the diagonal
+    mirrored = [index(*world) for world in zip(*transpose(3, 3, oracle.gold, oracle.wumpus, oracle.pits))]
+    assert (oracle.classes[mirrored] == oracle.classes).all()
+
+    for n in range(len(oracle)):
+        robot = WorldRobot(world_grid(3, 3, oracle.gold[n], oracle.wumpus[n], oracle.pits[n]))
+        try:
+            robot.start()
+            outcome = FAILED
+        except RobotDied:
+            outcome = DIED
+        except Exception:
+            outcome = STUCK
+        assert oracle.outcome[n] == (SUCCEEDED if robot.succeeded else outcome)
+        assert oracle.moves[n] == robot.moves
+        if oracle.classes[n] == UNREACHABLE:
+            assert not robot.succeeded
+
+def test_outcome_index(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    from wumpus import outcomes
+    from wumpus.oracle import Oracle
+
+    oracle = Oracle(3, 3, max_pits=2)
+    oracle.run(workers=1)
+    path = str(tmp_path / "3x3.outcomes")
+    outcomes.OutcomeIndex.create(path, 3, 3, max_pits=2, workers=1).close()
+
+    with outcomes.OutcomeIndex(path) as index:
+        assert len(index) == len(oracle)
+        for n in range(0, len(oracle), 7):
+            record = index.lookup(int(oracle.gold[n]), int(oracle.wumpus[n]), int(oracle.pits[n]))
+            assert record == index[n]
+            assert record[:5] == (oracle.classes[n], oracle.outcome[n], oracle.shots[n], oracle.moves[n],
+                                  oracle.rotations[n])
+        assert not len(index.stale())
+        records = index.records()
+        assert (records["moves"] == oracle.moves).all()
+        del records
+
+    # a changed solver makes every record stale, and they can be brought up to date a few at a time
+    monkeypatch.setattr(outcomes, "solver_fingerprint", lambda: b"changed".ljust(12))
+    with outcomes.OutcomeIndex(path, writable=True) as index:
+        assert index.update(workers=1, limit=100) == 100
+        assert index.generation == 2
+    with outcomes.OutcomeIndex(path, writable=True) as index:
+        assert len(index.stale()) == len(oracle) - 100
+        assert index.update(workers=1) == len(oracle) - 100
+        assert index.update(workers=1) == 0
+        records = index.records()
+        assert (records["generation"] == 2).all()
+        assert (records["outcome"] == oracle.outcome).all()
+        del records
+
+def test_in_process_tester(capsys):
+    from tests.wumpus_tester import World, test
+    from tests.worldbot import WorldBot
+
+    hard = [["e", "e", "w", "g"],
+            ["e", "e", "h", "h"],
+            ["e", "e", "e", "h"],
+            ["e", "e", "e", "h"]]
+    world = World(hard)
+    assert test(WorldBot, world)
+    assert world.gold and (world.bot_x, world.bot_y) == (0, 3)
+    assert capsys.readouterr().out == "Passed!\n"
+
+    # the world rejecting an action fails the test like it does for an executable
+    class Clumsy(WorldBot):
+        def start(self):
+            self._rot_180()
+            self._forward()
+    assert not test(Clumsy, World(hard))
+    assert capsys.readouterr().out == "Test failed. Walked out of map. (Too far west)\n"
+
+def test_parallel_tester(capsys):
+    from tests.wumpus_tester import play, puzzles, random_worlds, runParallel
+    from tests.worldbot import WorldBot
+
+    worlds = puzzles(["easy", "medium", "hard"], enable_hardest=True) + random_worlds(30)
+    # the same worlds fail as when they are played one after another in this process
+    failures = [name for name, grid in worlds if not play(WorldBot, name, grid)[1]]
+    assert runParallel(WorldBot, worlds, workers=2) == len(failures)
+    out = capsys.readouterr().out
+    assert "40 worlds on 2 processes: %d passed" % (40 - len(failures)) in out
+    assert all(name + ":" in out for name in failures)
+
+def test_session_tester(tmp_path, monkeypatch):
+    import os, sys
+    from tests.wumpus_tester import Session, World, play, puzzles, random_worlds, test
+    from tests.worldbot import WorldBot
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    # bitbot.py imports wumpus.py as a top level module, like a MicroPython board would
+    bitbot = [sys.executable, "-c", "import runpy, sys; sys.path.insert(0, %r); runpy.run_path(%r, run_name='__main__')"
+              % (os.path.join(os.path.dirname(here), "wumpus"), os.path.join(here, "bitbot.py"))]
+    worlds = puzzles(["easy", "medium", "hard"], enable_hardest=True) + random_worlds(30)
+    # bitbot.py writes its log.txt to the working directory
+    monkeypatch.chdir(tmp_path)
+    with Session(bitbot) as session:
+        results = [test(session, World(grid)) for name, grid in worlds]
+    # a failed world replaces the process, the others all share the first one
+    assert session.launches <= 1 + results.count(False)
+    assert session.process is None
+    assert results == [play(WorldBot, name, grid)[1] for name, grid in worlds]
+
+    # a chunk played on a session (as in a runParallel worker) closes the session when it is done
+    from tests import wumpus_tester
+    session = wumpus_tester.session_for(bitbot)
+    played = wumpus_tester.play_all(bitbot, worlds[:5], session=True)
+    assert [passed for _, passed, _, _ in played] == results[:5]
+    assert session.launches >= 1 and session.process is None
+    assert not wumpus_tester._sessions
+
+def test_transposition_table():
+    from wumpus.world import WorldRobot, random_world
+
+    table = TranspositionTable(capacity=2)
+    table.put("a", 1)
+    table.put("b", 2)
+    assert table.get("a") == 1
+    table.put("c", 3)
+    # b was the least recently used
+    assert table.get("b") is None and table.get("a") == 1 and table.get("c") == 3
+    assert (table.hits, table.misses, table.evictions) == (3, 1, 1)
+
+    def outcome(robot):
+        try:
+            robot.start()
+            error = None
+        except Exception as e:
+            error = type(e)
+        return (error, robot.succeeded, robot.moves, robot.rotations, robot.shots, [list(col) for col in robot.board],
+                robot.board.gold_pos, robot.board.wumpus_pos, robot.scents)
+
+    worlds = [random_world(5, 5, pits=seed % 4, seed=seed) for seed in range(150)]
+    for capacity in (20, 10000):
+        table = TranspositionTable(capacity)
+        for backend in ("list", "bits"):
+            for world in worlds:
+                # the same missions, however much of the table is reused
+                assert outcome(WorldRobot(world, board=make_board(5, 5, backend), table=table)) == outcome(WorldRobot(world))
+        assert len(table) <= capacity
+    assert table.evictions == 0
+    assert table.hits > table.misses
+
+def test_explore_frontier():
+    from wumpus.world import WorldRobot, random_world
+
+    def scan(robot):
+        # every safe unsniffed tile scored from scratch: highest score, then nearest the start, then x and y
+        best = None
+        for x in range(robot.width):
+            for y in range(robot.height):
+                if robot.board[x][y] & 0b011 or not robot.scents[x][y] & Tile.UNSNIFFED:
+                    continue
+                score = 0
+                for adj_x, adj_y in robot.board.adjacent(x, y):
+                    score += robot.board[adj_x][adj_y]
+                    if robot.scents[adj_x][adj_y] & Tile.GOLD and robot.board[x][y] & Tile.GOLD:
+                        score += 100
+                if score and (best is None or (-score, robot.distance(robot.start_pos, (x, y))) < best[0]):
+                    best = ((-score, robot.distance(robot.start_pos, (x, y))), (x, y))
+        return best and best[1]
+
+    picks = []
+
+    class Checked(WorldRobot):
+        def get_explore_position(self):
+            pos = super().get_explore_position()
+            assert pos == scan(self)
+            picks.append(pos)
+            return pos
+
+    for seed in range(40):
+        robot = Checked(random_world(9, 9, pits=6, seed=seed))
+        try:
+            robot.start()
+        except Exception:
+            pass
+    assert len(picks) > 400
+
+    # scents changed behind the robot's back need a rehash
+    robot = WorldRobot(random_world(4, 4, seed=0))
+    assert robot.get_explore_position() == (0, 0)
+    robot.scents[0][0] = 0
+    robot.board.restrict(1, 0, Tile.EMPTY)
+    robot.rehash()
+    assert robot.get_explore_position() == (1, 0)
+
+def test_adjacency():
+    import tracemalloc
+    from wumpus import wumpus
+    from wumpus.npboard import NumpyBoard
+    from wumpus.world import WorldRobot, random_world
+
+    table = adjacency(6, 3)
+    assert adjacency(6, 3) is table
+    for x in range(6):
+        for y in range(3):
+            t = x * 3 + y
+            assert table.tiles[t] == (x, y)
+            expected = [(x + dx, y + dy) for dx, dy in DIRECTIONS if 0 <= x + dx < 6 and 0 <= y + dy < 3]
+            assert list(table.adjacent[t]) == expected
+            assert [table.tiles[j] for j in table.indices[t]] == expected
+            assert [table.tiles[j] for j in table.steps[t] if j >= 0] == expected
+    # positions off the board still get their neighbours on it
+    assert adjacent_positions(-1, 0, 6, 3) == ((0, 0),)
+
+    # boards hand out the shared tuples, so looking up neighbours allocates nothing
+    only_wumpus = [tracemalloc.Filter(True, wumpus.__file__)]
+    for board in (Board(width=8, height=8), BitBoard(width=8, height=8), NumpyBoard(width=8, height=8)):
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot().filter_traces(only_wumpus)
+        kept = [board.adjacent(x, y) for x in range(8) for y in range(8)]
+        after = tracemalloc.take_snapshot().filter_traces(only_wumpus)
+        tracemalloc.stop()
+        assert sum(stat.count_diff for stat in after.compare_to(before, "filename")) == 0
+        assert kept[9] is adjacency(8, 8).adjacent[9]
+        # and the changes log holds them too
+        board.restrict(1, 1, Tile.EMPTY)
+        assert board.changes == [(1, 1)] and board.changes[0] is adjacency(8, 8).tiles[9]
+
+    # a whole explore step (frontier, planning and learning the scent) reuses the scratch space of
+    # its board size, so it allocates far less than one distance field (128KB on 128x128), and
+    # keeps little of it
+    class TurningRobot(WorldRobot):
+        TURN_COST = 1
+        TURN_180_COST = 2
+
+    for robot_class, size, seed in [(WorldRobot, 32, 34), (TurningRobot, 32, 34), (WorldRobot, 128, 128)]:
+        robot = robot_class(random_world(size, size, pits=size * size // 10, seed=seed))
+        for _ in range(10):
+            robot.explore_step()
+        tracemalloc.start()
+        peaks = []
+        start = tracemalloc.get_traced_memory()[0]
+        while robot.state < States.GOLD_KNOWN and len(peaks) < 200:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            robot.explore_step()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        kept = tracemalloc.get_traced_memory()[0] - start
+        tracemalloc.stop()
+        assert len(peaks) > 50
+        assert sorted(peaks)[len(peaks) // 2] < 8 * 1024
+        assert kept / len(peaks) < 1024
+
+def test_mission_log(tmp_path):
+    from wumpus.world import WorldRobot, random_world
+
+    world = random_world(6, 6, pits=3, seed=4)
+    logs = []
+    for policy, capacity in [(MissionLog.ALWAYS, 1), (MissionLog.FULL, 5), (MissionLog.FULL, 1000)]:
+        path = str(tmp_path / ("%d-%d.txt" % (policy, capacity)))
+        robot = WorldRobot(world, log_actions=MissionLog(path, capacity, policy))
+        robot.start()
+        with open(path) as f:
+            logs.append(f.read())
+    assert logs[0] == logs[1] == logs[2]
+    lines = logs[0].splitlines()
+    assert lines[0] == "STARTING" and "RETRIEVED GOLD" in lines
+    assert "recieved scent 0 at 0, 0" in lines
+
+    # every board drawn from the recorded changes matches the board at the time
+    path = str(tmp_path / "boards.txt")
+    log = MissionLog(path, capacity=3)
+    board = Board(width=3, height=2)
+    expected = []
+    for x, y, mask in [(0, 0, 0), (1, 0, Tile.WUMPUS), (2, 1, Tile.EMPTY), (1, 1, Tile.PIT), (0, 1, Tile.PIT)]:
+        board.restrict(x, y, mask)
+        log.log_board("board:", board)
+        expected.append(str(board))
+    log.flush()
+    with open(path) as f:
+        assert f.read() == "".join("board:\n%s\n" % drawn for drawn in expected)
+
+    # with END only the last messages are kept
+    path = str(tmp_path / "end.txt")
+    log = MissionLog(path, capacity=4, policy=MissionLog.END)
+    for n in range(10):
+        log.log("message %d", n)
+    assert log.size == 4
+    with open(path) as f:
+        assert f.read() == ""
+    log.flush()
+    with open(path) as f:
+        assert f.read().splitlines() == ["(6 earlier messages dropped)"] + ["message %d" % n for n in range(6, 10)]
+
+def test_trace_replay(tmp_path):
+    from wumpus.trace import FORWARD, ROT_180, PERCEPT, END, Trace, TraceDiverged, TraceRecorder, load, replay
+    from wumpus.world import WorldRobot, random_world
+
+    for seed in range(60):
+        world = random_world(5, 5, pits=seed % 5, seed=seed)
+        recorder = TraceRecorder()
+        robot = WorldRobot(world, trace=recorder)
+        try:
+            robot.start()
+        except Exception:
+            pass
+        trace = recorder.trace
+        assert trace.records[-1][:4] == (END, robot.x, robot.y, robot.state)
+        assert robot.moves == sum(1 for record in trace.records if record[0] == FORWARD)
+
+        recorder.save(str(tmp_path / "mission.trace"))
+        loaded = load(str(tmp_path / "mission.trace"))
+        assert loaded.decisions() == trace.decisions()
+        # the same decisions are made again, whichever board the replay uses
+        assert replay(loaded).trace.trace.decisions() == trace.decisions()
+        assert replay(loaded, board=BitBoard(width=5, height=5)).trace.trace.decisions() == trace.decisions()
+
+    # a robot that plans differently (here, one that minds its turns) is caught at its first different action
+    world = [[Tile.EMPTY] * 6 for _ in range(6)]
+    world[5][4] = Tile.GOLD
+    recorder = TraceRecorder()
+    WorldRobot(world, trace=recorder).start()
+    trace = Trace.from_bytes(recorder.trace.to_bytes())
+    trace.costs = (1, 1, 2)
+    with pytest.raises(TraceDiverged) as diverged:
+        replay(trace)
+    assert FORWARD <= diverged.value.expected[0] <= ROT_180 and FORWARD <= diverged.value.actual[0] <= ROT_180
+
+    # and a different scent leads to different decisions
+    trace = Trace.from_bytes(recorder.trace.to_bytes())
+    index = [record[0] for record in trace.records].index(PERCEPT)
+    trace.records[index] = (PERCEPT, 0, 0, Tile.PIT) + trace.records[index][4:]
+    with pytest.raises(TraceDiverged) as diverged:
+        replay(trace)
+    assert diverged.value.index > index
+
+def test_profiler():
+    import time
+    from wumpus.world import WorldRobot, random_world
+
+    # timings vary from run to run, so only the calls counted and loose bounds on the times are checked
+    profile = Profiler()
+    sniffs = 0
+    start = time.perf_counter_ns()
+    for seed in range(20):
+        robot = WorldRobot(random_world(6, 6, pits=2, seed=seed), profile=profile)
+        try:
+            robot.start()
+        except Exception:
+            pass
+        sniffs += robot.sniffs
+    elapsed = time.perf_counter_ns() - start
+    assert sorted(profile.counts) == sorted(profile.totals) == sorted(Profiler.PHASES)
+    assert profile.counts["sensing"] == sniffs
+    assert profile.counts["other"] == 20
+    for phase in Profiler.PHASES:
+        assert sum(profile.histograms[phase]) == profile.counts[phase] > 0
+        assert 0 <= profile.maxima[phase] <= profile.totals[phase]
+    # each call's time leaves out the phases it calls into, so the phases add up to no more than the missions
+    assert sum(profile.totals.values()) <= elapsed
+    report = profile.report()
+    for phase in Profiler.PHASES:
+        assert phase in report
+
+    # moving counts as actuation, not as the planning or mission that led to it
+    class SlowRobot(WorldRobot):
+        def forward(self):
+            time.sleep(0.002)
+            super().forward()
+
+    world = [[Tile.EMPTY] * 4 for _ in range(4)]
+    world[3][0] = Tile.GOLD
+    robot = SlowRobot(world, profile=True)
+    robot.start()
+    assert robot.profile.counts["actuation"] >= robot.moves > 0
+    assert robot.profile.counts["other"] == 1
+    assert robot.profile.totals["actuation"] >= robot.moves * 2000000
+    # each move is in the buckets from 2**10 (1024) microseconds up
+    assert sum(robot.profile.histograms["actuation"][11:]) >= robot.moves
+
+def test_async_robot():
+    import asyncio
+    from wumpus.asyncrobot import AsyncRobot
+    from wumpus.world import WorldRobot, random_world
+
+    class AsyncWorldRobot(AsyncRobot):
+        # the world sees a body that only moves once an action is carried out
+        def __init__(self, world, **kwargs):
+            self.body = WorldRobot(world)
+            self.overlapped = 0
+            self.speculated = 0
+            super().__init__(width=len(world), height=len(world[0]), **kwargs)
+
+        async def forward(self):
+            await asyncio.sleep(0)
+            self.body.x += self.body.dx
+            self.body.y += self.body.dy
+            self.body.forward()
+
+        async def rot_cw(self):
+            await asyncio.sleep(0)
+            self.body.dx, self.body.dy = self.body.dy, -self.body.dx
+            self.body.rot_cw()
+
+        async def rot_ccw(self):
+            await asyncio.sleep(0)
+            self.body.dx, self.body.dy = -self.body.dy, self.body.dx
+            self.body.rot_cw()
+
+        async def shoot(self):
+            await asyncio.sleep(0)
+            self.body.shoot()
+
+        async def receive_scent(self):
+            # long enough to speculate on every scent
+            for _ in range(10):
+                await asyncio.sleep(0)
+            return self.body.receive_scent()
+
+        async def think(self):
+            if (self.body.x, self.body.y) != (self.x, self.y):
+                self.overlapped += 1
+            await super().think()
+
+        def eliminate(self):
+            if self._branch is not None:
+                self.speculated += 1
+            super().eliminate()
+
+    def run(robot, body, start):
+        try:
+            start()
+        except Exception as e:
+            return str(e), body.moves, body.rotations, body.shots, body.sniffs, [list(col) for col in robot.board]
+        return body.succeeded, body.moves, body.rotations, body.shots, body.sniffs, [list(col) for col in robot.board]
+
+    # the same decisions as Robot, whatever happens on the way
+    overlapped = 0
+    speculated = 0
+    for seed in range(100):
+        world = random_world(6, 6, pits=seed % 5, seed=seed)
+        robot = WorldRobot(world)
+        async_robot = AsyncWorldRobot(world)
+        assert run(robot, robot, robot.start) == run(async_robot, async_robot.body,
+                                                     lambda: asyncio.run(async_robot.start()))
+        assert not async_robot._actions
+        overlapped += async_robot.overlapped
+        speculated += async_robot.speculated
+    # and it thinks while moving, working out what it does next before the scent arrives
+    assert overlapped > 0
+    assert speculated > 0
+
+    robot = AsyncWorldRobot(random_world(6, 6, pits=1, seed=3), profile=True)
+    asyncio.run(robot.start())
+    assert robot.profile.counts["sensing"] == robot.body.sniffs
+    # (a rot_180 is one action of two rotations)
+    assert robot.body.moves < robot.profile.counts["actuation"] <= robot.body.moves + robot.body.rotations
+
+    # where Robot would spin in place for good, it gives up rather than queue rotations forever
+    world = random_world(4, 4, pits=7, seed=214)
+    with pytest.raises(RuntimeError, match="spinning"):
+        WorldRobot(world).start()
+    with pytest.raises(RuntimeError, match="no way forward"):
+        asyncio.run(AsyncWorldRobot(world).start())
+
+def test_speculation():
+    from wumpus.world import WorldRobot, random_world
+
+    class SpeculatingRobot(WorldRobot):
+        # speculates on every possible scent before receiving one
+        speculated = 0
+
+        def receive_scent(self):
+            if self.state < States.GOLD_KNOWN:
+                for scent in self.possible_scents():
+                    self.speculate(scent)
+            scent = super().receive_scent()
+            if self.state < States.GOLD_KNOWN:
+                assert scent in self._speculation[3]
+                SpeculatingRobot.speculated += 1
+            return scent
+
+    class TurningRobot(WorldRobot):
+        TURN_COST = 2
+        TURN_180_COST = 3
+
+    class SpeculatingTurningRobot(SpeculatingRobot):
+        TURN_COST = 2
+        TURN_180_COST = 3
+
+    class TesterRobot(WorldRobot):
+        # at the gold, also receives the scents of the adjacent tiles, as the tester's World sends them
+        gold_scents = 0
+
+        def receive_scent(self):
+            scent = super().receive_scent()
+            if scent & 0b1000:
+                for adj_x, adj_y in self.board.adjacent(self.x, self.y):
+                    scent |= self.world[adj_x][adj_y]
+                if scent != 0b1000:
+                    TesterRobot.gold_scents += 1
+            return scent
+
+    class SpeculatingTesterRobot(SpeculatingRobot, TesterRobot):
+        pass
+
+    def run(robot):
+        try:
+            robot.start()
+        except Exception as e:
+            return str(e), robot.moves, robot.rotations, robot.shots, [list(col) for col in robot.board]
+        return robot.succeeded, robot.moves, robot.rotations, robot.shots, [list(col) for col in robot.board]
+
+    # the robot decides the same once the speculated scent arrives, on any board, with or without a table
+    for seed in range(90):
+        size = 4 + seed % 4
+        world = random_world(size, size, pits=seed % 5, seed=seed)
+        backend = BitBoard if seed % 3 == 1 else Board
+        table = TranspositionTable() if seed % 3 == 2 else None
+        robots = (TurningRobot, SpeculatingTurningRobot) if seed % 2 else (WorldRobot, SpeculatingRobot)
+        expected = run(robots[0](world, board=backend(width=size, height=size)))
+        assert run(robots[1](world, board=backend(width=size, height=size), table=table)) == expected
+    assert SpeculatingRobot.speculated > 0
+
+    # including at the gold, whatever else is scented there
+    for seed in range(60):
+        size = 4 + seed % 3
+        world = random_world(size, size, pits=2 + seed % 4, seed=seed)
+        assert run(SpeculatingTesterRobot(world)) == run(TesterRobot(world))
+    assert TesterRobot.gold_scents > 0
+
+    # speculating leaves the robot as it was
+    robot = WorldRobot(random_world(6, 6, pits=2, seed=1))
+    board = [list(col) for col in robot.board]
+    changes = len(robot.board.changes)
+    for scent in robot.possible_scents():
+        robot.speculate(scent)
+    assert [list(col) for col in robot.board] == board and len(robot.board.changes) == changes
+    assert robot.possible_scents() == list(range(8)) + [0b1000 | scent for scent in range(8)]
+
+def test_policy():
+    pytest.importorskip("numpy")
+    from wumpus.oracle import enumerate_worlds, world_grid
+    from wumpus.policy import Node, build_tree, compile_policy, encode
+    from wumpus.policybot import END, FORWARD, HEADER_SIZE, ROT_CW, SNIFF, PolicyRobot
+    from wumpus.world import WorldRobot
+
+    class TurningRobot(WorldRobot):
+        TURN_COST = 2
+        TURN_180_COST = 3
+
+    class WorldPolicyRobot(PolicyRobot):
+        # plays a world like WorldRobot, through a WorldRobot kept where the policy says the robot is
+        def __init__(self, table, world):
+            super().__init__(table)
+            self.body = WorldRobot(world)
+
+        def _body(self):
+            self.body.x, self.body.y, self.body.dx, self.body.dy = self.x, self.y, self.dx, self.dy
+            return self.body
+
+        def forward(self):
+            self._body().forward()
+
+        def rot_cw(self):
+            self._body().rot_cw()
+
+        def rot_ccw(self):
+            self._body().rot_ccw()
+
+        def shoot(self):
+            self._body().shoot()
+
+        def receive_scent(self):
+            return self._body().receive_scent()
+
+    def run(robot, body):
+        try:
+            robot.start()
+        except Exception as e:
+            # the policy gives up where the Robot would spin in place until WorldRobot stops it
+            return type(e).__name__, body.moves, body.shots
+        return body.succeeded, body.moves, body.rotations, body.shots
+
+    # every world of the board plays out as it does with the Robot
+    table = compile_policy(3, 3, costs=(1, 2, 3))
+    gold, wumpus, pits = enumerate_worlds(3, 3)
+    for i in range(0, len(gold), 3):
+        world = world_grid(3, 3, gold[i], wumpus[i], pits[i])
+        robot = WorldPolicyRobot(table, world)
+        expected = TurningRobot(world)
+        assert run(robot, robot.body) == run(expected, expected)
+
+    # identical subtrees are written once
+    root = Node()
+    root.end = SNIFF
+    for scent in (0, 2, 4):
+        child = root.children[scent] = Node()
+        child.ops = [FORWARD, FORWARD, ROT_CW]
+        child.end = END
+    table = encode(root, 3, 3)
+    assert len(table) == HEADER_SIZE + 3 + 1 + 2 + 3 * 3
+    assert table.count(bytes([FORWARD | 1 << 3, ROT_CW, END])) == 1
+
+    root = build_tree(3, 3, max_pits=1)
+    robot = WorldPolicyRobot(encode(root, 3, 3), world_grid(3, 3, 8, 4, 0))
+    robot.start()
+    assert robot.body.succeeded
+
+    with pytest.raises(ValueError):
+        PolicyRobot(b"not a policy table")
+
+    # the tester's World adds the scents of the adjacent tiles to the gold's, which the table has no branches for
+    from tests.worldbot import LETTERS
+    from tests.wumpus_tester import PUZZLES, World, finished
+
+    class TesterPolicyRobot(PolicyRobot):
+        # plays the tester's World like WorldBot
+        gold_scents = 0
+
+        def __init__(self, table, world):
+            super().__init__(table)
+            self.world = world
+
+        def forward(self):
+            self.world.move(LETTERS[(self.dx, self.dy)])
+
+        def rot_cw(self):
+            pass
+
+        def rot_ccw(self):
+            pass
+
+        def shoot(self):
+            self.world.kill_wumpus(LETTERS[(self.dx, self.dy)])
+
+        def receive_scent(self):
+            # the start is not queried (the tester counts it as visited already)
+            if self.x == 0 and self.y == 0:
+                return 0
+            scent = self.world.query()
+            if scent > 0b1000:
+                TesterPolicyRobot.gold_scents += 1
+            return scent
+
+    table = compile_policy(4, 4, max_pits=1)
+    next_to_wumpus = [
+        ["g", "w", "h", "e"],
+        ["e", "e", "e", "e"],
+        ["e", "e", "e", "e"],
+        ["e", "e", "e", "e"]
+    ]
+    for grid in PUZZLES["easy"][:2] + [next_to_wumpus]:
+        world = World(grid)
+        TesterPolicyRobot(table, world).start()
+        assert finished(world)
+    assert TesterPolicyRobot.gold_scents > 0
+
+def test_lean_robot():
+    import tracemalloc
+    from wumpus import leanwumpus
+    from wumpus.leanwumpus import LeanRobot
+    from wumpus.world import WorldRobot, random_world
+
+    class WorldLeanRobot(LeanRobot):
+        # plays a world like WorldRobot, through a WorldRobot kept where the lean robot is
+        def __init__(self, world):
+            super().__init__(len(world), len(world[0]))
+            self.body = WorldRobot(world)
+
+        def _body(self):
+            self.body.x, self.body.y, self.body.dx, self.body.dy = self.x, self.y, self.dx, self.dy
+            return self.body
+
+        def forward(self):
+            self._body().forward()
+
+        def rot_cw(self):
+            self._body().rot_cw()
+
+        def rot_ccw(self):
+            self._body().rot_ccw()
+
+        def shoot(self):
+            self._body().shoot()
+
+        def receive_scent(self):
+            return self._body().receive_scent()
+
+    def run(robot, body):
+        try:
+            robot.start()
+        except Exception as e:
+            return type(e).__name__, body.moves, body.rotations, body.shots, body.sniffs
+        return body.succeeded, body.moves, body.rotations, body.shots, body.sniffs
+
+    # the same missions and deductions as the Robot
+    for size in (3, 4, 6, 8):
+        for seed in range(60):
+            world = random_world(size, size, pits=seed % (size * size // 4 + 1), seed=seed)
+            robot = WorldLeanRobot(world)
+            expected = WorldRobot(world)
+            assert run(robot, robot.body) == run(expected, expected)
+            assert [list(robot.board[x * size:(x + 1) * size]) for x in range(size)] == [list(col) for col in expected.board]
+
+    # once created, solving allocates nothing that grows with the board, and keeps nothing
+    for size in (4, 8, 16):
+        solved = 0
+        for seed in range(10):
+            robot = WorldLeanRobot(random_world(size, size, pits=size * size // 10, seed=seed))
+            tracemalloc.start()
+            try:
+                robot.start()
+            except Exception:
+                pass
+            finally:
+                peak = tracemalloc.get_traced_memory()[1]
+                kept = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(True, leanwumpus.__file__)])
+                tracemalloc.stop()
+            if robot.body.succeeded:
+                solved += 1
+                # (CPython allocates the ints past 256 as it goes, which MicroPython does not)
+                assert peak < 1024
+                assert not kept.traces
+        assert solved
+
+    with pytest.raises(ValueError):
+        LeanRobot(17, 16)
+
+def test_team():
+    from wumpus.team import Team
+    from wumpus.world import RobotDied, WorldRobot, random_world
+
+    def make_team(world, count, **kwargs):
+        board = Board(width=len(world), height=len(world[0]))
+        robots = [WorldRobot(world, board=board, **kwargs) for _ in range(count)]
+        # one world, so a shot wumpus is dead for everyone
+        for robot in robots[1:]:
+            robot.world = robots[0].world
+        return Team(robots)
+
+    def run(mission, robot):
+        try:
+            mission.start()
+        except Exception as e:
+            return type(e).__name__, robot.moves, robot.rotations, robot.shots, robot.sniffs
+        return robot.succeeded, robot.moves, robot.rotations, robot.shots, robot.sniffs
+
+    # a team of one is the Robot
+    for seed in range(40):
+        size = 4 + seed % 4
+        world = random_world(size, size, pits=seed % 3, seed=seed)
+        team = make_team(world, 1)
+        robot = team.robots[0]
+        expected = WorldRobot(world)
+        assert run(team, robot) == run(expected, expected)
+        if robot.succeeded:
+            assert team.carrier is robot and team.makespan == robot.moves
+
+    # more robots share the exploring, so the mission takes less time
+    makespans = [0, 0, 0]
+    for seed in range(20):
+        world = random_world(12, 12, pits=12, seed=seed)
+        teams = [make_team(world, count) for count in (1, 2, 3)]
+        try:
+            for team in teams:
+                assert team.start().succeeded
+        except RobotDied:
+            continue
+        for i, team in enumerate(teams):
+            makespans[i] += team.makespan
+    assert makespans[0] > makespans[1] > makespans[2]
+
+    # every sniff is at a different tile
+    team = make_team(random_world(12, 12, pits=12, seed=1), 3)
+    sniffed = []
+    for robot in team.robots:
+        receive_scent = robot.receive_scent
+        robot.receive_scent = lambda robot=robot, receive_scent=receive_scent: sniffed.append((robot.x, robot.y)) or receive_scent()
+    team.start()
+    assert len(sniffed) == len(set(sniffed)) > 1
+
+    with pytest.raises(ValueError):
+        Team([WorldRobot(world), WorldRobot(world)])
+
+def test_incremental_eliminate():
+    class CountingScents(list):
+        # counts how many scents are looked up
+        reads = 0
+        def __getitem__(self, x):
+            CountingScents.reads += 1
+            return super().__getitem__(x)
+
+    size = 64
+    board = Board(width=size, height=size)
+    scents = CountingScents(board.new_scents())
+    board.restrict(0, 0, Tile.EMPTY)
+    board.eliminate(scents)
+
+    for x, y, scent in [(0, 0, 0), (1, 0, Tile.PIT), (0, 1, 0), (1, 1, Tile.GOLD), (0, 2, Tile.GOLD)]:
+        CountingScents.reads = 0
+        changes = len(board.changes)
+        scents[x][y] = scent
+        board.reduce(scent, x, y)
+        board.eliminate(scents)
+        # only the scents around the tiles that changed are checked again
+        # (the first gold scent rules out gold almost everywhere, so that step changes most tiles)
+        assert CountingScents.reads <= 4 * (len(board.changes) - changes) + 10
+
+    # the pit next to (1, 0) can only be at (2, 0), and the gold next to (1, 1) only at (1, 2)
+    assert board[2][0] == Tile.PIT
+    assert board.gold_pos == (1, 2)
+    assert board.changes[0] == (0, 0)
+
+def test_queue():
+    q = Queue(3)
+    for item in range(3):
+        q.put(item)
+    with pytest.raises(IndexError):
+        q.put(3)
+    assert q.get() == 0
+    q.put(3)
+    assert [q.get() for _ in range(3)] == [1, 2, 3]
+    assert q.empty()
+
+def test_path_planner():
+    import random
+    rng = random.Random(4)
+    size = 7
+    board = Board([[rng.choice([0, 0, 0, 1, 2, 7]) for _ in range(size)] for _ in range(size)])
+    planner = PathPlanner(board)
+    goals = [(6, 6), (3, 0), (0, 5), (5, 2), (2, 2)]
+
+    for step in range(40):
+        for end in goals:
+            for start in [(0, 0), (6, 0), (4, 4)]:
+                assert planner.path(*start, *end) == shortest_path(*start, *end, board)
+        # make a random tile safe, which may open up new paths
+        board.restrict(rng.randrange(size), rng.randrange(size), Tile.GOLD)
+
+    # a cached field is reused while nothing it depends on changes
+    field = planner.distance_field(6, 6)
+    assert planner.distance_field(6, 6) is field
+
+def test_route_minimises_time():
+    import random
+
+    def all_paths(board, x, y, end, visited):
+        # every simple path through safe tiles (only the end may be dangerous)
+        if (x, y) == end:
+            yield []
+            return
+        if board[x][y] & 0b011:
+            return
+        for dx, dy in DIRECTIONS:
+            nxt = (x + dx, y + dy)
+            if nxt in visited or not (0 <= nxt[0] < 4 and 0 <= nxt[1] < 4):
+                continue
+            for rest in all_paths(board, nxt[0], nxt[1], end, visited | {nxt}):
+                yield [(dx, dy)] + rest
+
+    rng = random.Random(5)
+    for _ in range(30):
+        board = Board([[rng.choice([0, 0, 0, 1, 4]) for _ in range(4)] for _ in range(4)])
+        board[0][0] = 0
+        planner = PathPlanner(board, forward_cost=3, turn_cost=2, turn_180_cost=5)
+        end = (rng.randrange(4), rng.randrange(4))
+        heading = rng.choice(DIRECTIONS)
+        route = planner.route(0, 0, *heading, *end)
+        costs = [planner.cost(path, *heading) for path in all_paths(board, 0, 0, end, {(0, 0)})]
+        if end == (0, 0) or not costs:
+            assert route == []
+            continue
+        assert planner.cost(route, *heading) == min(costs)
+        assert route in list(all_paths(board, 0, 0, end, {(0, 0)}))
+
+    # with slow turns a longer but straighter route wins
+    board = Board([[0, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 0]])
+    planner = PathPlanner(board, forward_cost=1, turn_cost=10, turn_180_cost=20)
+    assert planner.route(0, 0, 0, 1, 3, 3) == [(0, 1)] * 3 + [(1, 0)] * 3
+
+def test_route_to_any():
+    import random
+    from wumpus.world import WorldRobot
+
+    # matches the best single goal route (with the final turn to face) over all the goals
+    rng = random.Random(7)
+    for _ in range(50):
+        board = Board([[rng.choice([0, 0, 0, 1, 4]) for _ in range(4)] for _ in range(4)])
+        board[0][0] = 0
+        planner = PathPlanner(board, forward_cost=3, turn_cost=2, turn_180_cost=5)
+        heading = rng.choice(DIRECTIONS)
+        goals = [(rng.randrange(4), rng.randrange(4)) + rng.choice(DIRECTIONS) for _ in range(3)]
+        best = None
+        for x, y, face_dx, face_dy in goals:
+            if (x, y) == (0, 0):
+                route = []
+            else:
+                route = planner.route(0, 0, *heading, x, y)
+                if not route:
+                    continue
+            cost = planner.cost(route + [(face_dx, face_dy)], *heading) - planner.forward_cost
+            if best is None or cost < best:
+                best = cost
+        path, goal = planner.route_to_any(0, 0, *heading, goals)
+        if best is None:
+            assert (path, goal) == ([], None)
+            continue
+        faces = [goal_face[2:] for goal_face in goals if goal_face[:2] == goal]
+        assert min(planner.cost(path + [face], *heading) for face in faces) - planner.forward_cost == best
+
+    # shoot_at moves to the nearest firing position, taking the one needing the fewest rotations
+    world = [[Tile.EMPTY] * 4 for _ in range(4)]
+    world[2][2] = Tile.WUMPUS
+    world[3][3] = Tile.GOLD
+    robot = WorldRobot(world)
+    for x in range(4):
+        for y in range(4):
+            robot.board.restrict(x, y, Tile.WUMPUS if (x, y) == (2, 2) else Tile.GOLD)
+    robot.shoot_at(2, 2)
+    assert (robot.x, robot.y, robot.dx, robot.dy) == (2, 1, 0, 1)
+    assert robot.moves == 3 and robot.rotations == 1 and robot.shots == 1
+    assert robot.world[2][2] == Tile.EMPTY
+
+def test_yolo():
+    from wumpus.world import WorldRobot
+
+    world = [[Tile.EMPTY] * 4 for _ in range(4)]
+    world[1][0] = Tile.PIT
+    world[3][3] = Tile.GOLD
+    world[3][0] = Tile.WUMPUS
+    robot = WorldRobot(world)
+    robot.sniff()
+    robot.board.eliminate(robot.scents)
+    assert robot.get_explore_position() is None
+
+    # both tiles next to the breeze are reachable guesses, the first one found is taken and assumed safe
+    assert robot.yolo() == (0, 1)
+    assert robot.board[0][1] == Tile.EMPTY
+    assert robot.board[1][0] == Tile.PIT
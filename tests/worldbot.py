@@ -0,0 +1,66 @@
+"""
+WorldBot is the in process counterpart of BitBot: the same wumpus Robot, but instead of printing
+commands for wumpus_tester.py to read from a pipe, it calls the tester's World directly.
+
+    wumpus_tester.test(WorldBot, world)
+"""
+
+try:
+    from wumpus.wumpus import Robot
+except ImportError:
+    from wumpus import Robot
+
+# the tester's compass letter for each direction the robot can face
+LETTERS = {(1, 0): "e", (-1, 0): "w", (0, 1): "n", (0, -1): "s"}
+
+
+class WorldBot(Robot):
+
+    # stop a robot that would otherwise spin forever (a subprocess would just hang)
+    MAX_ACTIONS = 10000
+
+    def __init__(self, world, *args, **kwargs):
+        self.world = world
+        self.actions = 0
+        # what the tester reports when the world rejects an action, None while all is well
+        self.failure = None
+        super().__init__(*args, **kwargs)
+
+    def _act(self):
+        self.actions += 1
+        if self.actions > self.MAX_ACTIONS:
+            raise RuntimeError("robot made too many actions")
+
+    def forward(self):
+        self._act()
+        try:
+            self.world.move(LETTERS[(self.dx, self.dy)])
+        except Exception as e:
+            self.failure = "Test failed. " + str(e)
+            raise
+
+    def receive_scent(self):
+        self._act()
+        # like BitBot, the start is not queried (the tester counts it as visited already)
+        if self.x == 0 and self.y == 0:
+            return 0
+        scent = self.world.query()
+        if scent is None:
+            # World.query has printed why
+            self.failure = ""
+            raise RuntimeError("queried a visited tile")
+        return scent
+
+    def shoot(self):
+        self._act()
+        try:
+            self.world.kill_wumpus(LETTERS[(self.dx, self.dy)])
+        except Exception as e:
+            self.failure = str(e) + "\nQuitting test."
+            raise
+
+    def rot_cw(self):
+        self._act()
+
+    def rot_ccw(self):
+        self._act()
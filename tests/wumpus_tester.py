@@ -7,6 +7,10 @@ GNU GENERAL PUBLIC LICENSE
 
 Usage
 ./tester.py <your_executable> <difficulty> [--enable_hardest]
+./tester.py <difficulty> --in_process [--enable_hardest]
+./tester.py <your_executable> <difficulty> --parallel [N] [--random COUNT]
+./tester.py <your_executable> <difficulty> --session [--parallel [N]]
+./tester.py <your_executable> <difficulty> --parallel [N] --expect <outcomes_file>
 
 How to use
 When you have compiled your code, you can run this tester against your code to see whether or not it passes the sample Wumpus World puzzles I have included in this script. There are three different difficulties of puzzles (easy, medium, and hard), and three puzzles at each difficulty, for a total of 9 puzzles. Additionally, if you think your solution is particularly clever, you can test it against my diabolical example.
@@ -16,10 +20,98 @@ Movement commands: "n", "e", "s", "w" (for north, east, south, west)
 Kill commands: "kill n", "kill e", "kill s", "kill w" (for killing the Wumpus)
 Request input: "input:"
 If text besides what is listed above is printed to stdout, it will assume you have made a mistake, and will fail the test, so be careful about spelling. Furthermore, it assumes that there will not be excess newlines, and that there will be a newline after each input.
+
+With --in_process no executable is launched: the wumpus Robot (WorldBot in worldbot.py) runs inside the tester and calls World.move, World.query and World.kill_wumpus directly, which is orders of magnitude faster. test() also accepts any such Robot class in place of an executable.
+
+With --parallel the worlds are played without pausing on a pool of N processes (one per core by default), optionally along with COUNT random worlds, and only a summary of the results is printed.
+
+With --session the executable is launched once (once per worker with --parallel), with an extra --session argument, and plays every world on that process: before each world the tester writes "new", and the executable prints "done" when the world is over instead of exiting. "quit" or the end of its input ends the session. This saves starting the executable (and, for a python script, importing the solver) for every world. See bitbot.py.
+
+With --expect the results of --parallel are also compared with an outcomes file of the wumpus Robot's results on every world (see wumpus/outcomes.py), listing the worlds where they differ.
 """
 
 import subprocess, io, sys, argparse
 import os
+import atexit, contextlib, random, threading, time
+from concurrent.futures import ProcessPoolExecutor
+
+# the built-in puzzles, as rows from north to south (the robot starts in the southwest corner)
+CUSTOM_WORLD = [
+    ["g", "p", "e", "e"],
+    ["w", "e", "e", "e"],
+    ["e", "e", "e", "e"],
+    ["e", "e", "e", "e"]
+]
+
+PUZZLES = {
+    "easy": [
+        [
+            ["e", "e", "e", "g"],
+            ["e", "e", "e", "e"],
+            ["e", "e", "e", "e"],
+            ["e", "e", "e", "w"]
+        ],
+        [
+            ["e", "e", "e", "h"],
+            ["e", "g", "e", "e"],
+            ["e", "e", "e", "w"],
+            ["e", "e", "e", "e"]
+        ],
+        [
+            ["h", "h", "e", "e"],
+            ["e", "e", "e", "w"],
+            ["e", "e", "g", "e"],
+            ["e", "e", "e", "e"]
+        ],
+    ],
+    "medium": [
+        [
+            ["h", "h", "g", "h"],
+            ["h", "e", "e", "e"],
+            ["e", "e", "e", "e"],
+            ["e", "e", "e", "w"]
+        ],
+        [
+            ["e", "e", "h", "w"],
+            ["e", "e", "e", "g"],
+            ["e", "e", "e", "e"],
+            ["e", "e", "h", "h"]
+        ],
+        [
+            ["w", "e", "g", "e"],
+            ["e", "h", "e", "e"],
+            ["e", "e", "e", "e"],
+            ["e", "e", "e", "h"]
+        ],
+    ],
+    "hard": [
+        [
+            ["h", "h", "g", "e"],
+            ["h", "h", "e", "e"],
+            ["e", "h", "e", "e"],
+            ["e", "e", "w", "e"]
+        ],
+        [
+            ["e", "h", "e", "h"],
+            ["e", "e", "g", "e"],
+            ["e", "e", "e", "h"],
+            ["e", "e", "e", "e"]
+        ],
+        [
+            ["e", "e", "w", "g"],
+            ["e", "e", "h", "h"],
+            ["e", "e", "e", "h"],
+            ["e", "e", "e", "h"]
+        ],
+    ],
+}
+
+HARDEST_WORLD = [
+    ["e", "e", "h", "g"],
+    ["e", "e", "h", "w"],
+    ["e", "e", "e", "e"],
+    ["e", "e", "h", "h"]
+]
 
 class Tile:
     """State representation of a single tile in the Wumpus World."""
@@ -51,6 +143,7 @@ class World:
         self.bot_y = 3
         self.arrow = True
         self.gold = False
+        self.moves = 0
 
     def __str__(self):
         result = ""
@@ -140,6 +233,7 @@ class World:
             return [False, False, False, False]
 
     def move(self, direction):
+        self.moves += 1
         if(direction == "n"):
             if(self.bot_y == 0):
                 raise Exception("Walked out of map. (Too far north)")
@@ -194,57 +288,213 @@ class World:
 def main():
     # Better command line argument parsing
     parser = argparse.ArgumentParser(description='Test a user-developed application against Wumpus World puzzles.')
-    parser.add_argument('application', type=str, help='The application to test. This can be an executable or a python script.')
+    parser.add_argument('application', type=str, nargs='?', help='The application to test. This can be an executable or a python script.')
     parser.add_argument('difficulty', type=str, help='The difficulty of the tests to run against. This can be "easy", "medium", "hard", or "all"', choices=['easy', 'medium', 'hard', 'all'])
     parser.add_argument('--enable_hardest', help='Enable the hardest difficulty puzzle.', action='store_true')
+    parser.add_argument('--in_process', help='Run the wumpus Robot inside the tester instead of an application.', action='store_true')
+    parser.add_argument('--parallel', help='Play the worlds non-interactively on a pool of N processes (default: one per core) and print a summary.', type=int, nargs='?', const=0, metavar='N')
+    parser.add_argument('--session', help='Launch the application once (with --session) and play every world on it, see bitbot.py.', action='store_true')
+    parser.add_argument('--expect', help='With --parallel, report the worlds whose results differ from those of the wumpus Robot in this outcomes file (see wumpus/outcomes.py).', metavar='OUTCOMES')
+    parser.add_argument('--random', help='With --parallel, also play this many random worlds.', type=int, default=0, metavar='COUNT')
     args = parser.parse_args()
 
-    if args.difficulty in ['easy', 'medium', 'hard']:
-        runTests(args.application, args.difficulty, args.enable_hardest)
+    if args.in_process:
+        program = in_process_robot()
+    elif args.application is None:
+        parser.error('an application is required unless --in_process is given')
+    else:
+        program = args.application
+
+    if args.parallel is not None:
+        difficulties = ['easy', 'medium', 'hard'] if args.difficulty == 'all' else [args.difficulty]
+        worlds = puzzles(difficulties, args.enable_hardest) + random_worlds(args.random)
+        expected = load_outcomes(args.expect) if args.expect else None
+        failures = runParallel(program, worlds, args.parallel or None, args.session and not args.in_process, expected)
+        sys.exit(1 if failures else 0)
+
+    if args.session and not args.in_process:
+        with Session(program) as session:
+            runAll(session, args.difficulty, args.enable_hardest)
+    else:
+        runAll(program, args.difficulty, args.enable_hardest)
+
+def runAll(program, difficulty, enable_hardest=False):
+    """Run the tests of difficulty, or of every difficulty for "all"."""
+    if difficulty in ['easy', 'medium', 'hard']:
+        runTests(program, difficulty, enable_hardest)
     else:
-        runTests(args.application, 'easy')
-        runTests(args.application, 'medium')
-        runTests(args.application, 'hard', args.enable_hardest)
+        runTests(program, 'easy')
+        runTests(program, 'medium')
+        runTests(program, 'hard', enable_hardest)
+
+def in_process_robot():
+    """Return WorldBot, importing it (and the wumpus solver) from this repository."""
+    repository_on_path()
+    from tests.worldbot import WorldBot
+    return WorldBot
+
+def repository_on_path():
+    """Make the packages of this repository importable."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
 
 def test(program, world):
+    """Run program against world, returning whether it retrieved the gold and returned to start.
+
+    program is either a command to launch, which plays over stdin/stdout, a Session that plays
+    it on an already running process, or a Robot class that is constructed with the world and
+    plays in this process (see worldbot.py).
+    """
+    if isinstance(program, type):
+        return test_in_process(program, world)
+    if isinstance(program, Session):
+        return program.test(world)
+
     try:
         my_process = subprocess.Popen(program, bufsize=1, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        valid_inputs = [
-            "n", "e", "s", "w",
-            "kill n", "kill e", "kill s", "kill w",
-            "input:"
-        ]
-        while(my_process.returncode is None):
-            line = my_process.stdout.readline().decode('utf-8').rstrip()
-            if line in [None, ""] or line.isspace():
-                break
-            elif line in valid_inputs:
-                if "kill" in line: 
-                    world.kill_wumpus(line[-1:])
-                elif "input" in line:
-                    value = world.query()
-
-                    if value is None:
-                        return False
-                    else:
-                        my_process.stdin.write(str.encode(str(value) + "\n"))
-                        my_process.stdin.flush()
-                else:
-                    try:
-                        world.move(line)
-                    except Exception as e:
-                        print("Test failed. ",end="")
-                        print(e)
-                        return False
-                    
-            else:
-                print("Invalid input: " + line)
-                return False
-                
+        if not converse(my_process, world):
+            return False
     except Exception as e:
         print(e)
         print("Quitting test.")
         return False
+    return finished(world)
+
+def converse(my_process, world, session=False):
+    """Relay the commands my_process prints to world until it exits (or, in a session, prints "done").
+
+    Returns False if the run failed along the way, True if it ended and finished() should judge it.
+    """
+    valid_inputs = [
+        "n", "e", "s", "w",
+        "kill n", "kill e", "kill s", "kill w",
+        "input:"
+    ]
+    while(my_process.returncode is None):
+        line = my_process.stdout.readline().decode('utf-8').rstrip()
+        if line in [None, ""] or line.isspace():
+            if session:
+                # the session process exited in the middle of a world
+                print("Test failed. Solver session ended.")
+                return False
+            break
+        elif session and line == "done":
+            break
+        elif line in valid_inputs:
+            if "kill" in line: 
+                world.kill_wumpus(line[-1:])
+            elif "input" in line:
+                value = world.query()
+
+                if value is None:
+                    return False
+                else:
+                    my_process.stdin.write(str.encode(str(value) + "\n"))
+                    my_process.stdin.flush()
+            else:
+                try:
+                    world.move(line)
+                except Exception as e:
+                    print("Test failed. ",end="")
+                    print(e)
+                    return False
+                
+        else:
+            print("Invalid input: " + line)
+            return False
+    return True
+
+class Session:
+    """A long-lived solver process that plays one world after another.
+
+    The program is launched once with --session. For every world the tester writes "new", the
+    game then runs over stdin/stdout exactly as with a fresh process, and the program prints
+    "done" instead of exiting. A world that fails part way leaves the program out of step, so
+    the process is replaced before the next world. "quit" (or closing stdin) ends the session.
+
+    A world that takes longer than timeout seconds is failed and its process killed, so one
+    solver stuck in a loop does not stall a whole pool of sessions.
+    """
+    def __init__(self, program, timeout=10):
+        self.command = [program, "--session"] if isinstance(program, str) else list(program) + ["--session"]
+        self.timeout = timeout
+        self.process = None
+        self.launches = 0
+
+    def launch(self):
+        # stderr is not read during a long session, so it must not be left to fill up a pipe
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.launches += 1
+
+    def test(self, world):
+        """Same as test, but played by this session's process."""
+        if self.process is None or self.process.poll() is not None:
+            self.launch()
+        # killing the process ends the readline that converse is blocked on
+        process = self.process
+        expired = threading.Event()
+        def expire():
+            expired.set()
+            process.kill()
+        timer = threading.Timer(self.timeout, expire)
+        timer.start()
+        try:
+            self.process.stdin.write(b"new\n")
+            self.process.stdin.flush()
+            ok = converse(self.process, world, session=True)
+        except Exception as e:
+            print(e)
+            print("Quitting test.")
+            ok = False
+        finally:
+            timer.cancel()
+        if not ok:
+            if expired.is_set():
+                print(f"Timed out after {self.timeout}s.")
+            self.kill()
+            return False
+        return finished(world)
+
+    def kill(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+
+    def close(self):
+        """Ask the process to quit, killing it if it does not."""
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.write(b"quit\n")
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+            self.process = None
+        except Exception:
+            self.kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def test_in_process(robot_class, world):
+    """Same as test, but the moves are method calls on world made by robot_class(world)."""
+    robot = robot_class(world)
+    try:
+        robot.start()
+    except Exception as e:
+        if robot.failure is not None:
+            if robot.failure:
+                print(robot.failure)
+            return False
+        # the robot crashed, which ends its run just like its process exiting would
+    return finished(world)
+
+def finished(world):
+    """Check the end of a run, reporting whether the robot returned to start with the gold."""
     if(world.bot_x == 0 and world.bot_y == 3):
         if(world.gold):
             print("Passed!")
@@ -258,6 +508,161 @@ def test(program, world):
         return False
 
 
+def puzzles(difficulties, enable_hardest=False):
+    """Return the (name, grid) of the built-in puzzles of the given difficulties."""
+    worlds = []
+    for difficulty in difficulties:
+        for n, grid in enumerate(PUZZLES[difficulty]):
+            worlds.append((f"{difficulty.capitalize()} world {n + 1}", grid))
+    if enable_hardest:
+        worlds.append(("Hardest world", HARDEST_WORLD))
+    return worlds
+
+def random_worlds(count, seed=0):
+    """Return the (name, grid) of count random worlds with gold, a wumpus and up to 3 holes.
+
+    The start and the tiles next to it are kept empty, since the start is never queried.
+    """
+    rng = random.Random(seed)
+    start = {(3, 0), (2, 0), (3, 1)}
+    tiles = [(row, col) for row in range(4) for col in range(4) if (row, col) not in start]
+    worlds = []
+    for n in range(count):
+        grid = [["e"] * 4 for _ in range(4)]
+        chosen = rng.sample(tiles, 2 + rng.randint(0, 3))
+        for (row, col), content in zip(chosen, ["g", "w"] + ["h"] * 3):
+            grid[row][col] = content
+        worlds.append((f"Random world {n + 1}", grid))
+    return worlds
+
+# the Session of each program in this process, with the pid that launched it (see session_for)
+_sessions = {}
+
+def session_for(program):
+    """Return this process's Session for program, launching one on first use.
+
+    Each worker of runParallel keeps its own for the chunk of worlds it is playing (see play_all),
+    so the pool is a pool of solver sessions.
+    """
+    key = program if isinstance(program, str) else tuple(program)
+    pid, session = _sessions.get(key, (None, None))
+    if pid != os.getpid():
+        # a forked worker must not share the pipes of its parent's session
+        if not _sessions:
+            atexit.register(close_sessions)
+        session = Session(program)
+        _sessions[key] = (os.getpid(), session)
+    return session
+
+def close_sessions():
+    """Close the sessions this process launched."""
+    for pid, session in _sessions.values():
+        if pid == os.getpid():
+            session.close()
+    _sessions.clear()
+
+def play(program, name, grid, session=False):
+    """Play one world without printing, returning (name, passed, moves, what test printed).
+
+    With session the world is played by this process's long-lived Session of program.
+    """
+    if session:
+        program = session_for(program)
+    world = World(grid)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        passed = test(program, world)
+    return name, passed, world.moves, output.getvalue()
+
+def play_all(program, worlds, session=False):
+    """Play every (name, grid) in worlds with play, returning the list of results.
+
+    With session the sessions launched on the way are closed at the end, which is how the
+    workers of runParallel close theirs (a pool worker exits without running atexit handlers).
+    """
+    try:
+        return [play(program, name, grid, session) for name, grid in worlds]
+    finally:
+        if session:
+            close_sessions()
+
+def runParallel(program, worlds, workers=None, session=False, expected=None):
+    """Play every (name, grid) in worlds on a pool of worker processes and print a summary.
+
+    Returns the number of failures. workers defaults to the number of cores. With session each
+    worker plays each chunk of its worlds on one solver process instead of launching one per world,
+    and closes it when the chunk is done.
+    expected is an OutcomeIndex (see wumpus/outcomes.py) to compare the results with.
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        # each task plays a chunk of worlds (on one session, with session)
+        size = max(1, len(worlds) // (workers * 4))
+        chunks = [worlds[n:n + size] for n in range(0, len(worlds), size)]
+        results = []
+        for played in pool.map(play_all, [program] * len(chunks), chunks, [session] * len(chunks)):
+            results += played
+    elapsed = time.perf_counter() - start
+
+    failed = [(name, output) for name, passed, _, output in results if not passed]
+    for name, output in failed[:20]:
+        print(f"{name}: {output.strip() or 'Test failed.'}")
+    if len(failed) > 20:
+        print(f"... and {len(failed) - 20} more failures")
+    passed = len(results) - len(failed)
+    moves = sum(moves for _, _, moves, _ in results)
+    print(f"{len(results)} worlds on {workers} processes: {passed} passed, {len(failed)} failed, {moves} moves in total")
+    print(f"took {elapsed:.2f}s ({len(results) / elapsed:.0f} worlds/s)")
+    if expected is not None:
+        compare(results, worlds, expected)
+    return len(failed)
+
+def grid_world(grid):
+    """Return the gold, wumpus and pits of grid as the solver numbers them (see wumpus/oracle.py).
+
+    The tile in column x, y rows up from the bottom is x * 4 + y, and pits has bit t set for a hole on tile t.
+    """
+    gold = wumpus = None
+    pits = 0
+    for row in range(4):
+        for col in range(4):
+            tile = col * 4 + 3 - row
+            if grid[row][col] == "g":
+                gold = tile
+            elif grid[row][col] == "w":
+                wumpus = tile
+            elif grid[row][col] == "h":
+                pits |= 1 << tile
+    return gold, wumpus, pits
+
+def compare(results, worlds, index):
+    """Print the worlds whose results differ from the wumpus Robot's results in index, returning how many."""
+    from wumpus.oracle import OUTCOMES
+    differ = []
+    unknown = 0
+    for (name, passed, _, _), (_, grid) in zip(results, worlds):
+        try:
+            record = index.lookup(*grid_world(grid))
+        except (TypeError, ValueError):
+            # no gold or wumpus, or more holes than the index covers
+            unknown += 1
+            continue
+        if record.succeeded != passed:
+            differ.append((name, OUTCOMES[record.outcome], "passed" if passed else "failed"))
+    for name, expected, got in differ[:20]:
+        print(f"{name}: expected {expected}, {got}")
+    if len(differ) > 20:
+        print(f"... and {len(differ) - 20} more differences")
+    print(f"{len(differ)} worlds differ from the expected results of {index.path} ({unknown} not in it)")
+    return len(differ)
+
+def load_outcomes(path):
+    """Open an outcomes file written by wumpus/outcomes.py."""
+    repository_on_path()
+    from wumpus.outcomes import OutcomeIndex
+    return OutcomeIndex(path)
+
 def legend():
     """Print a legend for the puzzle output."""
     print("Legend:")
@@ -284,42 +689,22 @@ def runTests(program, difficulty, enable_hardest=False):
         print("Running easy tests.\n")
         legend()
         print("custom world:")
-        world0 = World([
-            ["g", "p", "e", "e"],
-            ["w", "e", "e", "e"],
-            ["e", "e", "e", "e"],
-            ["e", "e", "e", "e"]
-        ])
+        world0 = World(CUSTOM_WORLD)
         test(program, world0)
         print("Easy world 1:")
-        world1 = World([
-            ["e", "e", "e", "g"],
-            ["e", "e", "e", "e"],
-            ["e", "e", "e", "e"],
-            ["e", "e", "e", "w"]
-        ])
+        world1 = World(PUZZLES["easy"][0])
         print(str(world1))
         if not test(program, world1):
             failures += 1
         print()
         print("Easy world 2:")
-        world2 = World([
-            ["e", "e", "e", "h"],
-            ["e", "g", "e", "e"],
-            ["e", "e", "e", "w"],
-            ["e", "e", "e", "e"]
-        ])
+        world2 = World(PUZZLES["easy"][1])
         print(str(world2))
         if not test(program, world2):
             failures += 1
         print()
         print("Easy world 3:")
-        world3 = World([
-            ["h", "h", "e", "e"],
-            ["e", "e", "e", "w"],
-            ["e", "e", "g", "e"],
-            ["e", "e", "e", "e"]
-        ])
+        world3 = World(PUZZLES["easy"][2])
         print(str(world3))
         if not test(program, world3):
             failures += 1
@@ -327,12 +712,7 @@ def runTests(program, difficulty, enable_hardest=False):
     elif difficulty == "medium":
         print("Running medium tests.\n")
         legend()
-        world1 = World([
-            ["h", "h", "g", "h"],
-            ["h", "e", "e", "e"],
-            ["e", "e", "e", "e"],
-            ["e", "e", "e", "w"]
-        ])
+        world1 = World(PUZZLES["medium"][0])
         print('Medium world 1:')
         print(str(world1))
         if not test(program, world1):
@@ -341,58 +721,33 @@ def runTests(program, difficulty, enable_hardest=False):
 
         print()
         print("Medium world 2:")
-        world2 = World([
-            ["e", "e", "h", "w"],
-            ["e", "e", "e", "g"],
-            ["e", "e", "e", "e"],
-            ["e", "e", "h", "h"]
-        ])
+        world2 = World(PUZZLES["medium"][1])
         print(str(world2))
         if not test(program, world2):
             failures += 1
         print()
         print("Medium world 3:")
-        world3 = World([
-            ["w", "e", "g", "e"],
-            ["e", "h", "e", "e"],
-            ["e", "e", "e", "e"],
-            ["e", "e", "e", "h"]
-        ])
+        world3 = World(PUZZLES["medium"][2])
         print(str(world3))
         if not test(program, world3):
             failures += 1
     elif difficulty == "hard":
         print("Running hard tests.\n")
         legend()
-        world1 = World([
-            ["h", "h", "g", "e"],
-            ["h", "h", "e", "e"],
-            ["e", "h", "e", "e"],
-            ["e", "e", "w", "e"]
-        ])
+        world1 = World(PUZZLES["hard"][0])
         print('Hard world 1:')
         print(str(world1))
         if not test(program, world1):
             failures += 1
         print()
         print("Hard world 2:")
-        world2 = World([
-            ["e", "h", "e", "h"],
-            ["e", "e", "g", "e"],
-            ["e", "e", "e", "h"],
-            ["e", "e", "e", "e"]
-        ])
+        world2 = World(PUZZLES["hard"][1])
         print(str(world2))
         if not test(program, world2):
             failures += 1
         print()
         print("Hard world 3:")
-        world3 = World([
-            ["e", "e", "w", "g"],
-            ["e", "e", "h", "h"],
-            ["e", "e", "e", "h"],
-            ["e", "e", "e", "h"]
-        ])
+        world3 = World(PUZZLES["hard"][2])
         print(str(world3))
         if not test(program, world3):
             failures += 1
@@ -401,12 +756,7 @@ def runTests(program, difficulty, enable_hardest=False):
     if enable_hardest:
         print()
         print("Hardest world:")
-        evil = World([
-            ["e", "e", "h", "g"],
-            ["e", "e", "h", "w"],
-            ["e", "e", "e", "e"],
-            ["e", "e", "h", "h"]
-        ])
+        evil = World(HARDEST_WORLD)
         print(str(evil))
         if(not test(program, evil)):
             failures += 1
@@ -0,0 +1,136 @@
+"""
+asyncrobot.py
+AsyncRobot is Robot for asyncio (or uasyncio on MicroPython): the 5 methods a subclass provides
+(and optionally rot_180) are coroutines, and so is start:
+
+    class MyRobot(AsyncRobot):
+        async def forward(self):
+            ...
+
+    asyncio.run(MyRobot().start())
+
+It makes the same decisions as Robot, in the same order, except that on a board Robot finds not
+solvable, start raises RuntimeError instead of spinning in place for good. Decisions only depend on the scents,
+so the actions they lead to are queued rather than waited for, and are carried out when the
+robot next needs a scent (or the mission ends). While the robot drives and while it waits for
+the scent, think runs alongside, so work that does not depend on the coming scent is done in time
+the robot would otherwise spend waiting. Waiting itself only awaits, so the CPU is free for think
+and any other task.
+
+By default think speculates (see Robot.speculate): for each scent the robot could receive where it
+is going, it works out the deductions, the next explore position and the route there while the
+robot is still on its way and waiting for the scent. Once the scent arrives, the robot sets off
+along the route worked out for it, without deducing anything on the spot. Pass speculative=False
+to leave this out (speculating costs several times the CPU time of deducing just the scent that
+arrives, which only pays off when the CPU would be idle anyway).
+
+With a Profiler, sensing and actuation are the awaited times of each scent and action.
+"""
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+try:
+    from wumpus.wumpus import Profiler, Robot, States
+except ImportError:
+    from wumpus import Profiler, Robot, States
+
+
+class AsyncRobot(Robot):
+
+    def __init__(self, *args, profile=None, speculative=True, **kwargs):
+        # actions decided but not yet carried out, oldest first
+        self._actions = []
+        # True while the actions and scent awaited by _carry_out are not all done
+        self._waiting = False
+        self.speculative = speculative
+        super().__init__(*args, **kwargs)
+        self.profile = Profiler() if profile is True else profile
+        if self.profile is not None:
+            self.profile.attach(self, actions=False)
+
+    async def start(self):
+        self.log("STARTING")
+        try:
+            while self.state < States.GOLD_KNOWN:
+                await self.explore_step()
+            self.retrieve_gold()
+            await self._carry_out()
+        except Exception as e:
+            if self.log_actions:
+                self.log("ERROR: %s", e)
+            raise e
+        finally:
+            self._finish()
+
+    async def explore_step(self):
+        """
+        same as Robot.explore_step
+        """
+        self._approach()
+        await self.sniff()
+        self._learn()
+
+    async def sniff(self):
+        """
+        carries out the actions decided so far, then awaits receive_scent and uses the scent
+        """
+        self._perceive(await self._carry_out(self.receive_scent))
+
+    def _perform(self, action):
+        self._actions.append(action)
+
+    def _give_up(self):
+        # Robot spins in place for good, but queued rotations would never be carried out
+        raise RuntimeError("the robot has no way forward at " + str((self.x, self.y)))
+
+    async def _carry_out(self, sense=None):
+        # awaits the queued actions, then sense if given (returning what it does), with think running alongside
+        self._waiting = True
+        thinking = asyncio.create_task(self.think())
+        try:
+            while self._actions:
+                await self._timed("actuation", self._actions.pop(0))
+            result = None
+            if sense is not None:
+                result = await self._timed("sensing", sense)
+            self._waiting = False
+            await thinking
+        except Exception:
+            self._waiting = False
+            thinking.cancel()
+            raise
+        return result
+
+    async def _timed(self, phase, action):
+        if self.profile is None:
+            return await action()
+        start = self.profile.now()
+        try:
+            return await action()
+        finally:
+            self.profile.since(phase, start)
+
+    async def think(self):
+        """
+        runs while the robot carries out its actions and waits for a scent. Overrides can do any
+        work that does not depend on the coming scent, awaiting asyncio.sleep(0) between pieces
+        of it so the actions are not held up (the robot waits for think to finish before using
+        the scent). By default this writes out the mission log, if there is anything to write,
+        then speculates on each scent the robot could receive next, for as long as the robot is
+        still waiting (see speculative).
+        """
+        if self.mission_log is not None:
+            self.mission_log.flush()
+        if self.speculative and self.state < States.GOLD_KNOWN:
+            for scent in self.possible_scents():
+                if not self._waiting:
+                    break
+                self.speculate(scent)
+                await asyncio.sleep(0)
+
+    async def rot_180(self):
+        await self.rot_cw()
+        await self.rot_cw()
@@ -0,0 +1,388 @@
+"""
+batch.py
+Runs the Robot logic on many worlds at once (needs numpy). BatchSolver keeps the board and scents
+of every exploring robot stacked in arrays of shape (robots, width, height), and advances all of
+them one decision of Robot.start at a time: choosing where to explore, planning and following
+the route there, sniffing, reduce and eliminate are each a handful of whole-array operations.
+
+The rarer decisions (shooting the wumpus or taking a risk with yolo) and fetching the gold once
+it is located are handed to a WorldRobot for that world, so the results are exactly those of
+running WorldRobot(world).start() on each world in turn. Routes are followed by the number of
+moves, so robot classes with turn costs (TURN_COST or TURN_180_COST) are not supported:
+
+    robots = solve(worlds)    # worlds[n][x][y] of Tile values, all of the same size
+    robots[n].succeeded, robots[n].moves, robots[n].error, ...
+
+Every robot starts at (0, 0) facing (1, 0), like the Robot defaults.
+"""
+
+import numpy as np
+
+try:
+    from wumpus.wumpus import DIRECTIONS, Board, States, Tile
+    from wumpus.world import RobotDied, WorldRobot
+except ImportError:
+    from wumpus import DIRECTIONS, Board, States, Tile
+    from world import RobotDied, WorldRobot
+
+# number of rot_cw/rot_ccw calls Robot._rotate makes, indexed by the counter-clockwise change of heading
+QUARTER_TURNS = np.array([0, 1, 2, 1])
+STEP_X = np.array([dx for dx, dy in DIRECTIONS])
+STEP_Y = np.array([dy for dx, dy in DIRECTIONS])
+
+
+def _neighbour_sum(grids):
+    """
+    returns, for every tile of each grid in the (robots, width, height) array grids,
+    the sum of the values of its (up to 4) adjacent tiles
+    """
+    padded = np.zeros((grids.shape[0], grids.shape[1] + 2, grids.shape[2] + 2), dtype=np.int64)
+    padded[:, 1:-1, 1:-1] = grids
+    return padded[:, :-2, 1:-1] + padded[:, 2:, 1:-1] + padded[:, 1:-1, :-2] + padded[:, 1:-1, 2:]
+
+
+def _neighbour_or(grids):
+    """
+    same as _neighbour_sum, but ors the adjacent values together
+    """
+    padded = np.zeros((grids.shape[0], grids.shape[1] + 2, grids.shape[2] + 2), dtype=grids.dtype)
+    padded[:, 1:-1, 1:-1] = grids
+    return padded[:, :-2, 1:-1] | padded[:, 2:, 1:-1] | padded[:, 1:-1, :-2] | padded[:, 1:-1, 2:]
+
+
+class BatchSolver:
+    """
+    Solves a stack of worlds in lock step, see the module docstring.
+
+    Each exploring robot is a row of the per robot arrays in FIELDS (ids maps a row to its world).
+    Rows are dropped as their missions end, and the finished robot of world n is robots[n].
+    """
+
+    FIELDS = ("ids", "worlds", "boards", "scents", "state", "x", "y", "heading", "gold", "wumpus",
+              "has_arrow", "has_gold", "moves", "rotations", "shots", "sniffs")
+
+    def __init__(self, worlds, robot_class=WorldRobot):
+        """
+        worlds[n][x][y] of Tile values, robot_class the WorldRobot (sub)class used for the decisions
+        that are not vectorised, whose limits on rotations and sniffs are also applied here
+        (raises ValueError if it has turn costs, which the vectorised routes leave out)
+        """
+        if robot_class.TURN_COST or robot_class.TURN_180_COST:
+            raise ValueError("BatchSolver only follows routes for robots without turn costs")
+        self.worlds = np.array(worlds, dtype=np.int64)
+        count, self.width, self.height = self.worlds.shape
+        self.robot_class = robot_class
+        self.robots = [None] * count
+
+        self.ids = np.arange(count)
+        self.boards = np.full(self.worlds.shape, Tile.UNKNOWN, dtype=np.int64)
+        # same as the Robot constructor, the start is safe (but could be the gold)
+        self.boards[:, 0, 0] &= 0b1100
+        self.scents = np.full(self.worlds.shape, Tile.UNSNIFFED, dtype=np.int64)
+        self.state = np.full(count, States.INITIAL, dtype=np.int64)
+        self.x = np.zeros(count, dtype=np.int64)
+        self.y = np.zeros(count, dtype=np.int64)
+        self.heading = np.zeros(count, dtype=np.int64)  # index of (dx, dy) in DIRECTIONS
+        # flat index (x * height + y) of the known gold and wumpus, -1 while unknown
+        self.gold = np.full(count, -1, dtype=np.int64)
+        self.wumpus = np.full(count, -1, dtype=np.int64)
+        self.has_arrow = np.ones(count, dtype=bool)
+        self.has_gold = np.zeros(count, dtype=bool)
+        self.moves = np.zeros(count, dtype=np.int64)
+        self.rotations = np.zeros(count, dtype=np.int64)
+        self.shots = np.zeros(count, dtype=np.int64)
+        self.sniffs = np.zeros(count, dtype=np.int64)
+
+    def run(self):
+        """
+        solves every world, returning the list of finished robots (one per world). Each robot has
+        error set to the exception its mission raised, or None.
+        """
+        while self.step():
+            pass
+        return self.robots
+
+    def step(self):
+        """
+        makes one decision (Robot.explore_step) for every exploring robot
+        returns False once there are none left
+        """
+        if not len(self.ids):
+            return False
+        targets = self._explore_positions()
+        errors = {}
+        done = np.zeros(len(self.ids), dtype=bool)
+
+        # no safe tile to explore, so shoot or take a risk like the Robot would
+        for row in np.flatnonzero(targets < 0):
+            done[row] = self._scalar(row, explore=True)
+
+        rows = np.flatnonzero(targets >= 0)
+        rows = self._explore(rows, targets[rows], errors)
+        rows = self._sniff(rows, errors)
+        self._eliminate(rows)
+        self._fetch_gold(rows[self.gold[rows] >= 0], errors, done)
+
+        for row, error in errors.items():
+            self._finish(row, self._robot(row), error)
+            done[row] = True
+
+        for name in self.FIELDS:
+            setattr(self, name, getattr(self, name)[~done])
+        return len(self.ids) > 0
+
+    def _explore_positions(self):
+        # Robot.get_explore_position for every row, as flat indices (-1 where there is none)
+        boards = self.boards
+        candidates = ((boards & 0b011) == 0) & ((self.scents & Tile.UNSNIFFED) != 0)
+        sums = _neighbour_sum(boards)
+        sums += 100 * _neighbour_sum((self.scents & Tile.GOLD) != 0) * ((boards & Tile.GOLD) != 0)
+        scores = np.where(candidates, sums, -1)
+        best = scores.max(axis=(1, 2))
+
+        # of the best tiles the nearest to the start wins, then the first in x then y order
+        size = self.width * self.height
+        xs, ys = np.indices((self.width, self.height))
+        keys = np.where(scores == best[:, None, None], (xs + ys) * size + xs * self.height + ys, (self.width + self.height) * size)
+        targets = keys.reshape(len(keys), self.width * self.height).argmin(axis=1)
+        return np.where(best > 0, targets, -1)
+
+    def _distances(self, rows, goal_x, goal_y):
+        # distance_field for each row towards its goal, stopping once every start is reached
+        width, height = self.width, self.height
+        unreached = width * height
+        count = len(rows)
+        r = np.arange(count)
+        safe = (self.boards[rows] & 0b011) == 0
+        costs = np.full((count, width, height), unreached, dtype=np.int64)
+        costs[r, goal_x, goal_y] = 0
+
+        # the end itself may be dangerous, but no other tile is searched through
+        frontier = np.zeros((count, width, height), dtype=bool)
+        frontier[r, goal_x, goal_y] = True
+        cost = 0
+        while frontier.any() and (costs[r, self.x[rows], self.y[rows]] == unreached).any():
+            cost += 1
+            found = (_neighbour_or(frontier)) & (costs == unreached)
+            costs[found & safe] = cost
+            costs[found & ~safe] = unreached + 1
+            frontier = found & safe
+        return costs
+
+    def _walk(self, rows, targets, errors):
+        # Robot.move_to for each row towards the flat index in targets, returns whether each row
+        # has a route to its target (rows that raise on the way are added to errors)
+        goal_x, goal_y = np.divmod(targets, self.height)
+        walking = (self.x[rows] != goal_x) | (self.y[rows] != goal_y)
+        costs = self._distances(rows[walking], goal_x[walking], goal_y[walking])
+        walk = rows[walking]
+        r = np.arange(len(walk))
+        remaining = costs[r, self.x[walk], self.y[walk]]
+        active = remaining < self.width * self.height
+        routed = ~walking
+        routed[walking] = active
+
+        # follow path_from, one move of every walking robot at a time
+        while True:
+            active &= remaining > 0
+            a = np.flatnonzero(active)
+            if not len(a):
+                break
+            row = walk[a]
+            x, y = self.x[row], self.y[row]
+            choice = np.full(len(a), -1)
+            for d in range(len(DIRECTIONS)):
+                next_x = x + STEP_X[d]
+                next_y = y + STEP_Y[d]
+                inside = (next_x >= 0) & (next_x < self.width) & (next_y >= 0) & (next_y < self.height)
+                closer = inside & (costs[a, next_x.clip(0, self.width - 1), next_y.clip(0, self.height - 1)] == remaining[a] - 1)
+                choice = np.where((choice < 0) & closer, d, choice)
+
+            self.rotations[row] += QUARTER_TURNS[(choice - self.heading[row]) & 3]
+            self.heading[row] = choice
+            limit = self.robot_class.rotation_limit(self.width, self.height)
+            spinning = self.rotations[row] > limit
+            for n in np.flatnonzero(spinning):
+                # the robot gives up on its first rotation past the limit
+                self.rotations[row[n]] = limit + 1
+                errors[row[n]] = RuntimeError("robot is spinning in place")
+                active[a[n]] = False
+
+            row = row[~spinning]
+            a = a[~spinning]
+            self.x[row] += STEP_X[choice[~spinning]]
+            self.y[row] += STEP_Y[choice[~spinning]]
+            self.moves[row] += 1
+            remaining[a] -= 1
+            tiles = self.worlds[row, self.x[row], self.y[row]]
+            for n in np.flatnonzero(tiles & (Tile.PIT | Tile.WUMPUS)):
+                message = "fell into a pit at " if tiles[n] & Tile.PIT else "eaten by the wumpus at "
+                errors[row[n]] = RobotDied(message + str((int(self.x[row[n]]), int(self.y[row[n]]))))
+                active[a[n]] = False
+            self.has_gold[row] |= (tiles & Tile.GOLD) != 0
+
+        return routed
+
+    def _explore(self, rows, targets, errors):
+        # the moving part of Robot.explore_step, returns the rows that are ready to sniff
+        routed = self._walk(rows, targets, errors)
+        # with no route the robot sniffs where it stands, which changes nothing once that
+        # tile has been sniffed, so the Robot would sniff there until it gave up
+        for row in rows[~routed]:
+            if self.scents[row, self.x[row], self.y[row]] != Tile.UNSNIFFED:
+                self.sniffs[row] = self.robot_class.MAX_SNIFFS_PER_TILE * self.width * self.height + 1
+                errors[row] = RuntimeError("robot is stuck sniffing")
+        return np.array([row for row in rows if row not in errors], dtype=np.int64)
+
+    def _fetch_gold(self, rows, errors, done):
+        # the rest of Robot.start for rows that know where the gold is
+        routed = self._walk(rows, self.gold[rows], errors)
+        for row in rows[~routed]:
+            if row not in errors:
+                # the way to the gold is blocked, so the robot has to shoot or take risks
+                done[row] = self._scalar(row, explore=False)
+
+        rows = np.array([row for row in rows[routed] if row not in errors], dtype=np.int64)
+        self.state[rows] = States.HAS_GOLD
+        self._walk(rows, np.zeros(len(rows), dtype=np.int64), errors)
+        for row in rows:
+            if row not in errors:
+                self.state[row] = States.FINISHED
+                self._finish(row, self._robot(row))
+                done[row] = True
+
+    def _sniff(self, rows, errors):
+        # Robot.sniff for each row (including reduce), returns the rows that sniffed
+        self.sniffs[rows] += 1
+        limit = self.robot_class.MAX_SNIFFS_PER_TILE * self.width * self.height
+        for row in rows[self.sniffs[rows] > limit]:
+            errors[row] = RuntimeError("robot is stuck sniffing")
+        rows = rows[self.sniffs[rows] <= limit]
+
+        x, y = self.x[rows], self.y[rows]
+        worlds = self.worlds[rows]
+        r = np.arange(len(rows))
+        scents = np.where(worlds[r, x, y] & Tile.GOLD, 0b1000, _neighbour_or(worlds)[r, x, y])
+        self.scents[rows, x, y] = scents
+
+        # at the gold, which says nothing about the surrounding tiles
+        at_gold = (scents & 0b1000) != 0
+        self.boards[rows[at_gold], x[at_gold], y[at_gold]] &= Tile.GOLD
+        self.gold[rows[at_gold]] = x[at_gold] * self.height + y[at_gold]
+
+        here = np.zeros((len(rows), self.width, self.height), dtype=bool)
+        here[r, x, y] = True
+        near = _neighbour_or(here) & ~at_gold[:, None, None]
+        boards = self.boards[rows]
+        boards = np.where(near, boards & scents[:, None, None], boards)
+        # since there is just 1 gold and 1 wumpus, a scent of either means it is one of the 4 adjacent tiles
+        for tile in (Tile.WUMPUS, Tile.GOLD):
+            sensed = (scents & tile) != 0
+            boards = np.where(sensed[:, None, None] & ~near, boards & ~tile, boards)
+        self.boards[rows] = boards
+        return rows
+
+    def _eliminate(self, rows):
+        # Board.eliminate for each row, repeating until nothing changes
+        boards = self.boards[rows]
+        scents = self.scents[rows]
+        flat = boards.reshape(len(rows), self.width * self.height)
+        found = {Tile.GOLD: self.gold[rows], Tile.WUMPUS: self.wumpus[rows]}
+        sensed = [(scents & tile) != 0 for tile in (Tile.PIT, Tile.WUMPUS, Tile.GOLD)]
+
+        changed = True
+        while changed:
+            changed = False
+            for t in range(3):
+                possible = (boards & (1 << t)) != 0
+                sources = sensed[t] & (_neighbour_sum(possible) == 1)
+                # the only possible neighbour of each of those scents must be this tile type
+                forced = (_neighbour_or(sources)) & possible & (boards != (1 << t))
+                if forced.any():
+                    boards[forced] = 1 << t
+                    changed = True
+
+            # if we do not know where the wumpus or gold is, see if there is only option for where it can be
+            for tile, positions in found.items():
+                possible = (flat & tile) != 0
+                unique = (positions < 0) & (possible.sum(axis=1) == 1)
+                positions[unique] = possible[unique].argmax(axis=1)
+                known = np.flatnonzero(positions >= 0)
+                values = flat[known, positions[known]]
+                narrowed = (values & ~tile) != 0
+                if narrowed.any():
+                    flat[known[narrowed], positions[known[narrowed]]] = values[narrowed] & tile
+                    changed = True
+
+        self.boards[rows] = boards
+        self.gold[rows] = found[Tile.GOLD]
+        self.wumpus[rows] = found[Tile.WUMPUS]
+
+    def _robot(self, row):
+        # a robot_class robot in the state of row
+        height = self.height
+        board = Board(self.boards[row].tolist())
+        if self.gold[row] >= 0:
+            board.gold_pos = divmod(int(self.gold[row]), height)
+        if self.wumpus[row] >= 0:
+            board.wumpus_pos = divmod(int(self.wumpus[row]), height)
+        robot = self.robot_class(self.worlds[row].tolist(), board=board)
+        robot.scents = self.scents[row].tolist()
+        robot.state = int(self.state[row])
+        robot.x = int(self.x[row])
+        robot.y = int(self.y[row])
+        robot.dx, robot.dy = DIRECTIONS[self.heading[row]]
+        robot.has_arrow = bool(self.has_arrow[row])
+        robot.has_gold = bool(self.has_gold[row])
+        robot.moves = int(self.moves[row])
+        robot.rotations = int(self.rotations[row])
+        robot.shots = int(self.shots[row])
+        robot.sniffs = int(self.sniffs[row])
+        return robot
+
+    def _absorb(self, row, robot):
+        # copies the state of robot back into row
+        self.worlds[row] = robot.world
+        self.boards[row] = [list(col) for col in robot.board]
+        self.scents[row] = robot.scents
+        self.state[row] = robot.state
+        self.gold[row] = -1 if robot.board.gold_pos is None else robot.board.gold_pos[0] * self.height + robot.board.gold_pos[1]
+        self.wumpus[row] = -1 if robot.board.wumpus_pos is None else robot.board.wumpus_pos[0] * self.height + robot.board.wumpus_pos[1]
+        self.x[row] = robot.x
+        self.y[row] = robot.y
+        self.heading[row] = DIRECTIONS.index((robot.dx, robot.dy))
+        self.has_arrow[row] = robot.has_arrow
+        self.has_gold[row] = robot.has_gold
+        self.moves[row] = robot.moves
+        self.rotations[row] = robot.rotations
+        self.shots[row] = robot.shots
+        self.sniffs[row] = robot.sniffs
+
+    def _finish(self, row, robot, error=None):
+        robot.error = error
+        self.robots[self.ids[row]] = robot
+
+    def _scalar(self, row, explore):
+        # runs one explore_step of row (if explore) on a robot, and the rest of the mission
+        # if the gold is known, returns True if the mission is over
+        robot = self._robot(row)
+        try:
+            if explore:
+                robot.explore_step()
+            if robot.board.gold_pos is not None:
+                robot.state = States.GOLD_KNOWN
+                robot.start()
+                self._finish(row, robot)
+                return True
+        except Exception as e:
+            self._finish(row, robot, e)
+            return True
+        self._absorb(row, robot)
+        return False
+
+
+def solve(worlds, robot_class=WorldRobot):
+    """
+    returns the finished robot_class robot of each world, see BatchSolver
+    """
+    return BatchSolver(worlds, robot_class).run()
@@ -0,0 +1,569 @@
+"""
+leanwumpus.py
+A memory-lean variant of the Robot in wumpus.py for MicroPython. LeanRobot makes the same decisions
+as Robot with its default costs (turning is free, so routes are shortest paths in moves), from the
+same 5 methods a subclass provides:
+
+    class MyRobot(LeanRobot):
+        def forward(self):
+            ...
+
+    MyRobot(width=4, height=4).start()
+
+Everything the robot needs is allocated when it is created: the board and scents are bytearrays
+indexed by tile (x * height + y), neighbours come from a table of tile indices, and the searches
+work in preallocated scratch arrays. So once created, the robot allocates nothing while it solves
+(on MicroPython, where constants are inlined with const and loops over range do not allocate),
+and it needs none of the bookkeeping that lets Robot scale to large boards. Boards are limited to
+256 tiles, which keeps every number the robot works with a small int.
+
+Positions are tile indices (gold and wumpus are -1 while unknown), while x, y, dx and dy are kept
+like Robot's for the methods a subclass provides.
+"""
+
+try:
+    from micropython import const
+except ImportError:
+    def const(value):
+        return value
+
+try:
+    from array import array
+except ImportError:
+    from uarray import array
+
+# tile values (see Tile in wumpus.py)
+_PIT = const(0b001)
+_WUMPUS = const(0b010)
+_GOLD = const(0b100)
+_UNKNOWN = const(0b111)
+_DANGER = const(0b011)
+_UNSNIFFED = const(0b10000)
+# the scent received on the gold itself
+_AT_GOLD = const(0b1000)
+
+# states (see States in wumpus.py)
+INITIAL = const(0)
+GOLD_KNOWN = const(1)
+HAS_GOLD = const(2)
+FINISHED = const(3)
+
+MAX_TILES = const(256)
+
+# headings, in the order of DIRECTIONS in wumpus.py (a quarter turn counter-clockwise adds 1)
+_DX = (1, 0, -1, 0)
+_DY = (0, 1, 0, -1)
+# rot_cw/rot_ccw calls to turn by a number of quarter turns counter-clockwise
+_QUARTER_TURNS = (0, 1, 2, 1)
+
+
+class LeanRobot:
+
+    def __init__(self, width=4, height=4, x=0, y=0, dx=1, dy=0):
+        tiles = width * height
+        if tiles > MAX_TILES:
+            raise ValueError("boards of more than 256 tiles are too big")
+        self.width = width
+        self.height = height
+        self.board = bytearray([_UNKNOWN] * tiles)
+        self.scents = bytearray([_UNSNIFFED] * tiles)
+        # steps[t * 4 + heading] is the tile one step from t in that heading, or -1 off the board
+        self.steps = array("h", [-1] * (4 * tiles))
+        for t in range(tiles):
+            for heading in range(4):
+                step_x = t // height + _DX[heading]
+                step_y = t % height + _DY[heading]
+                if 0 <= step_x < width and 0 <= step_y < height:
+                    self.steps[t * 4 + heading] = step_x * height + step_y
+
+        # scratch space: a distance field and its search queue, and for _route_to_any the best
+        # cost and parent of each (tile, heading) state, the headings to finish in on each tile,
+        # a heap of states to visit (each state is pushed at most 5 times) and the path found
+        self._costs = array("H", [0] * tiles)
+        self._queue = array("H", [0] * tiles)
+        self._best = array("l", [0] * (4 * tiles))
+        self._parents = array("h", [0] * (4 * tiles))
+        self._finish = bytearray(tiles)
+        self._heap = array("l", [0] * (20 * tiles + 4))
+        self._heap_size = 0
+        self._path = bytearray(tiles)
+
+        self.x = x
+        self.y = y
+        self.dx = dx
+        self.dy = dy
+        self.start_tile = x * height + y
+        # the robot must start at a safe location (but it could be the gold)
+        self.board[self.start_tile] &= 0b1100
+        self.state = INITIAL
+        self.has_arrow = True
+        self.gold = -1
+        self.wumpus = -1
+
+    def start(self):
+        while self.state < GOLD_KNOWN:
+            self.explore_step()
+        self.retrieve_gold()
+
+    def explore_step(self):
+        """
+        same as Robot.explore_step
+        """
+        target = self._explore_position()
+        # if there are no safe places to explore, shoot the wumpus and explore from that location
+        if target < 0:
+            if self.wumpus >= 0 and self.has_arrow:
+                target = self.wumpus
+                self._shoot_at(target)
+            else:
+                target = self._yolo()
+        self._move_to(target)
+        self.sniff()
+        self.eliminate()
+        if self.gold >= 0:
+            self.state = GOLD_KNOWN
+
+    def retrieve_gold(self):
+        """
+        same as Robot.retrieve_gold
+        """
+        while not self._move_to(self.gold):
+            # shoot wumpus or continue yoloing as neccessary until the path to gold is clear
+            if self.wumpus >= 0 and self.has_arrow:
+                self._shoot_at(self.wumpus)
+            else:
+                self._move_to(self._yolo())
+        self.state = HAS_GOLD
+        self._move_to(self.start_tile)
+        self.state = FINISHED
+
+    def sniff(self):
+        here = self.x * self.height + self.y
+        scent = self.receive_scent()
+        self.scents[here] = scent
+        self.reduce(scent, here)
+
+    def restrict(self, t, mask):
+        """
+        narrows the possibilities of tile t to those in mask, returning True if it changed
+        """
+        old = self.board[t]
+        new = old & mask
+        if new == old:
+            return False
+        self.board[t] = new
+        return True
+
+    def reduce(self, scent, t):
+        """
+        same as Board.reduce, for tile t
+        """
+        if scent & _AT_GOLD:
+            self.restrict(t, _GOLD)
+            self.gold = t
+            return
+        steps = self.steps
+        for heading in range(4):
+            adj = steps[t * 4 + heading]
+            if adj >= 0:
+                self.restrict(adj, scent)
+        # there is just 1 gold and 1 wumpus, so only the tiles next to the scent can hold them
+        x = t // self.height
+        y = t % self.height
+        for tile in (_GOLD, _WUMPUS):
+            if scent & tile:
+                for other in range(self.width * self.height):
+                    if abs(other // self.height - x) + abs(other % self.height - y) != 1:
+                        self.restrict(other, ~tile)
+
+    def eliminate(self):
+        """
+        same as Board.eliminate: sweeps the whole board until nothing changes
+        """
+        board = self.board
+        scents = self.scents
+        steps = self.steps
+        changed = True
+        while changed:
+            changed = False
+            for t in range(self.width * self.height):
+                scent = scents[t]
+                if scent == _UNSNIFFED:
+                    continue
+                # a type sensed here that only one adjacent tile can still hold must be there
+                for tile in (_PIT, _GOLD, _WUMPUS):
+                    if not scent & tile:
+                        continue
+                    possible = 0
+                    found = -1
+                    for heading in range(4):
+                        adj = steps[t * 4 + heading]
+                        if adj >= 0 and board[adj] & tile:
+                            possible += 1
+                            found = adj
+                    if possible == 1 and self.restrict(found, tile):
+                        changed = True
+            if self.gold < 0:
+                self.gold = self._only(_GOLD)
+            if self.gold >= 0 and self.restrict(self.gold, _GOLD):
+                changed = True
+            if self.wumpus < 0:
+                self.wumpus = self._only(_WUMPUS)
+            if self.wumpus >= 0 and self.restrict(self.wumpus, _WUMPUS):
+                changed = True
+
+    def _only(self, tile):
+        # the one tile that could hold tile, or -1 if there are none or several
+        found = -1
+        for t in range(self.width * self.height):
+            if self.board[t] & tile:
+                if found >= 0:
+                    return -1
+                found = t
+        return found
+
+    def _deduce(self, t):
+        # same as Board.deduce
+        board = self.board
+        scents = self.scents
+        steps = self.steps
+        for heading in range(4):
+            adj = steps[t * 4 + heading]
+            if adj < 0:
+                continue
+            scent = scents[adj]
+            if scent == 0:
+                return 0
+            if scent & _UNSNIFFED:
+                continue
+            for tile in (_PIT, _WUMPUS, _GOLD):
+                if not scent & tile:
+                    continue
+                possible = False
+                for other_heading in range(4):
+                    other = steps[adj * 4 + other_heading]
+                    if other >= 0 and other != t and board[other] & tile:
+                        possible = True
+                        break
+                if not possible:
+                    return tile
+        return _UNKNOWN
+
+    def _explore_position(self):
+        # same as Robot.get_explore_position, as a tile (or -1)
+        board = self.board
+        scents = self.scents
+        steps = self.steps
+        height = self.height
+        start_x = self.start_tile // height
+        start_y = self.start_tile % height
+        best = -1
+        best_score = 0
+        best_distance = 0
+        for t in range(self.width * height):
+            if board[t] & _DANGER or not scents[t] & _UNSNIFFED:
+                continue
+            score = 0
+            for heading in range(4):
+                adj = steps[t * 4 + heading]
+                if adj >= 0:
+                    score += board[adj]
+                    # a tile is highly valuable if it is adjacent to a tile that scented gold
+                    if scents[adj] & _GOLD and board[t] & _GOLD:
+                        score += 100
+            if score == 0:
+                continue
+            distance = abs(t // height - start_x) + abs(t % height - start_y)
+            # ties go to the nearest to the start, then the first in the order of tiles
+            if best < 0 or score > best_score or (score == best_score and distance < best_distance):
+                best = t
+                best_score = score
+                best_distance = distance
+        return best
+
+    def _field(self, end):
+        # fills _costs like distance_field in wumpus.py
+        board = self.board
+        steps = self.steps
+        costs = self._costs
+        queue = self._queue
+        max_value = self.width * self.height
+        for t in range(max_value):
+            costs[t] = max_value
+        costs[end] = 0
+        tail = 0
+        for heading in range(4):
+            adj = steps[end * 4 + heading]
+            if adj >= 0:
+                queue[tail] = adj
+                tail += 1
+                costs[adj] = 1
+        head = 0
+        while head < tail:
+            t = queue[head]
+            head += 1
+            if board[t] & _DANGER:
+                costs[t] = max_value + 1
+                continue
+            for heading in range(4):
+                adj = steps[t * 4 + heading]
+                if adj >= 0 and costs[adj] == max_value:
+                    queue[tail] = adj
+                    tail += 1
+                    costs[adj] = costs[t] + 1
+
+    def _move_to(self, target):
+        # same as Robot.move_to, following the same shortest path
+        here = self.x * self.height + self.y
+        if here == target:
+            return True
+        self._field(target)
+        costs = self._costs
+        steps = self.steps
+        if costs[here] >= self.width * self.height:
+            return False
+        while costs[here] > 0:
+            for heading in range(4):
+                step = steps[here * 4 + heading]
+                if step >= 0 and costs[step] == costs[here] - 1:
+                    break
+            self._rotate(_DX[heading], _DY[heading])
+            self._forward()
+            here = step
+        return True
+
+    def move_to(self, x, y):
+        """
+        same as Robot.move_to
+        """
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        return self._move_to(x * self.height + y)
+
+    def _yolo(self):
+        # same as Robot.yolo, returning a tile
+        self._field(self.x * self.height + self.y)
+        board = self.board
+        scents = self.scents
+        steps = self.steps
+        costs = self._costs
+        max_value = self.width * self.height
+        robot_safe = not board[self.x * self.height + self.y] & _DANGER
+        # the first tile that might be safe and can be reached, and the first of those that could lead to the gold
+        count = 0
+        first = -1
+        first_to_gold = -1
+        for t in range(max_value):
+            cost = costs[t]
+            if not robot_safe or not scents[t] & _UNSNIFFED or cost == 0 or cost == max_value:
+                continue
+            if self._deduce(t) == _PIT:
+                continue
+            count += 1
+            if first < 0:
+                first = t
+            if first_to_gold < 0:
+                to_gold = board[t] & _GOLD
+                for heading in range(4):
+                    adj = steps[t * 4 + heading]
+                    if adj >= 0 and board[adj] & _GOLD:
+                        to_gold = True
+                if to_gold:
+                    first_to_gold = t
+        risk = first_to_gold if count > 1 else first
+        if risk < 0:
+            # this board is guaranteed not solvable
+            while True:
+                self._rot_cw()
+        if board[risk] & _WUMPUS:
+            self._shoot_at(risk)
+        # mark the tile as safe since that's what we will assume from now on
+        self.restrict(risk, 0b0100)
+        return risk
+
+    def _shoot_at(self, target):
+        # same as Robot.shoot_at
+        height = self.height
+        target_x = target // height
+        target_y = target % height
+        if abs(self.x - target_x) + abs(self.y - target_y) > 1:
+            # move next to the target, only risking a dangerous tile if no safe one can be reached
+            length = self._route_to_any(target, True)
+            if not length:
+                length = self._route_to_any(target, False)
+            while length:
+                length -= 1
+                heading = self._path[length]
+                self._rotate(_DX[heading], _DY[heading])
+                self._forward()
+
+        self._rotate(target_x - self.x, target_y - self.y)
+        if not self.has_arrow:
+            return
+        self.shoot()
+        self.has_arrow = False
+
+        # the target cannot hold the wumpus (or a pit) any more, and neither can the scents next to it tell of it
+        self.restrict(target, ~_DANGER)
+        steps = self.steps
+        for heading in range(4):
+            adj = steps[target * 4 + heading]
+            if adj >= 0:
+                self.scents[adj] &= ~_WUMPUS
+        self.wumpus = -1
+
+    def _route_to_any(self, target, safe):
+        # PathPlanner.route_to_any with free turning, to the tiles next to target (only the safe ones if safe)
+        # facing target. Leaves the headings of the path in _path, last first, and returns its length.
+        board = self.board
+        steps = self.steps
+        tiles = self.width * self.height
+        here = self.x * self.height + self.y
+        if board[here] & _DANGER:
+            return 0
+        finish = self._finish
+        goals = 0
+        for heading in range(4):
+            adj = steps[target * 4 + heading]
+            if adj >= 0 and not (safe and board[adj] & _DANGER):
+                # facing back the way we came from target
+                finish[adj] = 1 << ((heading + 2) & 3)
+                goals += 1
+        if not goals:
+            return 0
+
+        # states are tile * 4 + heading. Costs are moves * turn_scale + quarter turns, and heap keys
+        # order by cost, then states that are done (facing the target) first, then by state
+        best = self._best
+        parents = self._parents
+        for state in range(4 * tiles):
+            best[state] = -1
+            parents[state] = -1
+        states = 4 * tiles
+        turn_scale = 2 * tiles + 3
+        heading = 0
+        while _DX[heading] != self.dx or _DY[heading] != self.dy:
+            heading += 1
+        state = here * 4 + heading
+        best[state] = 0
+        self._heap_size = 0
+        self._push(states + state)
+        length = 0
+        while self._heap_size:
+            key = self._pop()
+            state = key % states
+            cost = key // states
+            unfinished = cost & 1
+            cost >>= 1
+            tile = state >> 2
+            if not unfinished:
+                while parents[state] >= 0:
+                    self._path[length] = state & 3
+                    length += 1
+                    state = parents[state]
+                break
+            if best[state] < cost:
+                # already reached this state more cheaply
+                continue
+            if finish[tile]:
+                face = 0
+                while not finish[tile] >> face & 1:
+                    face += 1
+                self._push(2 * (cost + _QUARTER_TURNS[(face - (state & 3)) & 3]) * states + state)
+            # only the end tile may be dangerous, so never move on from one
+            if board[tile] & _DANGER:
+                continue
+            for heading in range(4):
+                step = steps[tile * 4 + heading]
+                if step < 0:
+                    continue
+                next_state = step * 4 + heading
+                next_cost = cost + turn_scale + _QUARTER_TURNS[(heading - (state & 3)) & 3]
+                if best[next_state] < 0 or next_cost < best[next_state]:
+                    best[next_state] = next_cost
+                    parents[next_state] = state
+                    self._push((2 * next_cost + 1) * states + next_state)
+        for heading in range(4):
+            adj = steps[target * 4 + heading]
+            if adj >= 0:
+                finish[adj] = 0
+        return length
+
+    def _push(self, key):
+        heap = self._heap
+        i = self._heap_size
+        self._heap_size += 1
+        while i:
+            parent = (i - 1) >> 1
+            if heap[parent] <= key:
+                break
+            heap[i] = heap[parent]
+            i = parent
+        heap[i] = key
+
+    def _pop(self):
+        heap = self._heap
+        top = heap[0]
+        self._heap_size -= 1
+        size = self._heap_size
+        key = heap[size]
+        i = 0
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if key <= heap[child]:
+                break
+            heap[i] = heap[child]
+            i = child
+        heap[i] = key
+        return top
+
+    def _rotate(self, dx, dy):
+        # same as Robot._rotate
+        if dx == -self.dy and dy == self.dx:
+            self._rot_ccw()
+        elif (dx == -self.dx and dx != 0) or (dy == -self.dy and dy != 0):
+            self._rot_180()
+        else:
+            while not (self.dx == dx and self.dy == dy):
+                self._rot_cw()
+
+    def _rot_cw(self):
+        self.dx, self.dy = self.dy, -self.dx
+        self.rot_cw()
+
+    def _rot_ccw(self):
+        self.dx, self.dy = -self.dy, self.dx
+        self.rot_ccw()
+
+    def _rot_180(self):
+        self.dx = -self.dx
+        self.dy = -self.dy
+        self.rot_180()
+
+    def _forward(self):
+        self.x += self.dx
+        self.y += self.dy
+        self.forward()
+
+    def rot_180(self):
+        self.rot_cw()
+        self.rot_cw()
+
+    def rot_cw(self):
+        raise NotImplementedError("Must implement rot_cw in subclass")
+
+    def rot_ccw(self):
+        raise NotImplementedError("Must implement rot_ccw in subclass")
+
+    def receive_scent(self):
+        raise NotImplementedError("Must implement recieve_scent in subclass")
+
+    def shoot(self):
+        raise NotImplementedError("Must implement shoot in subclass")
+
+    def forward(self):
+        raise NotImplementedError("Must implement forward in subclass")
@@ -20,7 +20,7 @@ class BLE:
     """
     A helpful wraper around the BLE service functions needed for the Wumpus World project
     """
-    def __init__(self, ble=None, name="NANO RP2040"):
+    def __init__(self, ble=None, name="NANO RP2040", written=None):
         # Setup bluetooth low energy communication service
         _SERVICE_UUID = bluetooth.UUID(0x1523) # unique service id for the communication
         _NanoBot_CHAR_UUID = (bluetooth.UUID(0x1525), _FLAG_WRITE | _FLAG_READ) # characteristic
@@ -40,6 +40,8 @@ class BLE:
         self._payload = advertising_payload(name=name, services=[_SERVICE_UUID])
         self._advertise()
         self.value = b'a'
+        # set (if given) whenever the client writes a value, eg. an asyncio.ThreadSafeFlag to await
+        self.written = written
 
     def _advertise(self, interval_us=500000):
         self._ble.gap_advertise(interval_us, adv_data=self._payload)
@@ -62,6 +64,8 @@ class BLE:
             if conn_handle in self._connections:
                 # Value has been written to the characteristic
                 self.value = self._ble.gatts_read(value_handle)
+                if self.written is not None:
+                    self.written.set()
 
 
     def send(self, value):
@@ -96,14 +100,22 @@ class BLE:
 
 
 class NanoBot(Robot):
-    def __init__(self, *args, **kwargs):
+
+    # expected milliseconds per action, so routes are planned by driving time:
+    # forward lines up on the tile edge then drives for block_delay (1550 ms),
+    # and each rot PID loop runs for up to 50 periods of 100 ms (rot_180 is two of them)
+    FORWARD_COST = 2500
+    TURN_COST = 2500
+    TURN_180_COST = 5000
+
+    def __init__(self, *args, written=None, **kwargs):
 
         machine.freq(100000000)
 
         super().__init__(*args, **kwargs)
 
         # initialize bluetooth
-        self.bluetooth = BLE()
+        self.bluetooth = BLE(written=written)
         time.sleep(0.5)
         self.bluetooth.send(0)
         while self.bluetooth.read("int") == 0:
@@ -227,15 +239,25 @@ class NanoBot(Robot):
         self.m2pwm2.freq(1000)
 
     def rot(self, ccw_dir=1, max_period_count=50):
+        for ms in self._rot_steps(ccw_dir, max_period_count):
+            time.sleep_ms(ms)
+
+    def _rot_steps(self, ccw_dir=1, max_period_count=50):
+        # the PID loop of rot, yielding the milliseconds to wait between steps
+        # (the period is read from the clock, as a step may take longer than the wait it yields)
         self.enc1 = 0
         self.enc2 = 0
         m1_integral = 0
         m2_integral = 0
-        period = 1/10
+        period_ms = 100
+        last_step = None
         m1_last_error = None
         m2_last_error = None
         period_count = 0
         while (abs(self.enc1 - self.turn90ticks * ccw_dir) > self.turn_error or abs(self.enc2 + self.turn90ticks * ccw_dir) > self.turn_error) and period_count < max_period_count:
+            now = time.ticks_ms()
+            period = (period_ms if last_step is None else max(1, time.ticks_diff(now, last_step))) / 1000
+            last_step = now
             m1_current_error = self.turn90ticks * ccw_dir - self.enc1
             m2_current_error = -self.turn90ticks * ccw_dir - self.enc2
             m1_integral += m1_current_error * period
@@ -251,8 +273,7 @@ class NanoBot(Robot):
             m1_last_error = m1_current_error
             m2_last_error = m2_current_error
             period_count += 1
-            time.sleep(period)
-    
+            yield period_ms
 
     def rot_cw(self):
         self.rot(-1)
@@ -267,7 +288,14 @@ class NanoBot(Robot):
         return self.ir_right_sensor.read_u16() < 65535 // 2
 
     def forward(self):
+        for ms in self._forward_steps():
+            time.sleep_ms(ms)
+
+    def _forward_steps(self):
         # move forward and then make corrections until both sensors detect white at the same time
+        # (yielding the milliseconds to wait between steps)
+        # (the times are read from the clock, as a step may take longer than the wait it yields,
+        # eg. while AsyncRobot.think runs)
         white_left = False
         white_right = False
         left_time = 0
@@ -275,18 +303,18 @@ class NanoBot(Robot):
         error_threshold_ms = 50
         correction_count = 0
         while correction_count <= 5:
-            count = 0
+            started = time.ticks_ms()
             self.m1Forward(self.slow)
             self.m2Forward(self.slow)
             while not (white_left and white_right):
-                count += 1
-                time.sleep_ms(1)
+                yield 1
+                elapsed = time.ticks_diff(time.ticks_ms(), started)
                 if not white_left and self.ir_left():
                     white_left = True
-                    left_time = count
+                    left_time = elapsed
                 if not white_right and self.ir_right():
                     white_right = True
-                    right_time = count
+                    right_time = elapsed
             self.allStop()
             if abs(left_time - right_time) < error_threshold_ms:
                 break
@@ -294,19 +322,19 @@ class NanoBot(Robot):
             # backup and rotate to correct
             self.m1Backward(self.med)
             self.m2Backward(self.med)
-            time.sleep_ms(500)
+            yield 500
             self.allStop()
 
 
             if left_time < right_time:
                 self.m1Forward(self.slow)
                 self.m2Backward(self.slow)
-                time.sleep_ms(right_time - left_time)
+                yield right_time - left_time
                 self.allStop()
             else:
                 self.m1Backward(self.slow)
                 self.m2Forward(self.slow)
-                time.sleep_ms(left_time - right_time)
+                yield left_time - right_time
                 self.allStop()
             white_left = False
             white_right = False
@@ -316,7 +344,7 @@ class NanoBot(Robot):
 
         self.m1Forward(self.slow)
         self.m2Forward(self.slow)
-        time.sleep_ms(self.block_delay)
+        yield self.block_delay
         self.allStop()
 
     def receive_scent(self):
@@ -343,3 +371,58 @@ class NanoBot(Robot):
             pass
         return response
 
+
+def __getattr__(name):
+    # AsyncNanoBot is only made when it is first imported, so a NanoBot loads neither asyncrobot
+    # nor asyncio
+    if name == "AsyncNanoBot":
+        global AsyncNanoBot
+        AsyncNanoBot = _async_nanobot()
+        return AsyncNanoBot
+    raise AttributeError(name)
+
+
+def _async_nanobot():
+    from asyncrobot import AsyncRobot, asyncio
+
+    class AsyncNanoBot(AsyncRobot, NanoBot):
+        """
+        NanoBot for asyncio: driving and waiting for the client only await, so the robot thinks
+        (see AsyncRobot.think) while it drives and while the client works out a scent
+
+            asyncio.run(AsyncNanoBot().start())
+        """
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, written=asyncio.ThreadSafeFlag(), **kwargs)
+
+        async def _drive(self, steps):
+            for ms in steps:
+                await asyncio.sleep_ms(ms)
+
+        async def _request(self, command):
+            # sends command and returns the client's response once it has written one
+            self.bluetooth.send(command)
+            while (response := self.bluetooth.read("int")) == ord(command):
+                await self.bluetooth.written.wait()
+            return response
+
+        async def rot_cw(self):
+            await self._drive(self._rot_steps(-1))
+
+        async def rot_ccw(self):
+            await self._drive(self._rot_steps(1))
+
+        async def forward(self):
+            await self._drive(self._forward_steps())
+
+        async def receive_scent(self):
+            # ask again if response is invalid
+            while (response := await self._request("?")) is None:
+                pass
+            return response
+
+        async def shoot(self):
+            return await self._request("@")
+
+    return AsyncNanoBot
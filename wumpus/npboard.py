@@ -0,0 +1,172 @@
+"""
+npboard.py
+NumPy backend for the wumpus solver. NumpyBoard keeps the tile possibilities in a
+width x height array, so reduce and eliminate work on the whole board at once with shifted
+array sums instead of looping over tiles. This pays off when many scents are folded into a
+large board at once: tests/bench_boards.py reports numpy faster than list at catching up from
+size 32 (32x32). It never wins per sniff, at any size the benchmark measures: for a robot that
+sniffs one tile at a time, Board's incremental eliminate is faster, and is the one to use on
+MicroPython.
+
+    robot = MyRobot(board=NumpyBoard(width=256, height=256))
+
+or make_board(width, height, "numpy") from wumpus.py, which only imports numpy when asked to.
+"""
+
+import numpy as np
+
+try:
+    from wumpus.wumpus import WIDTH, HEIGHT, Board, Tile, adjacency
+except ImportError:
+    from wumpus import WIDTH, HEIGHT, Board, Tile, adjacency
+
+
+def _neighbour_counts(mask):
+    """
+    returns, for every tile, how many of its (up to 4) adjacent tiles are set in the boolean array mask
+    """
+    padded = np.zeros((mask.shape[0] + 2, mask.shape[1] + 2), dtype=np.int8)
+    padded[1:-1, 1:-1] = mask
+    return padded[:-2, 1:-1] + padded[2:, 1:-1] + padded[1:-1, :-2] + padded[1:-1, 2:]
+
+
+class NumpyBoard:
+    """
+    Board backend that stores board[x][y] in cells, an int64 array of shape (width, height)
+    (wide enough that values read from it add up like python ints). board[x] is a row view of
+    cells, so board[x][y] reads and assigns like the nested lists of Board (assignments are not
+    recorded in changes, see Board).
+    """
+
+    def __init__(self, columns=None, width=WIDTH, height=HEIGHT):
+        """
+        NumpyBoard() creates a width x height board of unknown tiles,
+        NumpyBoard(columns) copies the tiles of a Board or nested list
+        """
+        if columns is not None and len(columns):
+            self.cells = np.array([list(col) for col in columns], dtype=np.int64)
+        else:
+            self.cells = np.full((width, height), Tile.UNKNOWN, dtype=np.int64)
+        self.width, self.height = self.cells.shape
+        self._adjacency = adjacency(self.width, self.height)
+        self.gold_pos = None
+        self.wumpus_pos = None
+        self.changes = []
+
+    def __getitem__(self, x):
+        return self.cells[x]
+
+    def __len__(self):
+        return self.width
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def __eq__(self, other):
+        return self.cells.tolist() == [list(col) for col in other]
+
+    def __repr__(self):
+        return repr(self.cells.tolist())
+
+    __str__ = Board.__str__
+
+    def adjacent(self, x, y):
+        """
+        returns the positions adjacent to (x, y) on this board (a shared tuple, see Adjacency)
+        """
+        return self._adjacency.adjacent[x * self.height + y]
+
+    def restrict(self, x, y, mask):
+        """
+        narrows the possibilities of tile (x, y) to those in mask, recording the change
+        returns True if the tile changed
+        """
+        old = int(self.cells[x, y])
+        if old & mask == old:
+            return False
+        self.cells[x, y] = old & mask
+        self.changes.append(self._adjacency.tiles[x * self.height + y])
+        return True
+
+    def _update(self, cells):
+        # replaces cells, logging every tile that changed (in x then y order, like BitBoard)
+        xs, ys = np.nonzero(cells != self.cells)
+        self.changes.extend(zip(xs.tolist(), ys.tolist()))
+        self.cells = cells
+
+    def reduce(self, scent, x, y):
+        """
+        same as Board.reduce, but clears gold or the wumpus from the rest of the board at once
+        """
+        if (scent & 0b1000 != 0):
+            self.restrict(x, y, Tile.GOLD)
+            self.gold_pos = (x, y)
+            return
+
+        adjacent = self.adjacent(x, y)
+        for adj_x, adj_y in adjacent:
+            self.restrict(adj_x, adj_y, scent)
+
+        # since there is just 1 gold and 1 wumpus, a scent of either means it is one of the 4 adjacent tiles
+        for tile in (Tile.WUMPUS, Tile.GOLD):
+            if not scent & tile:
+                continue
+            elsewhere = (self.cells & tile) != 0
+            for adj_x, adj_y in adjacent:
+                elsewhere[adj_x, adj_y] = False
+            xs, ys = np.nonzero(elsewhere)
+            if len(xs):
+                self.cells[xs, ys] &= ~tile
+                self.changes.extend(zip(xs.tolist(), ys.tolist()))
+
+    # deduce only inspects a few tiles, so the Board version works unchanged through board[x][y]
+    deduce = Board.deduce
+
+    def eliminate(self, scents):
+        """
+        same as Board.eliminate (repeating until nothing changes), but each round finds every
+        scent with exactly one possible source with shifted sums over the whole board
+
+        scents may be an array (from new_scents) or a scents[width][height] nested list
+        """
+        scents = np.asarray(scents)
+        sensed = [(scents & tile) != 0 for tile in (Tile.PIT, Tile.WUMPUS, Tile.GOLD)]
+        cells = self.cells.copy()
+
+        changed = True
+        while changed:
+            changed = False
+            for t in range(3):
+                if not sensed[t].any():
+                    continue
+                possible = (cells & (1 << t)) != 0
+                sources = sensed[t] & (_neighbour_counts(possible) == 1)
+                if not sources.any():
+                    continue
+                # the only possible neighbour of each of those scents must be this tile type
+                forced = (_neighbour_counts(sources) > 0) & possible
+                if (cells[forced] != (1 << t)).any():
+                    cells[forced] = 1 << t
+                    changed = True
+
+            # if we do not know where the wumpus or gold is, see if there is only option for where it can be
+            for tile, attr in ((Tile.GOLD, "gold_pos"), (Tile.WUMPUS, "wumpus_pos")):
+                pos = getattr(self, attr)
+                if pos is None:
+                    possible = np.flatnonzero(cells & tile)
+                    if len(possible) == 1:
+                        pos = divmod(int(possible[0]), self.height)
+                        setattr(self, attr, pos)
+                if pos is None:
+                    continue
+                if cells[pos] & ~tile:
+                    cells[pos] &= tile
+                    changed = True
+
+        self._update(cells)
+
+    def new_scents(self):
+        """
+        returns a scents array matching this board, with every tile unsniffed
+        """
+        return np.full((self.width, self.height), Tile.UNSNIFFED, dtype=np.int16)
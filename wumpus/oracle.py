@@ -0,0 +1,429 @@
+"""
+oracle.py
+Enumerates every world of a small board (needs numpy) to tell the worlds the Robot fails because
+it guessed wrong from the ones that could not be solved at all. Each world, a placement of the
+gold, the wumpus and any number of pits on distinct tiles other than the start (0, 0), is
+
+    UNREACHABLE  the gold is walled off by pits, so even knowing the world does not help
+    GUESS        the gold can be reached, but not without stepping onto a tile that might be deadly
+    DEDUCIBLE    a careful agent gets the gold without ever risking its life
+
+where the careful agent reasons exactly over every world that agrees with what it has sensed,
+only enters tiles that cannot hold a pit or a live wumpus, and shoots the wumpus once it knows
+where it is. The Robot's outcome (SUCCEEDED, FAILED, DIED or STUCK) and moves on each world are
+those of WorldRobot(world).start(), see world.py.
+
+    oracle = Oracle(4, 4)
+    oracle.run(workers=4)
+    print(oracle.report())
+
+or python oracle.py 4 4 from a shell. The 4x4 board has 1,720,320 worlds.
+
+The Robot is not run once per world. Its run only depends on the scents it receives and on whether
+it survives each step, so one run is shared by every world that answers it the same way: Walk runs
+the Robot against a whole set of worlds and splits the set where they disagree, replaying the
+Robot for each part (a pruned search of the Robot's decision tree). Worlds that mirror each other
+along the diagonal are classified alike, but are still both played, since the Robot starts
+facing east and is not symmetric.
+"""
+
+import argparse
+import math
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+try:
+    from wumpus.wumpus import Tile, adjacency
+    from wumpus.world import RobotDied, WorldRobot
+except ImportError:
+    from wumpus import Tile, adjacency
+    from world import RobotDied, WorldRobot
+
+# classes of worlds
+UNREACHABLE = 0
+GUESS = 1
+DEDUCIBLE = 2
+CLASSES = ("unreachable", "guess", "deducible")
+
+# Robot outcomes, SUCCEEDED is WorldRobot.succeeded, FAILED a mission that ended without it,
+# DIED raised RobotDied and STUCK any other exception (such as the WorldRobot limits)
+SUCCEEDED = 0
+FAILED = 1
+DIED = 2
+STUCK = 3
+OUTCOMES = ("succeeded", "failed", "died", "stuck")
+
+# what Oracle.run records about the Robot on each world, with the dtype of its array
+ROBOT_FIELDS = (("outcome", np.int8), ("moves", np.int32), ("rotations", np.int32), ("shots", np.int8))
+
+
+def enumerate_worlds(width, height, max_pits=None):
+    """
+    returns the gold, wumpus and pits arrays of every world of the board with up to max_pits pits
+    (any number by default). gold and wumpus are flat tile indices (x * height + y), and bit t of
+    pits is set when tile t is a pit.
+    """
+    size = width * height
+    if size > 64:
+        raise ValueError("boards of more than 64 tiles do not fit the pits bit mask")
+    golds, wumpuses, pits = [], [], []
+    for gold in range(1, size):
+        for wumpus in range(1, size):
+            if wumpus == gold:
+                continue
+            others = np.array([t for t in range(1, size) if t not in (gold, wumpus)], dtype=np.uint64)
+            masks = np.arange(1 << len(others), dtype=np.uint64)
+            bits = (masks[:, None] >> np.arange(len(others), dtype=np.uint64)) & np.uint64(1)
+            if max_pits is not None:
+                masks, bits = masks[bits.sum(axis=1) <= max_pits], bits[bits.sum(axis=1) <= max_pits]
+            pits.append((bits << others).sum(axis=1, dtype=np.uint64))
+            golds.append(np.full(len(masks), gold, dtype=np.int64))
+            wumpuses.append(np.full(len(masks), wumpus, dtype=np.int64))
+    return np.concatenate(golds), np.concatenate(wumpuses), np.concatenate(pits)
+
+
+def world_id(width, height, gold, wumpus, pits, max_pits=None):
+    """
+    returns the index of the world (as flat tile indices and a pits bit mask) in the arrays of
+    enumerate_worlds(width, height, max_pits), without enumerating them
+    """
+    size = width * height
+    if not (0 < gold < size and 0 < wumpus < size and gold != wumpus) or pits & (1 | 1 << gold | 1 << wumpus):
+        raise ValueError("not a world: gold, wumpus and pits must be on distinct tiles other than the start")
+    others = [t for t in range(1, size) if t not in (gold, wumpus)]
+    if pits >> size:
+        raise ValueError("pits off the board")
+    # the pits as a mask over others, which is how each gold and wumpus pair enumerates them
+    mask = sum(1 << j for j, t in enumerate(others) if pits >> t & 1)
+    block = (gold - 1) * (size - 2) + wumpus - 1 - (wumpus > gold)
+    if max_pits is None:
+        return (block << len(others)) + mask
+    if bin(mask).count("1") > max_pits:
+        raise ValueError("more than max_pits pits")
+
+    def subsets(bits, most):
+        # the number of masks of bits bits with at most most bits set
+        return sum(math.comb(bits, n) for n in range(most + 1)) if most >= 0 else 0
+
+    # count the smaller masks with few enough pits, bit by bit from the highest
+    rank, ones = 0, 0
+    for j in range(len(others) - 1, -1, -1):
+        if mask >> j & 1:
+            rank += subsets(j, max_pits - ones)
+            ones += 1
+    return block * subsets(len(others), max_pits) + rank
+
+
+def world_grid(width, height, gold, wumpus, pits):
+    """
+    returns the world[x][y] of Tile values (for WorldRobot) of one enumerated world
+    """
+    world = [[Tile.EMPTY] * height for _ in range(width)]
+    for t in range(width * height):
+        x, y = divmod(t, height)
+        if int(pits) >> t & 1:
+            world[x][y] = Tile.PIT
+    world[gold // height][gold % height] = Tile.GOLD
+    world[wumpus // height][wumpus % height] = Tile.WUMPUS
+    return world
+
+
+def transpose(width, height, gold, wumpus, pits):
+    """
+    returns the gold, wumpus and pits arrays of the worlds mirrored along the diagonal (x, y) -> (y, x),
+    the one symmetry of a square board that keeps the start in place
+    """
+    if width != height:
+        raise ValueError("only square boards are symmetric")
+    flip = np.array([(t % height) * height + t // height for t in range(width * height)])
+    mirrored = np.zeros_like(pits)
+    for t in range(width * height):
+        mirrored |= ((pits >> np.uint64(t)) & np.uint64(1)) << np.uint64(flip[t])
+    return flip[gold], flip[wumpus], mirrored
+
+
+class Walk:
+    """
+    Runs the Robot against a set of worlds at once (see the module docstring), recording the
+    ROBOT_FIELDS of each world in the arrays of results.
+
+    An event is a call to receive_scent, forward or shoot. The answer to every event so far is
+    kept in log, so a part split off at a scent can be resumed later by replaying the log.
+    """
+
+    def __init__(self, oracle, indices, results):
+        self.oracle = oracle
+        self.results = results
+        # parts of the worlds still to play, as (log, indices, wumpus, has_gold)
+        # wumpus is -1 in worlds where the Robot has shot it, has_gold whether it stepped on the gold
+        self.pending = [([], indices, oracle.wumpus[indices].copy(), np.zeros(len(indices), dtype=bool))]
+        self.runs = 0
+
+    def run(self):
+        while self.pending:
+            self.log, self.indices, self.wumpus, self.has_gold = self.pending.pop()
+            self.replayed = 0
+            self.runs += 1
+            robot = self.robot()
+            try:
+                robot.start()
+                error = None
+            except _Gone:
+                continue
+            except Exception as e:
+                error = e
+            self.finish(robot, self.indices, self.has_gold, error)
+
+    def robot(self):
+        """
+        returns a new robot to play the worlds with
+        """
+        return _WalkRobot(self, self.oracle.width, self.oracle.height)
+
+    def finish(self, robot, indices, has_gold, error):
+        at_start = (robot.x, robot.y) == robot.start_pos
+        if error is None:
+            outcome = np.where(has_gold & at_start, SUCCEEDED, FAILED)
+        elif isinstance(error, RobotDied):
+            outcome = DIED
+        else:
+            outcome = np.where(has_gold & at_start, SUCCEEDED, STUCK)
+        self.results["outcome"][indices] = outcome
+        self.results["moves"][indices] = robot.moves
+        self.results["rotations"][indices] = robot.rotations
+        self.results["shots"][indices] = robot.shots
+
+    def answer(self, robot, event):
+        """
+        returns the answer to the robot's next event, for the worlds being played
+        """
+        if self.replayed < len(self.log):
+            self.replayed += 1
+            return self.log[self.replayed - 1]
+
+        oracle = self.oracle
+        tile = robot.x * oracle.height + robot.y
+        answer = None
+        if event == "scent":
+            scents = oracle.scents_at(tile, self.indices, self.wumpus)
+            values = np.unique(scents)
+            # carry on with one scent, and leave the worlds that gave each other one for later
+            for value in values[1:].tolist():
+                part = scents == value
+                self.pending.append((self.log + [value], self.indices[part], self.wumpus[part], self.has_gold[part]))
+            answer = int(values[0])
+            self.keep(scents == values[0])
+        elif event == "forward":
+            deadly = ((oracle.pits[self.indices] >> np.uint64(tile)) & np.uint64(1)).astype(bool) | (self.wumpus == tile)
+            if deadly.any():
+                self.finish(robot, self.indices[deadly], self.has_gold[deadly], RobotDied())
+                self.keep(~deadly)
+            self.has_gold |= oracle.gold[self.indices] == tile
+        elif event == "shoot":
+            x, y = robot.x + robot.dx, robot.y + robot.dy
+            if 0 <= x < oracle.width and 0 <= y < oracle.height:
+                self.wumpus = np.where(self.wumpus == x * oracle.height + y, -1, self.wumpus)
+
+        if not len(self.indices):
+            raise _Gone()
+        self.log.append(answer)
+        self.replayed += 1
+        return answer
+
+    def keep(self, part):
+        self.indices, self.wumpus, self.has_gold = self.indices[part], self.wumpus[part], self.has_gold[part]
+
+
+class _Gone(Exception):
+    # every world of the part being played has ended
+    pass
+
+
+class _WalkRobot(WorldRobot):
+    # a WorldRobot (with the same counters and limits) whose world is a Walk
+
+    def __init__(self, walk, width, height):
+        super().__init__([[Tile.EMPTY] * height for _ in range(width)])
+        self.walk = walk
+
+    def receive_scent(self):
+        self.sniffs += 1
+        if self.sniffs > self.MAX_SNIFFS_PER_TILE * self.width * self.height:
+            raise RuntimeError("robot is stuck sniffing")
+        return self.walk.answer(self, "scent")
+
+    def forward(self):
+        self.moves += 1
+        self.walk.answer(self, "forward")
+
+    def shoot(self):
+        self.shots += 1
+        self.walk.answer(self, "shoot")
+
+
+def _walk(args):
+    # plays one part of the worlds in a worker process (the oracle is inherited through fork,
+    # or pickled along where processes are spawned)
+    oracle, indices = args
+    results = dict((name, np.zeros(len(oracle), dtype=dtype)) for name, dtype in ROBOT_FIELDS)
+    walk = Walk(oracle, indices, results)
+    walk.run()
+    return indices, dict((name, values[indices]) for name, values in results.items()), walk.runs
+
+
+class Oracle:
+    """
+    All the worlds of a width x height board (see enumerate_worlds), with their class, and the
+    Robot's outcome, moves, rotations and shots (ROBOT_FIELDS) once run has been called
+    """
+
+    def __init__(self, width, height, max_pits=None):
+        self.width = width
+        self.height = height
+        self.gold, self.wumpus, self.pits = enumerate_worlds(width, height, max_pits)
+        self.neighbours = adjacency(width, height).indices
+        self.max_pits = max_pits
+        self.classes = None
+        for name, dtype in ROBOT_FIELDS:
+            setattr(self, name, None)
+        self.runs = 0
+
+    def __len__(self):
+        return len(self.gold)
+
+    def scents_at(self, tile, indices=None, wumpus=None):
+        """
+        returns the scent (as WorldRobot.receive_scent) at tile in each world, or in the worlds
+        at indices with the wumpus at wumpus instead (-1 once it is shot)
+        """
+        if indices is None:
+            indices = np.arange(len(self))
+        if wumpus is None:
+            wumpus = self.wumpus[indices]
+        gold, pits = self.gold[indices], self.pits[indices]
+        scent = np.zeros(len(indices), dtype=np.int64)
+        for adj in self.neighbours[tile]:
+            scent |= ((pits >> np.uint64(adj)) & np.uint64(1)).astype(np.int64) * Tile.PIT
+            scent |= (wumpus == adj) * Tile.WUMPUS
+            scent |= (gold == adj) * Tile.GOLD
+        return np.where(gold == tile, 0b1000, scent)
+
+    def classify(self):
+        """
+        sets and returns classes, the class of every world (see the module docstring)
+        """
+        size = self.width * self.height
+        count = len(self)
+        tiles = np.uint64(1) << np.arange(size, dtype=np.uint64)
+        neighbours = np.array([np.bitwise_or.reduce(tiles[list(adj)]) for adj in self.neighbours], dtype=np.uint64)
+        gold_bit = tiles[self.gold]
+        wumpus_bit = tiles[self.wumpus]
+        scents = np.stack([self.scents_at(t) for t in range(size)], axis=1)
+
+        # with the world known, the wumpus can always be shot from the tile before it
+        reached = np.ones(count, dtype=np.uint64)
+        while True:
+            grown = reached | (_spread(reached, neighbours) & ~self.pits)
+            if (grown == reached).all():
+                break
+            reached = grown
+        classes = np.where(reached & gold_bit != 0, GUESS, UNREACHABLE)
+
+        # the careful agent: worlds it cannot tell apart share a group, and it explores every tile
+        # that is safe in all of its group's worlds, then tells them apart by the new scents
+        visited = np.ones(count, dtype=np.uint64)
+        alive = np.ones(count, dtype=bool)
+        group = np.unique(scents[:, 0], return_inverse=True)[1].reshape(-1)
+        while True:
+            groups = group.max() + 1
+            frontier = _spread(visited, neighbours) & ~visited
+            # a wumpus whose tile every world of the group agrees on is shot from a visited tile
+            lowest = np.full(groups, size, dtype=np.int64)
+            highest = np.full(groups, -1, dtype=np.int64)
+            np.minimum.at(lowest, group, self.wumpus)
+            np.maximum.at(highest, group, self.wumpus)
+            shoot = alive & (lowest[group] == highest[group]) & (frontier & wumpus_bit != 0)
+            alive &= ~shoot
+            danger = np.zeros(groups, dtype=np.uint64)
+            np.bitwise_or.at(danger, group, self.pits | np.where(alive, wumpus_bit, np.uint64(0)))
+            # once the gold is found the agent just walks back
+            found = visited & gold_bit != 0
+            explore = np.where(found, np.uint64(0), frontier & ~danger[group])
+            if not explore.any():
+                break
+            visited |= explore
+            sensed = np.zeros(count, dtype=np.uint64)
+            for t in range(size):
+                new = explore & tiles[t] != 0
+                sensed = np.where(new, (sensed << np.uint64(4)) | scents[:, t].astype(np.uint64), sensed)
+            # the explored tiles are the same throughout a group, so the new scents tell its worlds apart
+            order = np.lexsort((sensed, group))
+            starts = np.ones(count, dtype=bool)
+            starts[1:] = (np.diff(group[order]) != 0) | (np.diff(sensed[order]) != 0)
+            group[order] = np.cumsum(starts) - 1
+        self.classes = np.where(visited & gold_bit != 0, DEDUCIBLE, classes)
+        return self.classes
+
+    def run(self, workers=None, indices=None):
+        """
+        classifies every world (unless already done) and plays the Robot on the worlds at indices
+        (all of them by default), on a pool of workers processes (one per core by default,
+        1 plays in this process)
+        """
+        if self.classes is None:
+            self.classify()
+        if self.outcome is None:
+            for name, dtype in ROBOT_FIELDS:
+                setattr(self, name, np.zeros(len(self), dtype=dtype))
+        if indices is None:
+            indices = np.arange(len(self))
+        # worlds with the gold in the same place make parts of about the same size
+        golds = self.gold[indices]
+        parts = [(self, indices[golds == gold]) for gold in np.unique(golds)]
+        if workers == 1:
+            results = map(_walk, parts)
+        else:
+            pool = Pool(workers)
+            results = pool.imap_unordered(_walk, parts)
+        for part, values, runs in results:
+            for name, _ in ROBOT_FIELDS:
+                getattr(self, name)[part] = values[name]
+            self.runs += runs
+        if workers != 1:
+            pool.close()
+            pool.join()
+
+    def report(self):
+        """
+        returns a table of the number of worlds of each class by Robot outcome
+        """
+        lines = ["%-12s" % "" + "".join("%12s" % name for name in OUTCOMES + ("total",))]
+        for c, name in enumerate(CLASSES):
+            counts = [int(np.count_nonzero((self.classes == c) & (self.outcome == o))) for o in range(len(OUTCOMES))]
+            lines.append("%-12s" % name + "".join("%12d" % n for n in counts + [sum(counts)]))
+        lines.append("%d worlds, %d Robot runs" % (len(self), self.runs))
+        return "\n".join(lines)
+
+
+def _spread(bits, neighbours):
+    # returns the tiles adjacent to any tile set in each of the bit masks bits
+    spread = np.zeros_like(bits)
+    for t in range(len(neighbours)):
+        spread |= np.where(bits & (np.uint64(1) << np.uint64(t)) != 0, neighbours[t], np.uint64(0))
+    return spread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify every world of a board and play the Robot on each.")
+    parser.add_argument("width", type=int)
+    parser.add_argument("height", type=int)
+    parser.add_argument("--max_pits", type=int, help="only worlds with at most this many pits")
+    parser.add_argument("--workers", type=int, help="processes to use (default: one per core)")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    oracle = Oracle(args.width, args.height, args.max_pits)
+    oracle.run(args.workers)
+    print(oracle.report())
+    print("took %.1fs" % (time.perf_counter() - start))
@@ -0,0 +1,211 @@
+"""
+outcomes.py
+A file of precomputed world outcomes (see oracle.py): after a 32 byte header, one 16 byte record
+per world id, the index of the world in enumerate_worlds(width, height, max_pits). A record holds
+the world's class (UNREACHABLE worlds are the unsolvable ones), the Robot's outcome, shots, moves
+and rotations, and the generation of the solver that computed them.
+
+OutcomeIndex maps the file into memory, so looking up a world reads 16 bytes and records() scans
+all of them as a numpy array without copying:
+
+    OutcomeIndex.create("4x4.outcomes", 4, 4).close()
+    with OutcomeIndex("4x4.outcomes") as index:
+        index.lookup(gold, wumpus, pits).succeeded
+
+The header keeps a fingerprint of the solver sources (wumpus.py and world.py). Once they change,
+update() starts a new generation, which makes every record stale, and replays the Robot on
+the stale records, optionally only limit of them at a time. An interrupted update carries on where
+it stopped. The classes do not depend on the solver and are never recomputed.
+
+    python outcomes.py create 4x4.outcomes 4 4
+    python outcomes.py update 4x4.outcomes [--limit N]
+    python outcomes.py show 4x4.outcomes
+"""
+
+import argparse
+import hashlib
+import mmap
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from wumpus import wumpus as solver, world
+    from wumpus.oracle import CLASSES, OUTCOMES, SUCCEEDED, UNREACHABLE, Oracle, world_id
+except ImportError:
+    import wumpus as solver, world
+    from oracle import CLASSES, OUTCOMES, SUCCEEDED, UNREACHABLE, Oracle, world_id
+
+MAGIC = b"WUMPOUT1"
+# magic, width, height, max_pits (-1 for any number), count, generation, solver fingerprint
+HEADER = struct.Struct("<8sBBbxII12s")
+# class, outcome, shots, moves, rotations, generation (0 until first computed)
+RECORD = struct.Struct("<BBBxIII")
+DTYPE = np.dtype([("class", "u1"), ("outcome", "u1"), ("shots", "u1"), ("unused", "u1"),
+                  ("moves", "<u4"), ("rotations", "<u4"), ("generation", "<u4")])
+
+
+class Record(namedtuple("Record", ("classification", "outcome", "shots", "moves", "rotations", "generation"))):
+    __slots__ = ()
+
+    @property
+    def solvable(self):
+        return self.classification != UNREACHABLE
+
+    @property
+    def succeeded(self):
+        return self.outcome == SUCCEEDED
+
+
+def solver_fingerprint():
+    """
+    returns a hash of the sources that decide the Robot's outcomes
+    """
+    digest = hashlib.sha1()
+    for module in (solver, world):
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    # as much of it as the header has room for
+    return digest.digest()[:12]
+
+
+class OutcomeIndex:
+    """
+    An outcomes file mapped into memory, read only unless writable (which update needs)
+    """
+
+    def __init__(self, path, writable=False):
+        self.path = path
+        self.file = open(path, "r+b" if writable else "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        magic, self.width, self.height, max_pits, self.count, self.generation, self.fingerprint = HEADER.unpack_from(self.map)
+        if magic != MAGIC or len(self.map) != HEADER.size + self.count * RECORD.size:
+            self.close()
+            raise ValueError(path + " is not an outcomes file")
+        self.max_pits = None if max_pits < 0 else max_pits
+
+    @classmethod
+    def create(cls, path, width, height, max_pits=None, workers=None):
+        """
+        classifies every world of the board, writes a new outcomes file, fills it with update,
+        and returns it opened for writing
+        """
+        oracle = Oracle(width, height, max_pits)
+        oracle.classify()
+        records = np.zeros(len(oracle), dtype=DTYPE)
+        records["class"] = oracle.classes
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, width, height, -1 if max_pits is None else max_pits, len(oracle), 1,
+                                solver_fingerprint()))
+            f.write(records.tobytes())
+        index = cls(path, writable=True)
+        index.update(workers, oracle=oracle)
+        return index
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, world):
+        if not 0 <= world < self.count:
+            raise IndexError("world id out of range")
+        return Record(*RECORD.unpack_from(self.map, HEADER.size + world * RECORD.size))
+
+    def lookup(self, gold, wumpus, pits):
+        """
+        returns the record of a world given as flat tile indices and a pits bit mask (see oracle.py)
+        """
+        return self[world_id(self.width, self.height, gold, wumpus, pits, self.max_pits)]
+
+    def records(self):
+        """
+        returns every record as a numpy array backed by the file (so writable only if the index is)
+        """
+        return np.frombuffer(self.map, dtype=DTYPE, count=self.count, offset=HEADER.size)
+
+    def stale(self):
+        """
+        returns the ids of the worlds whose records are not of the current generation
+        """
+        return np.flatnonzero(self.records()["generation"] != self.generation)
+
+    def update(self, workers=None, limit=None, oracle=None):
+        """
+        starts a new generation if the solver has changed since the last one, then replays the
+        Robot on up to limit (by default all) stale worlds and writes their records
+        returns the number of records written
+        """
+        fingerprint = solver_fingerprint()
+        if fingerprint != self.fingerprint:
+            self.generation += 1
+            self.fingerprint = fingerprint
+        ids = self.stale()[:limit]
+        if len(ids):
+            records = self.records()
+            if oracle is None:
+                oracle = Oracle(self.width, self.height, self.max_pits)
+                oracle.classes = records["class"].astype(np.int64)
+            oracle.run(workers, indices=ids)
+            for name in ("outcome", "shots", "moves", "rotations"):
+                records[name][ids] = getattr(oracle, name)[ids]
+            records["generation"][ids] = self.generation
+            del records
+        HEADER.pack_into(self.map, 0, MAGIC, self.width, self.height, -1 if self.max_pits is None else self.max_pits,
+                         self.count, self.generation, self.fingerprint)
+        self.map.flush()
+        return len(ids)
+
+    def summary(self):
+        """
+        returns a table of the number of worlds of each class by Robot outcome, like Oracle.report
+        """
+        records = self.records()
+        lines = ["%-12s" % "" + "".join("%12s" % name for name in OUTCOMES + ("total",))]
+        for c, name in enumerate(CLASSES):
+            of_class = records["class"] == c
+            counts = [int(np.count_nonzero(of_class & (records["outcome"] == o))) for o in range(len(OUTCOMES))]
+            lines.append("%-12s" % name + "".join("%12d" % n for n in counts + [sum(counts)]))
+        stale = len(self.stale())
+        del records, of_class
+        lines.append("%d worlds on %dx%d, generation %d, %d stale" % (self.count, self.width, self.height,
+                                                                      self.generation, stale))
+        return "\n".join(lines)
+
+    def close(self):
+        # fails (BufferError) while arrays from records() are still around
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create, update or show a file of precomputed world outcomes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create")
+    create.add_argument("path")
+    create.add_argument("width", type=int)
+    create.add_argument("height", type=int)
+    create.add_argument("--max_pits", type=int, help="only worlds with at most this many pits")
+    update = commands.add_parser("update")
+    update.add_argument("path")
+    update.add_argument("--limit", type=int, help="replay at most this many stale worlds")
+    show = commands.add_parser("show")
+    show.add_argument("path")
+    for command in (create, update):
+        command.add_argument("--workers", type=int, help="processes to use (default: one per core)")
+    args = parser.parse_args()
+
+    if args.command == "create":
+        index = OutcomeIndex.create(args.path, args.width, args.height, args.max_pits, args.workers)
+    elif args.command == "update":
+        index = OutcomeIndex(args.path, writable=True)
+        print("updated %d records" % index.update(args.workers, args.limit))
+    else:
+        index = OutcomeIndex(args.path)
+    print(index.summary())
+    index.close()
@@ -0,0 +1,196 @@
+"""
+policy.py
+Compiles what the Robot decides on a small board into a decision table for PolicyRobot (see
+policybot.py), so a robot can play the board without running wumpus.py at all. A Robot's mission
+only depends on the scents it receives, so the table is the Robot's decision tree: the actions it
+takes up to each sniff, and the node to carry on with for each scent it can receive there.
+
+The tree is found the way oracle.py plays the Robot (needs numpy), against every world of the
+board at once, splitting the worlds wherever their scents differ. So the table has a branch for
+exactly the scents some world can give, and a mission in any of those worlds makes the same
+decisions as the Robot would:
+
+    table = compile_policy(4, 4, costs=(2500, 2500, 5000))
+
+or from a shell:
+
+    python policy.py 4 4 4x4.policy [--max_pits N] [--costs FORWARD TURN TURN_180]
+
+costs are the FORWARD_COST, TURN_COST and TURN_180_COST of the robot the table is for, which the
+Robot plans its routes with. The 4x4 board (every number of pits) compiles to about 13,500 nodes,
+3,700 of them distinct, in about 10 seconds.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+try:
+    from wumpus.oracle import ROBOT_FIELDS, Oracle, Walk, _Gone, _WalkRobot
+    from wumpus.policybot import END, HEADER_SIZE, MAGIC, OPS, ROT_CW, SNIFF, STUCK, VERSION
+except ImportError:
+    from oracle import ROBOT_FIELDS, Oracle, Walk, _Gone, _WalkRobot
+    from policybot import END, HEADER_SIZE, MAGIC, OPS, ROT_CW, SNIFF, STUCK, VERSION
+
+# the most times one op byte repeats an action
+MAX_REPEAT = 32
+
+
+class Node:
+    """
+    a node of the decision tree: the ops (FORWARD to SHOOT) the Robot carries out from it, how it
+    ends (SNIFF, END or STUCK, None while unknown) and, after a SNIFF, the node for each scent
+    """
+
+    __slots__ = ("ops", "end", "children")
+
+    def __init__(self):
+        self.ops = []
+        self.end = None
+        self.children = {}
+
+    def count(self):
+        """
+        returns the number of nodes in the tree below (and including) this one
+        """
+        count = 0
+        pending = [self]
+        while pending:
+            node = pending.pop()
+            count += 1
+            pending.extend(node.children.values())
+        return count
+
+
+class _PolicyWalk(Walk):
+    # plays the worlds like Walk, building the decision tree from root as it goes
+
+    def __init__(self, oracle, indices, results, root, costs):
+        super().__init__(oracle, indices, results)
+        self.root = root
+        self.costs = costs
+
+    def robot(self):
+        return _PolicyRobot(self, self.oracle.width, self.oracle.height)
+
+
+class _PolicyRobot(_WalkRobot):
+    # records what it does into the node it has got to. Every run replays the scents of an earlier
+    # one up to where it splits off, and as the Robot is deterministic, the nodes on the way there
+    # already hold what it does again
+
+    def __init__(self, walk, width, height):
+        self.FORWARD_COST, self.TURN_COST, self.TURN_180_COST = walk.costs
+        super().__init__(walk, width, height)
+        self.node = walk.root
+
+    def _perform(self, action):
+        if self.node.end is None:
+            self.node.ops.append(OPS.index(action.__name__))
+        action()
+
+    def receive_scent(self):
+        scent = super().receive_scent()
+        self.node.end = SNIFF
+        self.node = self.node.children.setdefault(scent, Node())
+        return scent
+
+    def start(self):
+        try:
+            super().start()
+        except _Gone:
+            # every world died on the way (which ends the node like END)
+            raise
+        except Exception:
+            if self.node.end is None:
+                self.node.end = STUCK
+                if self.rotations > self.rotation_limit(self.width, self.height):
+                    # it spins in place from the last turn that was not a rot_cw
+                    while self.node.ops and self.node.ops[-1] == ROT_CW:
+                        self.node.ops.pop()
+            raise
+        if self.node.end is None:
+            self.node.end = END
+
+
+def build_tree(width, height, max_pits=None, costs=(1, 0, 0)):
+    """
+    returns the root Node of the Robot's decision tree on the worlds of the board with up to
+    max_pits pits (any number by default), for a robot with the given costs (see the module docstring)
+    """
+    oracle = Oracle(width, height, max_pits)
+    results = dict((name, np.zeros(len(oracle), dtype=dtype)) for name, dtype in ROBOT_FIELDS)
+    root = Node()
+    _PolicyWalk(oracle, np.arange(len(oracle)), results, root, costs).run()
+    return root
+
+
+def encode(root, width, height):
+    """
+    returns the decision table (see policybot.py) of the tree at root, writing each distinct
+    subtree once
+    """
+    table = bytearray(HEADER_SIZE)
+    # the nodes in an order with every node before its children
+    nodes = []
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        nodes.append(node)
+        pending.extend(node.children.values())
+    # where each node (by id) and each distinct encoded node was written
+    written = {}
+    offsets = {}
+    for node in reversed(nodes):
+        data = bytearray()
+        ops = node.ops
+        i = 0
+        while i < len(ops):
+            repeat = 1
+            while i + repeat < len(ops) and ops[i + repeat] == ops[i] and repeat < MAX_REPEAT:
+                repeat += 1
+            data.append(ops[i] | (repeat - 1) << 3)
+            i += repeat
+        # a node whose worlds all died on the way never learns how it ends
+        end = END if node.end is None else node.end
+        data.append(end)
+        if end == SNIFF:
+            scents = sorted(node.children)
+            data += sum(1 << scent for scent in scents).to_bytes(2, "little")
+            for scent in scents:
+                data += written[id(node.children[scent])].to_bytes(3, "little")
+        data = bytes(data)
+        if data not in offsets:
+            offsets[data] = len(table)
+            table += data
+        written[id(node)] = offsets[data]
+    if len(table) >= 1 << 24:
+        raise ValueError("the table is too big for 3 byte offsets")
+    table[:HEADER_SIZE] = MAGIC + bytes((VERSION, width, height)) + written[id(root)].to_bytes(3, "little")
+    return bytes(table)
+
+
+def compile_policy(width, height, max_pits=None, costs=(1, 0, 0)):
+    """
+    returns the decision table of the Robot on the board (see build_tree and encode)
+    """
+    return encode(build_tree(width, height, max_pits, costs), width, height)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the Robot's decisions on a board into a PolicyRobot table.")
+    parser.add_argument("width", type=int)
+    parser.add_argument("height", type=int)
+    parser.add_argument("path")
+    parser.add_argument("--max_pits", type=int, help="only worlds with at most this many pits")
+    parser.add_argument("--costs", type=float, nargs=3, default=(1, 0, 0), metavar=("FORWARD", "TURN", "TURN_180"),
+                        help="the robot's FORWARD_COST, TURN_COST and TURN_180_COST (default: 1 0 0)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    root = build_tree(args.width, args.height, args.max_pits, tuple(args.costs))
+    table = encode(root, args.width, args.height)
+    with open(args.path, "wb") as f:
+        f.write(table)
+    print("%d nodes, %d bytes, took %.1fs" % (root.count(), len(table), time.perf_counter() - start))
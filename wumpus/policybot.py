@@ -0,0 +1,139 @@
+"""
+policybot.py
+PolicyRobot plays missions from a decision table compiled by policy.py instead of deducing
+anything: at each sniff it looks up the scent and carries out the actions the Robot would have
+taken. It imports nothing, so on MicroPython it loads a fraction of the code of wumpus.py and does
+no inference at all. Subclass it like Robot, with the same 5 methods (and optionally rot_180):
+
+    class MyRobot(PolicyRobot):
+        def forward(self):
+            ...
+
+    MyRobot(load("4x4.policy")).start()
+
+A table only covers the board (and the worlds, see policy.py) it was compiled for, starting at
+(0, 0) facing (1, 0). Any indexable bytes work as the table, so it can also be a bytes constant
+in a module frozen into the firmware, which leaves it in flash.
+
+A table is a 10 byte header (MAGIC, VERSION, width, height, and the offset of the node the mission
+starts from) followed by nodes. A node is a string of op bytes: the op in the low 3 bits and, for
+the actions, the number of times to repeat it less one in the high 5 bits, ended by
+    SNIFF  followed by a 2 byte mask of the scents the robot can receive (bit s for scent s), and
+           the 3 byte offset in the table of the node to carry on with for each, in order of scent
+           (at the gold only 0b1000, which the robot looks up for any scent with that bit set)
+    END    the mission is over (the robot is back at the start with the gold, or died on the way)
+    STUCK  the Robot would not finish (it spins in place or keeps sniffing), so start raises
+Multi-byte numbers are little endian. Nodes are shared by every branch that carries on the same
+way, which makes the 4x4 table about 50 kB.
+"""
+
+MAGIC = b"WPOL"
+VERSION = 1
+HEADER_SIZE = 10
+
+# ops
+FORWARD = 0
+ROT_CW = 1
+ROT_CCW = 2
+ROT_180 = 3
+SHOOT = 4
+SNIFF = 5
+END = 6
+STUCK = 7
+
+OPS = ("forward", "rot_cw", "rot_ccw", "rot_180", "shoot", "sniff", "end", "stuck")
+
+
+class PolicyRobot:
+    """
+    x, y, dx and dy are kept up to date like Robot's, and like there, they are updated before the
+    method carrying out the action is called
+    """
+
+    def __init__(self, table):
+        if bytes(table[:4]) != MAGIC or table[4] != VERSION:
+            raise ValueError("not a policy table")
+        self.table = table
+        self.width = table[5]
+        self.height = table[6]
+        self.x = 0
+        self.y = 0
+        self.dx = 1
+        self.dy = 0
+        self.start_pos = (0, 0)
+        self.has_arrow = True
+
+    def start(self):
+        table = self.table
+        i = table[7] | table[8] << 8 | table[9] << 16
+        while True:
+            op = table[i] & 7
+            if op == SNIFF:
+                scent = self.receive_scent()
+                if scent & 0b1000:
+                    # the table has one branch for the gold, whatever else is scented there
+                    scent = 0b1000
+                i = self._branch(i + 1, scent)
+            elif op == END:
+                return
+            elif op == STUCK:
+                raise RuntimeError("the robot has no way forward at " + str((self.x, self.y)))
+            else:
+                for _ in range((table[i] >> 3) + 1):
+                    self._do(op)
+                i += 1
+
+    def _branch(self, i, scent):
+        # the offset of the node to carry on with after scent, from the sniff table at i
+        table = self.table
+        mask = table[i] | table[i + 1] << 8
+        if not 0 <= scent < 16 or not mask >> scent & 1:
+            raise ValueError("no decision for scent %d at %d, %d" % (scent, self.x, self.y))
+        # skip the offsets of the lower scents
+        i += 2
+        for s in range(scent):
+            if mask >> s & 1:
+                i += 3
+        return table[i] | table[i + 1] << 8 | table[i + 2] << 16
+
+    def _do(self, op):
+        if op == FORWARD:
+            self.x += self.dx
+            self.y += self.dy
+            self.forward()
+        elif op == ROT_CW:
+            self.dx, self.dy = self.dy, -self.dx
+            self.rot_cw()
+        elif op == ROT_CCW:
+            self.dx, self.dy = -self.dy, self.dx
+            self.rot_ccw()
+        elif op == ROT_180:
+            self.dx, self.dy = -self.dx, -self.dy
+            self.rot_180()
+        else:
+            self.has_arrow = False
+            self.shoot()
+
+    def rot_180(self):
+        self.rot_cw()
+        self.rot_cw()
+
+    def rot_cw(self):
+        raise NotImplementedError("Must implement rot_cw in subclass")
+
+    def rot_ccw(self):
+        raise NotImplementedError("Must implement rot_ccw in subclass")
+
+    def receive_scent(self):
+        raise NotImplementedError("Must implement recieve_scent in subclass")
+
+    def shoot(self):
+        raise NotImplementedError("Must implement shoot in subclass")
+
+    def forward(self):
+        raise NotImplementedError("Must implement forward in subclass")
+
+
+def load(path):
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,146 @@
+"""
+team.py
+A Team runs several Robots in one world, sharing what they know: the robots are created on one
+board, and the team gives them one scents grid, so every scent any of them receives narrows the
+board for all of them.
+
+    board = Board(width=16, height=16)
+    team = Team([MyRobot(board=board) for _ in range(3)])
+    carrier = team.start()
+
+The team plays the mission out in the robots' time (FORWARD_COST, TURN_COST and TURN_180_COST per
+action, as the robots plan their routes with, and SNIFF_COST per scent), always moving on the
+robot that is free first. A free robot explores the best position (as Robot.get_explore_position
+ranks them) that no teammate is on its way to, and sniffs when it gets there, which is when the
+rest of the team learns the scent. If every position worth exploring is taken, the robot waits for
+the next scent; only a robot with no teammate on the way shoots the wumpus or takes a risk like a
+lone robot would. Once the gold is located, the robot that can bring it back to the start soonest
+(by distance, from where it is or is going) retrieves it, which ends the mission at makespan.
+
+With one robot, a Team makes the same moves as Robot.start. Robots do not block each other, so two
+of them may share a tile.
+"""
+
+import heapq
+
+
+class Team:
+
+    SNIFF_COST = 0
+    SHOOT_COST = 0
+
+    def __init__(self, robots):
+        """
+        robots the Robots to explore with, all created on the same board and not yet started
+        (without a TranspositionTable, which only follows the scents a robot receives itself)
+        """
+        self.robots = list(robots)
+        self.board = self.robots[0].board
+        self.scents = self.robots[0].scents
+        for robot in self.robots:
+            if robot.board is not self.board:
+                raise ValueError("the robots of a team must share one board")
+            if robot.table is not None:
+                raise ValueError("the robots of a team cannot use a TranspositionTable")
+            robot.scents = self.scents
+            robot.team = self
+            robot.rehash()
+            robot._perform = self._timed(robot, robot._perform)
+        # the time each robot has got to, and the tile each robot on its way to sniff is going to
+        self.clocks = [0] * len(self.robots)
+        self.claims = {}
+        self.carrier = None
+        self.makespan = None
+
+    def start(self):
+        """
+        explores until the gold is located, and has the robot that can soonest bring it back do so.
+        Returns that robot (whose clock, makespan, is the time the mission took)
+        """
+        board = self.board
+        robots = self.robots
+        # (time, index) of when each robot is free, or its scent arrives
+        events = [(0, i) for i in range(len(robots))]
+        waiting = []
+        try:
+            while board.gold_pos is None:
+                time, i = heapq.heappop(events)
+                robot = robots[i]
+                if i in self.claims:
+                    del self.claims[i]
+                    robot.sniff()
+                    robot._learn()
+                    # a new scent may tell waiting robots where to go
+                    for j in waiting:
+                        self.clocks[j] = time
+                        heapq.heappush(events, (time, j))
+                    waiting = []
+                    if board.gold_pos is not None:
+                        break
+                if robot.get_explore_position() is None and self.claims:
+                    # teammates are on their way to positions worth exploring
+                    waiting.append(i)
+                    continue
+                robot._approach()
+                self.claims[i] = (robot.x, robot.y)
+                self.clocks[i] += self.SNIFF_COST
+                heapq.heappush(events, (self.clocks[i], i))
+
+            self.carrier = self._choose_carrier(time)
+            self.carrier.retrieve_gold()
+            self.makespan = self.clocks[robots.index(self.carrier)]
+        finally:
+            for robot in robots:
+                robot._finish()
+        return self.carrier
+
+    def _choose_carrier(self, time):
+        # the robot that can soonest bring the gold back, guessing by distance (ties to the first)
+        gold = self.board.gold_pos
+        best = None
+        for i, robot in enumerate(self.robots):
+            self.clocks[i] = max(self.clocks[i], time)
+            distance = robot.distance((robot.x, robot.y), gold) + robot.distance(gold, robot.start_pos)
+            estimate = self.clocks[i] + distance * robot.FORWARD_COST
+            if best is None or estimate < best[0]:
+                best = (estimate, robot)
+        self.claims = {}
+        return best[1]
+
+    def explore_position(self, robot):
+        """
+        returns the best position for robot to explore (see Robot.get_explore_position) that no
+        teammate is on its way to, or None
+        """
+        robot._update_frontier()
+        claimed = set(pos for i, pos in self.claims.items() if self.robots[i] is not robot)
+        scores = robot._scores
+        best = None
+        for entry in robot._frontier:
+            score, _, x, y = entry
+            if scores[x * robot.height + y] == -score and (x, y) not in claimed:
+                if best is None or entry < best:
+                    best = entry
+        return None if best is None else best[2:]
+
+    def rescore(self, x, y):
+        """
+        tells every robot the scent at (x, y) has changed (see Robot._set_scent)
+        """
+        for robot in self.robots:
+            robot._rescore.add((x, y))
+            robot._deduction = None
+
+    def _timed(self, robot, perform):
+        # robot._perform, counting the time of each action on the robot's clock
+        i = self.robots.index(robot)
+        costs = (("forward", robot.FORWARD_COST), ("rot_cw", robot.TURN_COST), ("rot_ccw", robot.TURN_COST),
+                 ("rot_180", robot.TURN_180_COST), ("shoot", self.SHOOT_COST))
+
+        def timed(action):
+            for name, cost in costs:
+                if action == getattr(robot, name):
+                    self.clocks[i] += cost
+                    break
+            perform(action)
+        return timed
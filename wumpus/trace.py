@@ -0,0 +1,371 @@
+"""
+trace.py
+Compact binary traces of Robot missions, and a driver that replays them without the robot.
+
+Give a Robot a TraceRecorder and it records every scent it receives, every action it takes, every
+position it decides to move to and every tile its deductions narrow, each with the time in
+milliseconds since the mission started:
+
+    recorder = TraceRecorder()
+    robot = MyRobot(trace=recorder)
+    robot.start()
+    recorder.save("mission.trace")
+
+replay feeds the recorded scents to a fresh Robot, running the decision code at CPU speed, and
+checks that it makes the same decisions (a newer solver may not), raising TraceDiverged at the
+first record that differs:
+
+    replay(load("mission.trace"))
+
+    python trace.py show mission.trace
+    python trace.py replay mission.trace
+
+A trace is a 38 byte header followed by one 10 byte record per event (see HEADER and RECORD).
+The header keeps the robot's FORWARD_COST, TURN_COST and TURN_180_COST, which the replay uses
+to plan the same routes.
+Like wumpus.py, this runs on MicroPython, so a NanoBot can record its own missions.
+"""
+
+try:
+    import struct
+except ImportError:
+    import ustruct as struct
+
+try:
+    from time import ticks_ms, ticks_diff
+except ImportError:
+    from time import monotonic
+
+    def ticks_ms():
+        return int(monotonic() * 1000)
+
+    def ticks_diff(end, start):
+        return end - start
+
+try:
+    from wumpus.wumpus import DIRECTIONS, Board, Robot
+except ImportError:
+    from wumpus import DIRECTIONS, Board, Robot
+
+MAGIC = b"WTRC"
+VERSION = 1
+# magic, version, heading (index of the start direction in DIRECTIONS), width, height, start x, start y,
+# and the robot's FORWARD_COST, TURN_COST and TURN_180_COST
+HEADER = "<4sBBHHHHddd"
+# kind, x, y, value, milliseconds since the mission started
+RECORD = "<BHHBI"
+HEADER_SIZE = struct.calcsize(HEADER)
+RECORD_SIZE = struct.calcsize(RECORD)
+
+# record kinds, and what x, y and value hold for each:
+KNOWN = 0      # a tile the robot knew about before starting: its position and value
+PERCEPT = 1    # a scent: where it was received and the scent
+TARGET = 2     # a position move_to was asked to go to (value unused)
+FORWARD = 3    # actions: where the robot is and the heading it faces after the action
+ROT_CW = 4
+ROT_CCW = 5
+ROT_180 = 6
+SHOOT = 7
+DELTA = 8      # a tile the robot narrowed: its position and new value
+END = 9        # the end of the mission: where the robot is and its state (see States)
+
+KINDS = ("known", "percept", "target", "forward", "rot_cw", "rot_ccw", "rot_180", "shoot", "delta", "end")
+
+
+class TraceDiverged(Exception):
+    """
+    raised by replay when the robot's decisions stop matching the trace: index is the number of
+    the first record that differs, expected is that record (None past the end), actual what the
+    robot did instead (as records, without times)
+    """
+
+    def __init__(self, index, expected, actual):
+        self.index = index
+        self.expected = expected
+        self.actual = actual
+        super().__init__("record %d: expected %s, got %s" % (index, describe(expected),
+                                                             "nothing" if actual is None else describe(actual)))
+
+
+class Trace:
+    """
+    a recorded mission: the header fields, and records, a list of (kind, x, y, value, time)
+    """
+
+    def __init__(self, width, height, x, y, dx, dy, costs=(1, 0, 0), records=None):
+        self.width = width
+        self.height = height
+        self.x = x
+        self.y = y
+        self.dx = dx
+        self.dy = dy
+        # FORWARD_COST, TURN_COST and TURN_180_COST
+        self.costs = costs
+        self.records = records if records is not None else []
+
+    def __len__(self):
+        return len(self.records)
+
+    def to_bytes(self):
+        data = bytearray(struct.pack(HEADER, MAGIC, VERSION, DIRECTIONS.index((self.dx, self.dy)),
+                                     self.width, self.height, self.x, self.y, *self.costs))
+        for record in self.records:
+            data += struct.pack(RECORD, *record)
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER_SIZE or (len(data) - HEADER_SIZE) % RECORD_SIZE:
+            raise ValueError("not a mission trace")
+        header = struct.unpack(HEADER, data[:HEADER_SIZE])
+        magic, version, heading, width, height, x, y = header[:7]
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a mission trace")
+        dx, dy = DIRECTIONS[heading]
+        records = []
+        for offset in range(HEADER_SIZE, len(data), RECORD_SIZE):
+            records.append(struct.unpack(RECORD, data[offset:offset + RECORD_SIZE]))
+        return cls(width, height, x, y, dx, dy, header[7:], records)
+
+    def decisions(self):
+        """
+        returns the records without their times
+        """
+        return [record[:4] for record in self.records]
+
+
+def describe(record):
+    """
+    returns a readable form of a record (with or without its time)
+    """
+    if record is None:
+        return "the end of the trace"
+    kind, x, y, value = record[:4]
+    text = "%s at %d, %d" % (KINDS[kind], x, y)
+    if kind in (KNOWN, PERCEPT, DELTA, END):
+        text += " value %d" % value
+    elif kind != TARGET:
+        text += " facing %d, %d" % DIRECTIONS[value]
+    if len(record) > 4:
+        text = "%8d ms  %s" % (record[4], text)
+    return text
+
+
+class TraceRecorder:
+    """
+    records a Robot's mission into trace (a Trace, set up when the robot is created). Robot calls
+    the methods below as things happen; deltas are collected from board.changes whenever the next
+    record is made, so they follow the decision that led to them.
+    """
+
+    def __init__(self):
+        self.trace = None
+        self.started = 0
+        self._seen = 0
+
+    def start(self, robot):
+        self.trace = Trace(robot.width, robot.height, robot.x, robot.y, robot.dx, robot.dy,
+                           (robot.FORWARD_COST, robot.TURN_COST, robot.TURN_180_COST))
+        self.started = ticks_ms()
+        board = robot.board
+        for x in range(robot.width):
+            for y in range(robot.height):
+                if board[x][y] != 0b111:
+                    self._record(KNOWN, x, y, board[x][y])
+        self._seen = len(board.changes)
+
+    def _record(self, kind, x, y, value):
+        self.trace.records.append((kind, x, y, value, ticks_diff(ticks_ms(), self.started)))
+
+    def deltas(self, robot):
+        # records each tile changed since the last record once, with its value now
+        board = robot.board
+        changes = board.changes
+        if self._seen == len(changes):
+            return
+        group = []
+        tiles = set()
+        for x, y in changes[self._seen:]:
+            if (x, y) not in tiles:
+                tiles.add((x, y))
+                group.append((x, y, board[x][y]))
+        self._seen = len(changes)
+        self._record_deltas(group)
+
+    def _record_deltas(self, group):
+        for x, y, value in group:
+            self._record(DELTA, x, y, value)
+
+    def _action(self, robot, kind):
+        self.deltas(robot)
+        self._record(kind, robot.x, robot.y, DIRECTIONS.index((robot.dx, robot.dy)))
+
+    def percept(self, robot, scent):
+        self.deltas(robot)
+        self._record(PERCEPT, robot.x, robot.y, scent)
+
+    def target(self, robot, x, y):
+        self.deltas(robot)
+        self._record(TARGET, x, y, 0)
+
+    def forward(self, robot):
+        self._action(robot, FORWARD)
+
+    def rot_cw(self, robot):
+        self._action(robot, ROT_CW)
+
+    def rot_ccw(self, robot):
+        self._action(robot, ROT_CCW)
+
+    def rot_180(self, robot):
+        self._action(robot, ROT_180)
+
+    def shoot(self, robot):
+        self._action(robot, SHOOT)
+
+    def end(self, robot):
+        self.deltas(robot)
+        self._record(END, robot.x, robot.y, robot.state)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.trace.to_bytes())
+
+
+def load(path):
+    with open(path, "rb") as f:
+        return Trace.from_bytes(f.read())
+
+
+class _MissionOver(Exception):
+    # the original mission ended here (eg. the robot died, or its world gave up on it)
+    pass
+
+
+class _Checker(TraceRecorder):
+    # records the replayed mission, comparing each record with the original as it is made
+    def __init__(self, original):
+        super().__init__()
+        self.original = original
+        self.diverged = False
+
+    def _expected(self, kind):
+        index = len(self.trace.records)
+        records = self.original.records
+        expected = records[index] if index < len(records) else None
+        if expected is not None and expected[0] == END and kind != END:
+            raise _MissionOver()
+        return index, expected
+
+    def _diverge(self, index, expected, actual):
+        self.diverged = True
+        raise TraceDiverged(index, expected, actual)
+
+    def _record(self, kind, x, y, value):
+        index, expected = self._expected(kind)
+        if expected is None or tuple(expected[:4]) != (kind, x, y, value):
+            self._diverge(index, expected, (kind, x, y, value))
+        super()._record(kind, x, y, value)
+
+    def _record_deltas(self, group):
+        # boards may narrow tiles in any order, so each group only has to change the same tiles to the same values
+        index, expected = self._expected(DELTA)
+        records = self.original.records
+        end = index
+        while end < len(records) and records[end][0] == DELTA:
+            end += 1
+        original = [tuple(record[1:4]) for record in records[index:end]]
+        changed = set(group)
+        for tile in changed.difference(original):
+            self._diverge(index, expected, (DELTA,) + tile)
+        for n in range(index, end):
+            if original[n - index] not in changed:
+                self._diverge(n, records[n], None)
+        for x, y, value in original:
+            TraceRecorder._record(self, DELTA, x, y, value)
+
+    def end(self, robot):
+        # after a divergence the mission is no longer comparable
+        if not self.diverged:
+            super().end(robot)
+
+    def next_percept(self, robot):
+        # the scent the original mission received here
+        self.deltas(robot)
+        index, expected = self._expected(PERCEPT)
+        if expected is None or expected[0] != PERCEPT:
+            self._diverge(index, expected, (PERCEPT, robot.x, robot.y, 0))
+        return expected[3]
+
+
+class ReplayRobot(Robot):
+    """
+    a Robot whose scents come from a trace, and whose actions only move it on the board
+    """
+
+    def __init__(self, original, board=None, **kwargs):
+        # plan routes like the recorded robot
+        self.FORWARD_COST, self.TURN_COST, self.TURN_180_COST = original.costs
+        board = board or Board(width=original.width, height=original.height)
+        for kind, x, y, value, _ in original.records:
+            if kind == KNOWN:
+                board.restrict(x, y, value)
+        super().__init__(board=board, x=original.x, y=original.y, dx=original.dx, dy=original.dy,
+                         trace=_Checker(original), **kwargs)
+
+    def receive_scent(self):
+        return self.trace.next_percept(self)
+
+    def forward(self):
+        pass
+
+    def rot_cw(self):
+        pass
+
+    def rot_ccw(self):
+        pass
+
+    def shoot(self):
+        pass
+
+
+def replay(original, board=None, **kwargs):
+    """
+    runs the mission of the Trace original again with a ReplayRobot (on board, if given), raising
+    TraceDiverged if the robot decides anything differently. Returns the robot, whose trace holds
+    the replayed records with their new times.
+    """
+    robot = ReplayRobot(original, board, **kwargs)
+    try:
+        robot.start()
+    except TraceDiverged:
+        raise
+    except Exception:
+        # the mission stopped as the original did (anything else fails the END record)
+        pass
+    if len(robot.trace.trace) != len(original):
+        index = len(robot.trace.trace)
+        raise TraceDiverged(index, original.records[index], None)
+    return robot
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Show or replay a recorded mission trace.")
+    parser.add_argument("command", choices=["show", "replay"])
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    trace = load(args.path)
+    if args.command == "show":
+        print("%dx%d board, starting at %d, %d facing %d, %d" % (trace.width, trace.height, trace.x, trace.y,
+                                                               trace.dx, trace.dy))
+        for record in trace.records:
+            print(describe(record))
+    else:
+        start = time.perf_counter()
+        robot = replay(trace)
+        print("replayed %d records in %.1f ms (recorded mission took %d ms), no differences"
+              % (len(trace), (time.perf_counter() - start) * 1000, trace.records[-1][4] if trace.records else 0))
@@ -0,0 +1,103 @@
+"""
+world.py
+WorldRobot drives the wumpus Robot logic against an in-memory world, so missions can be run
+in process (in tests, benchmarks or batch.py) on boards of any size.
+
+A world is given as world[x][y] of Tile values (Tile.PIT, Tile.WUMPUS, Tile.GOLD or Tile.EMPTY)
+using the same coordinates as the Robot, ie. (0, 0) is the start in the lower left.
+"""
+
+import random
+
+try:
+    from wumpus.wumpus import Robot, Tile
+except ImportError:
+    from wumpus import Robot, Tile
+
+
+class RobotDied(Exception):
+    pass
+
+
+class WorldRobot(Robot):
+
+    # give up on missions that rotate forever (the robot spins when it decides a board is unsolvable)
+    # or keep sniffing without getting anywhere. Missions on large boards turn more, so the rotation
+    # limit grows with the board past MAX_ROTATIONS (see rotation_limit)
+    MAX_ROTATIONS = 10000
+    MAX_ROTATIONS_PER_TILE = 2
+    MAX_SNIFFS_PER_TILE = 4
+
+    def __init__(self, world, *args, **kwargs):
+        self.world = [list(col) for col in world]
+        kwargs.setdefault("width", len(world))
+        kwargs.setdefault("height", len(world[0]))
+        super().__init__(*args, **kwargs)
+        self.moves = 0
+        self.rotations = 0
+        self.shots = 0
+        self.sniffs = 0
+        self.has_gold = False
+
+    def receive_scent(self):
+        self.sniffs += 1
+        if self.sniffs > self.MAX_SNIFFS_PER_TILE * self.width * self.height:
+            raise RuntimeError("robot is stuck sniffing")
+        if self.world[self.x][self.y] & Tile.GOLD:
+            return 0b1000
+        scent = 0
+        for adj_x, adj_y in self.board.adjacent(self.x, self.y):
+            scent |= self.world[adj_x][adj_y]
+        return scent
+
+    def forward(self):
+        self.moves += 1
+        tile = self.world[self.x][self.y]
+        if tile & Tile.PIT:
+            raise RobotDied("fell into a pit at " + str((self.x, self.y)))
+        if tile & Tile.WUMPUS:
+            raise RobotDied("eaten by the wumpus at " + str((self.x, self.y)))
+        if tile & Tile.GOLD:
+            self.has_gold = True
+
+    def shoot(self):
+        self.shots += 1
+        x, y = self.x + self.dx, self.y + self.dy
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.world[x][y] &= ~Tile.WUMPUS
+
+    @classmethod
+    def rotation_limit(cls, width, height):
+        """
+        returns the most rotations a mission on a width x height board may make before giving up
+        """
+        return max(cls.MAX_ROTATIONS, cls.MAX_ROTATIONS_PER_TILE * width * height)
+
+    def rot_cw(self):
+        self.rotations += 1
+        if self.rotations > self.rotation_limit(self.width, self.height):
+            raise RuntimeError("robot is spinning in place")
+
+    def rot_ccw(self):
+        self.rot_cw()
+
+    @property
+    def succeeded(self):
+        return self.has_gold and (self.x, self.y) == self.start_pos
+
+
+def random_world(width, height, pits=0, seed=None):
+    """
+    returns a world[width][height] with gold, a wumpus, and the given number of pits
+    placed uniformly at random on distinct tiles other than the start (0, 0)
+    """
+    rng = random.Random(seed)
+    positions = [(x, y) for x in range(width) for y in range(height) if (x, y) != (0, 0)]
+    chosen = rng.sample(positions, 2 + pits)
+    world = [[Tile.EMPTY] * height for _ in range(width)]
+    gold, wumpus = chosen[0], chosen[1]
+    world[gold[0]][gold[1]] = Tile.GOLD
+    world[wumpus[0]][wumpus[1]] = Tile.WUMPUS
+    for x, y in chosen[2:]:
+        world[x][y] = Tile.PIT
+    return world
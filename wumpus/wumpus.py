@@ -15,9 +15,45 @@ implementation than the default which simply rotates cw twice.
 
 From there, you can call robot.start() to have the robot solve the Wumpus World.
 
+The board defaults to WIDTH x HEIGHT tiles, but each Board (and therefore each Robot) carries
+its own dimensions, so worlds of different sizes can be solved side by side, eg.
+
+    robot = MyRobot(width=32, height=32)
+
+Board keeps the tile possibilities in nested lists, and its eliminate only re-checks the scents
+next to what changed, which makes it the fastest backend per sniff at every size measured (see
+tests/bench_boards.py). BitBoard is a drop-in alternative that packs them into one integer per tile
+type and a byte per tile, for robots short of memory: a 256x256 BitBoard takes about an eighth of
+the memory of a Board, but each sniff takes several times longer to fold in on large boards:
+
+    robot = MyRobot(board=BitBoard(width=256, height=256))
+
+Where numpy is available, make_board(width, height, "numpy") gives a NumpyBoard (npboard.py)
+instead, whose whole-array kernels are fastest at folding in many scents at once.
+
+Robots solving many worlds can share a TranspositionTable, which remembers what eliminate and
+get_explore_position made of each knowledge state, so a state that comes up again is looked up:
+
+    table = TranspositionTable()
+    robot = MyRobot(table=table)
+
+world.py simulates a world in process (WorldRobot), and batch.py uses numpy to run the missions
+of many such worlds in lock step. oracle.py enumerates every world of a small board, telling
+the unsolvable ones from those the Robot fails by guessing wrong, and outcomes.py keeps its
+results in a memory mapped file. trace.py records a mission (robot = MyRobot(trace=TraceRecorder()))
+into a compact binary trace, and replays it without the robot to check the decisions come out the same.
+policy.py compiles every decision the Robot makes on a small board into a table, which PolicyRobot
+(policybot.py) plays without this module, for microcontrollers short of memory and time.
+LeanRobot (leanwumpus.py) makes the same decisions as Robot with the default costs on boards of up
+to 256 tiles, in buffers allocated up front, so it solves on MicroPython without allocating.
+team.py has several robots on one board explore a world together (Team), sharing every scent.
+
 If you would like to log the robot's actions, you can set log_actions to True in the Robot constructor,
 and this will produce a log.txt file with actions taken and knowledge at different stages in the solution which can 
-be useful for debugging.
+be useful for debugging. The log is buffered and only formatted when written out; pass a MissionLog as log_actions
+to choose the file, buffer size and when it is written:
+
+    robot = MyRobot(log_actions=MissionLog("mission.txt", capacity=64, policy=MissionLog.END))
 
 recieve_scent should return one of the following values:
 
@@ -29,6 +65,12 @@ recieve_scent should return one of the following values:
         0b0010 stench (could contain a wumpus)
         0b0100 glitter (could contain gold)
 
+Robots whose actions and scents take a while can subclass AsyncRobot (asyncrobot.py) instead, with
+the 5 methods as coroutines, and think (anything that does not need the coming scent) while they
+drive and wait for it:
+
+    asyncio.run(MyAsyncRobot().start())
+
 shoot is an event handle for when the robot decides to shoot an arrow. Depending on your implementation of the robot,
 this method may neeed do something like printing/logging a message, physically shooting an arrow, or reporting a message with bluetooth,
 and can do so in the shoot method.
@@ -39,20 +81,55 @@ forward should move the robot one block forward in the direction it is facing.
 
 """
 
+try:
+    import heapq
+except ImportError:
+    import uheapq as heapq
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ucollections import OrderedDict
+
+try:
+    from time import perf_counter_ns as _ticks
+
+    def _ticks_diff(end, start):
+        return end - start
+
+    # nanoseconds per tick
+    _TICK_NS = 1
+except ImportError:
+    from time import ticks_us as _ticks, ticks_diff as _ticks_diff
+    _TICK_NS = 1000
+
+# default board dimensions, each Board carries its own width and height
 WIDTH = 4
 HEIGHT = 4
 
 # Valid movement directions are one tile horizontally or vertically
 DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
 
-class Queue(list):
-    # Queue as a list for micropython support
+class Queue:
+    # fixed capacity ring buffer (micropython has no collections.deque with O(1) popleft on every port)
+    def __init__(self, capacity):
+        self.items = [None] * capacity
+        self.head = 0
+        self.size = 0
     def put(self, item):
-        self.append(item)
+        if self.size == len(self.items):
+            raise IndexError("put to a full Queue")
+        self.items[(self.head + self.size) % len(self.items)] = item
+        self.size += 1
     def get(self):
-        return self.pop(0)
+        if self.size == 0:
+            raise IndexError("get from an empty Queue")
+        item = self.items[self.head]
+        self.head = (self.head + 1) % len(self.items)
+        self.size -= 1
+        return item
     def empty(self):
-        return len(self) == 0
+        return self.size == 0
 
 class Tile:
     UNKNOWN = 0b111
@@ -71,112 +148,565 @@ class States:
     FINISHED = 3
 
     
-def adjacent_positions(x, y):
+class Adjacency:
+    """
+    The neighbours of every tile of a width x height board, computed once per board size (see
+    adjacency) and shared by every board of that size, so looking them up allocates nothing.
+    For the flat tile index t = x * height + y:
+
+        tiles[t]     the (x, y) pair of tile t
+        adjacent[t]  the (x, y) pairs of the tiles adjacent to tile t
+        indices[t]   the flat indices of the same tiles
+        steps[t]     the flat index of the tile one step in each of DIRECTIONS, or -1 off the board
+
+    adjacent and indices list the neighbours in DIRECTIONS order. Every table is a tuple of tuples,
+    so treat them as read only.
+
+    queue and field are scratch space for distance_field, so searches on boards of the same size
+    reuse them instead of allocating their own (touched is how much of queue the last search in
+    field used, which is what the next one has to clear). states does the same for the searches
+    over (tile, heading) in PathPlanner.route and route_to_any.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        tiles = []
+        for x in range(width):
+            for y in range(height):
+                tiles.append((x, y))
+        adjacent = []
+        indices = []
+        steps = []
+        for x in range(width):
+            for y in range(height):
+                step = []
+                for dx, dy in DIRECTIONS:
+                    if (0 <= x + dx < width) and (0 <= y + dy < height):
+                        step.append((x + dx) * height + y + dy)
+                    else:
+                        step.append(-1)
+                near = tuple(j for j in step if j >= 0)
+                steps.append(tuple(step))
+                indices.append(near)
+                adjacent.append(tuple(tiles[j] for j in near))
+        self.tiles = tuple(tiles)
+        self.adjacent = tuple(adjacent)
+        self.indices = tuple(indices)
+        self.steps = tuple(steps)
+        self.queue = [0] * (width * height)
+        self.field = [width * height] * (width * height)
+        self.touched = 0
+        self._states = None
+        self._reached = 0
+
+    def states(self):
+        """
+        returns (costs, parents, reached), indexed by the state tile * 4 + heading, for a search
+        over (tile, heading): costs is None and parents -1 for every state. Set reached[n] to
+        the nth state given a cost, and pass how many there were to done, so the next search
+        only has to clear those.
+        """
+        if self._states is None:
+            size = 4 * self.width * self.height
+            self._states = ([None] * size, [-1] * size, [0] * size)
+        costs, parents, reached = self._states
+        for n in range(self._reached):
+            state = reached[n]
+            costs[state] = None
+            parents[state] = -1
+        # until done says otherwise (eg. if the search is interrupted), clear every state next time
+        self._reached = len(reached)
+        return self._states
+
+    def done(self, count):
+        """
+        records that the search using states() gave count states a cost
+        """
+        self._reached = count
+
+_adjacency = {}
+
+def adjacency(width, height):
+    """
+    returns the Adjacency of a width x height board, building it the first time that size is asked for
     """
-    returns a list of (adjacent_x, adjacent_y) pairs that are valid and adjacent to (x, y)
+    table = _adjacency.get((width, height))
+    if table is None:
+        table = Adjacency(width, height)
+        _adjacency[(width, height)] = table
+    return table
+
+def adjacent_positions(x, y, width=WIDTH, height=HEIGHT):
     """
+    returns the (adjacent_x, adjacent_y) pairs that are valid and adjacent to (x, y)
+    on a board of the given dimensions, as a shared tuple from the board's Adjacency
+    """
+    if (0 <= x < width) and (0 <= y < height):
+        return adjacency(width, height).adjacent[x * height + y]
     adjacent = []
     for dx, dy in DIRECTIONS:
-        if (0 <= x + dx < WIDTH) and (0 <= y + dy < HEIGHT):
+        if (0 <= x + dx < width) and (0 <= y + dy < height):
             adjacent.append((x + dx, y + dy))
-    return adjacent
+    return tuple(adjacent)
 
-def shortest_path(start_x, start_y, end_x, end_y, board : list, avoid_danger=True):
+def distance_field(board, end_x, end_y, avoid_danger=True, start=None, scratch=False):
     """
-    given a board[WIDTH][HEIGHT] of Tile enum values,
-    this returns a list of the form [(dx1, dy1), (dx2, dy2), ...] if there is a path
-    from (start_x, start_y) to (end_x, end_y) on the board, which only passes through
-    empty tiles and only moves verticall or horizontally in each step (ie. one of dx or dy will
-    always be 0 in each pair).
-
-    returns [] if no path can be determined.
+    given a board[width][height] of Tile enum values, this returns costs, a flat list where
+    costs[x * height + y] is the number of moves on the shortest path from (x, y) to (end_x, end_y)
+    that only passes through empty tiles (the end tile itself may be dangerous).
 
-    Uses Dijikstra's shortest path algorithm
+    Tiles with no such path cost at least width * height: exactly width * height + 1 if the tile
+    is dangerous but next to the searched area, width * height if it was never reached.
 
+    If start is an (x, y) pair the search stops as soon as the cost of start is known.
+    With scratch, costs is the shared field of the board size's Adjacency, which is only valid
+    until the next search, so nothing is allocated.
+    Uses a breadth first search outward from the end position.
     """
-    if start_x >= WIDTH or end_x >= WIDTH or start_y >= HEIGHT or end_y >= HEIGHT:
-        return []
-    
-    costs = []
-    MAX_VALUE = WIDTH * HEIGHT  # no valid path can take this many moves
-    for x in range(WIDTH):
-        col = []
-        for j in range(HEIGHT):
-            col.append(MAX_VALUE)
-        costs.append(col)
+    width = len(board)
+    height = len(board[0])
+    MAX_VALUE = width * height  # no valid path can take this many moves
+    start_i = -1 if start is None else start[0] * height + start[1]
+    table = adjacency(width, height)
+    neighbours = table.indices
+    # every search queues each tile at most once, so the queue never wraps around
+    queue = table.queue
+    if table.touched:
+        # put back the tiles the last search in the scratch field reached (which were all queued)
+        field = table.field
+        for n in range(table.touched):
+            field[queue[n]] = MAX_VALUE
+        table.touched = 0
+    if scratch:
+        costs = table.field
+    else:
+        costs = [MAX_VALUE] * (width * height)
 
     # the end location has a cost of 0 to get to
-    costs[end_x][end_y] = 0
+    end = end_x * height + end_y
+    costs[end] = 0
+    queue[0] = end
 
     # initialize queue with tiles adjacent to end position
-    # invariant: only add valid coordinates to the queue
-    q = Queue()
-    for x, y in adjacent_positions(end_x, end_y):
-        q.put((x, y))
-        costs[x][y] = 1
-
-    while not q.empty():
-        x, y = q.get()
+    # invariant: only add valid coordinates to the queue, and each at most once
+    tail = 1
+    for j in neighbours[end]:
+        queue[tail] = j
+        tail += 1
+        costs[j] = 1
+
+    head = 1
+    while head < tail:
+        i = queue[head]
+        head += 1
 
         # do not consider path through potentially dangerous tile (Note empty = 0 and gold = 8)
-        if (board[x][y] & 0b011 != 0) and avoid_danger:
+        if (board[i // height][i % height] & 0b011 != 0) and avoid_danger:
             # set this cost to 1 more than max value so we don't try to consider it again
-            costs[x][y] = MAX_VALUE + 1
+            costs[i] = MAX_VALUE + 1
             continue
 
         # end early if we have already reached the start location
-        if x == start_x and y == start_y:
+        if i == start_i:
             break
 
-        for dx, dy in DIRECTIONS:
-            if not (0 <= x + dx < WIDTH) or not (0 <= y + dy < HEIGHT):
-                continue
-            if (costs[x + dx][y + dy] == MAX_VALUE):
+        cost = costs[i] + 1
+        for j in neighbours[i]:
+            if (costs[j] == MAX_VALUE):
                 # we have not considered that tile yet so it is one step more than this
-                q.put((x + dx, y + dy))
-                
-                costs[x + dx][y + dy] = costs[x][y] + 1
-            
+                queue[tail] = j
+                tail += 1
+                costs[j] = cost
+
+    if scratch:
+        table.touched = tail
+    return costs
 
+def path_from(costs, start_x, start_y, width, height):
+    """
+    given costs from distance_field, returns the directions [(dx1, dy1), (dx2, dy2), ...] to follow
+    from (start_x, start_y) to the end of the field, or [] if there is no path
+    """
     # no path if start location has path cost at least as high as max value
-    if costs[start_x][start_y] >= MAX_VALUE:
+    if costs[start_x * height + start_y] >= width * height:
         return []
     
     # path exists, so compute the directions it follows
-    x, y = start_x, start_y
+    steps = adjacency(width, height).steps
+    i = start_x * height + start_y
     path = []
-    while costs[x][y] > 0:
-        for dx, dy in DIRECTIONS:
-            if not (0 <= x + dx < WIDTH) or not (0 <= y + dy < HEIGHT):
-                continue
-            if costs[x + dx][y + dy] == costs[x][y] - 1:
-                path.append((dx, dy))
-                x += dx
-                y += dy
+    while costs[i] > 0:
+        for heading in range(4):
+            j = steps[i][heading]
+            if j >= 0 and costs[j] == costs[i] - 1:
+                path.append(DIRECTIONS[heading])
+                i = j
                 break
                 
     return path
 
+def shortest_path(start_x, start_y, end_x, end_y, board : list, avoid_danger=True):
+    """
+    given a board[width][height] of Tile enum values,
+    this returns a list of the form [(dx1, dy1), (dx2, dy2), ...] if there is a path
+    from (start_x, start_y) to (end_x, end_y) on the board, which only passes through
+    empty tiles and only moves verticall or horizontally in each step (ie. one of dx or dy will
+    always be 0 in each pair).
+
+    returns [] if no path can be determined.
+
+    Uses Dijikstra's shortest path algorithm (a breadth first search, since every move costs the same)
+
+    """
+    # dimensions come from the board itself, so plain nested lists work as well as Boards
+    width = len(board)
+    height = len(board[0])
+    if start_x >= width or end_x >= width or start_y >= height or end_y >= height:
+        return []
+    
+    costs = distance_field(board, end_x, end_y, avoid_danger, (start_x, start_y), scratch=True)
+    return path_from(costs, start_x, start_y, width, height)
+
+
+class PathPlanner:
+    """
+    Plans paths through safe tiles of a board like shortest_path, but keeps the distance fields
+    of the most recently used goals so repeated queries towards the same goal skip the search.
+    Most goals (like explore positions) are only asked for once, so path searches towards a new
+    goal only as far as the start, and keeps a whole field from the second query on (as for the
+    gold, the start, or the wumpus while working out where to shoot it from).
+
+    Tiles only ever become safer, so a cached field only goes stale when a tile that blocked it
+    (a dangerous tile next to the searched area) becomes safe. The planner finds these through
+    board.changes and drops just the fields they affect.
+
+    route also accounts for the direction the robot faces: forward_cost, turn_cost (90 degrees)
+    and turn_180_cost are the expected times of each action, and the route taking the least
+    total time is chosen. route_to_any does the same for several possible goals in one search.
+    """
+
+    def __init__(self, board, forward_cost=1, turn_cost=0, turn_180_cost=0, capacity=8):
+        self.board = board
+        self.forward_cost = forward_cost
+        # indexed by the number of quarter turns counter-clockwise (a quarter turn cw is 3)
+        self.turn_costs = (0, turn_cost, turn_180_cost, turn_cost)
+        self.capacity = capacity
+        self.fields = []  # [goal_index, costs] pairs, most recently used last
+        self.asked = []  # goals path has searched for once, most recent last
+        self._seen_changes = len(board.changes)
+
+    def _refresh(self):
+        # drop any field blocked by a tile that has since become safe
+        board = self.board
+        changes = board.changes
+        blocked = board.width * board.height + 1
+        while self._seen_changes < len(changes):
+            x, y = changes[self._seen_changes]
+            self._seen_changes += 1
+            if board[x][y] & 0b011 or not self.fields:
+                continue
+            i = x * board.height + y
+            self.fields = [field for field in self.fields if field[1][i] != blocked]
+
+    def distance_field(self, end_x, end_y):
+        """
+        returns the (cached) costs of distance_field for the goal (end_x, end_y) - treat as read only
+        """
+        costs = self._cached(end_x * self.board.height + end_y)
+        if costs is not None:
+            return costs
+        return self._keep(end_x, end_y)
+
+    def _cached(self, goal):
+        # the cached field of goal (moving it to most recently used), or None
+        self._refresh()
+        fields = self.fields
+        for n in range(len(fields)):
+            if fields[n][0] == goal:
+                field = fields[n]
+                if n != len(fields) - 1:
+                    del fields[n]
+                    fields.append(field)
+                return field[1]
+        return None
+
+    def _keep(self, end_x, end_y):
+        # searches the whole field of (end_x, end_y) and caches it
+        goal = end_x * self.board.height + end_y
+        costs = distance_field(self.board, end_x, end_y)
+        self.fields.append([goal, costs])
+        if len(self.fields) > self.capacity:
+            self.fields.pop(0)
+        return costs
+
+    def path(self, start_x, start_y, end_x, end_y):
+        """
+        same as shortest_path(start_x, start_y, end_x, end_y, board)
+        """
+        width = self.board.width
+        height = self.board.height
+        if not (0 <= start_x < width and 0 <= end_x < width and 0 <= start_y < height and 0 <= end_y < height):
+            return []
+        goal = end_x * height + end_y
+        costs = self._cached(goal)
+        if costs is None:
+            asked = self.asked
+            if goal in asked:
+                asked.remove(goal)
+                costs = self._keep(end_x, end_y)
+            else:
+                asked.append(goal)
+                if len(asked) > self.capacity:
+                    del asked[0]
+                costs = distance_field(self.board, end_x, end_y, start=(start_x, start_y), scratch=True)
+        return path_from(costs, start_x, start_y, width, height)
+
+    def route(self, start_x, start_y, dx, dy, end_x, end_y):
+        """
+        returns the path [(dx1, dy1), (dx2, dy2), ...] from (start_x, start_y) to (end_x, end_y)
+        that takes the least time for a robot facing (dx, dy), or [] if there is none.
+        Like path, only the end tile may be dangerous.
+
+        Searches over (x, y, heading) with A*, using the cached distance field to the end as the
+        heuristic (each remaining move costs at least forward_cost).
+        """
+        if not self.turn_costs[1] and not self.turn_costs[2]:
+            # turning is free, so any shortest path is fastest
+            return self.path(start_x, start_y, end_x, end_y)
+
+        width = self.board.width
+        height = self.board.height
+        if not (0 <= start_x < width and 0 <= end_x < width and 0 <= start_y < height and 0 <= end_y < height):
+            return []
+        field = self.distance_field(end_x, end_y)
+        max_value = width * height
+        start = start_x * height + start_y
+        goal = end_x * height + end_y
+        if start == goal or field[start] >= max_value:
+            return []
+
+        # states are tile * 4 + heading, where heading indexes DIRECTIONS
+        state = start * 4 + DIRECTIONS.index((dx, dy))
+        table = adjacency(width, height)
+        steps = table.steps
+        costs, parents, reached = table.states()
+        costs[state] = 0
+        reached[0] = state
+        count = 1
+        heap = [(field[start] * self.forward_cost, 0, state)]
+        while heap:
+            _, cost, state = heapq.heappop(heap)
+            if cost > costs[state]:
+                # already reached this state more cheaply
+                continue
+            tile = state >> 2
+            if tile == goal:
+                break
+            for heading in range(4):
+                next_tile = steps[tile][heading]
+                if next_tile < 0:
+                    continue
+                # tiles without a safe path to the end (including dangerous ones) are never useful
+                if field[next_tile] >= max_value:
+                    continue
+                next_state = next_tile * 4 + heading
+                next_cost = cost + self.turn_costs[(heading - (state & 3)) & 3] + self.forward_cost
+                known = costs[next_state]
+                if known is None or next_cost < known:
+                    if known is None:
+                        reached[count] = next_state
+                        count += 1
+                    costs[next_state] = next_cost
+                    parents[next_state] = state
+                    heapq.heappush(heap, (next_cost + field[next_tile] * self.forward_cost, next_cost, next_state))
+
+        table.done(count)
+        # the field guarantees the end is reachable, so state is now at the end
+        path = []
+        while parents[state] >= 0:
+            path.append(DIRECTIONS[state & 3])
+            state = parents[state]
+        path.reverse()
+        return path
+
+    def route_to_any(self, start_x, start_y, dx, dy, goals):
+        """
+        goals is a list of (x, y, face_dx, face_dy): tiles the robot may end on, each with the
+        direction it must then face (eg. towards a target to shoot).
+        returns (path, (x, y)) for the goal that a robot facing (dx, dy) reaches and turns to face
+        in the least time, or ([], None) if no goal is reachable. Like path, only the end tile may
+        be dangerous. Ties are broken by the fewest quarter turns, so with free turning the
+        nearest goal needing the fewest rotations is chosen.
+
+        A single Dijkstra search over (x, y, heading) from the start, stopping at the first goal.
+        """
+        board = self.board
+        width = board.width
+        height = board.height
+        if not (0 <= start_x < width and 0 <= start_y < height) or board[start_x][start_y] & 0b011:
+            return [], None
+        # goal tile -> headings the robot may finish in
+        finish = {}
+        for x, y, face_dx, face_dy in goals:
+            if 0 <= x < width and 0 <= y < height:
+                finish.setdefault(x * height + y, []).append(DIRECTIONS.index((face_dx, face_dy)))
+        if not finish:
+            return [], None
+
+        quarter_turns = (0, 1, 2, 1)
+        # states are tile * 4 + heading, where heading indexes DIRECTIONS.
+        # heap entries are (time, quarter turns, done, state) where done is 0 once the robot has
+        # turned to face the goal direction, so finished states pop before equal unfinished ones
+        state = (start_x * height + start_y) * 4 + DIRECTIONS.index((dx, dy))
+        table = adjacency(width, height)
+        steps = table.steps
+        costs, parents, reached = table.states()
+        costs[state] = (0, 0)
+        reached[0] = state
+        count = 1
+        heap = [(0, 0, 1, state)]
+        while heap:
+            cost, turns, unfinished, state = heapq.heappop(heap)
+            tile = state >> 2
+            if not unfinished:
+                table.done(count)
+                path = []
+                while parents[state] >= 0:
+                    path.append(DIRECTIONS[state & 3])
+                    state = parents[state]
+                path.reverse()
+                return path, (tile // height, tile % height)
+            if costs[state] < (cost, turns):
+                # already reached this state more cheaply
+                continue
+            for face in finish.get(tile, ()):
+                delta = (face - (state & 3)) & 3
+                heapq.heappush(heap, (cost + self.turn_costs[delta], turns + quarter_turns[delta], 0, state))
+            # only the end tile may be dangerous, so never move on from one
+            if board[tile // height][tile % height] & 0b011:
+                continue
+            for heading in range(4):
+                next_tile = steps[tile][heading]
+                if next_tile < 0:
+                    continue
+                next_state = next_tile * 4 + heading
+                delta = (heading - (state & 3)) & 3
+                next_cost = (cost + self.turn_costs[delta] + self.forward_cost, turns + quarter_turns[delta])
+                known = costs[next_state]
+                if known is None or next_cost < known:
+                    if known is None:
+                        reached[count] = next_state
+                        count += 1
+                    costs[next_state] = next_cost
+                    parents[next_state] = state
+                    heapq.heappush(heap, (next_cost[0], next_cost[1], 1, next_state))
+        table.done(count)
+        return [], None
+
+    def cost(self, path, dx, dy):
+        """
+        returns the expected time for a robot facing (dx, dy) to follow path
+        """
+        total = 0
+        heading = DIRECTIONS.index((dx, dy))
+        for step in path:
+            next_heading = DIRECTIONS.index(step)
+            total += self.turn_costs[(next_heading - heading) & 3] + self.forward_cost
+            heading = next_heading
+        return total
+
 
 class Board(list):
+    """
+    board[x][y] holds the possible contents of tile (x, y) as an or of Tile values.
+
+    Possibilities are only ever narrowed, and every narrowing made through restrict (which reduce,
+    eliminate and the Robot all use) is appended to changes as an (x, y) pair. eliminate uses this
+    to only revisit the scents next to tiles that changed since it last ran, so its cost per step
+    depends on how much was learned rather than on the size of the board. Tiles assigned directly
+    with board[x][y] = value are not tracked.
+    """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, width=WIDTH, height=HEIGHT, **kwargs):
+        """
+        Board() creates a width x height board of unknown tiles,
+        Board(columns) wraps existing columns and takes its dimensions from them
+        """
         super().__init__(*args, **kwargs)
 
         self.gold_pos = None
         self.wumpus_pos = None
+        self.changes = []
+
+        # propagation state, set up from the tiles the first time reduce or eliminate runs
+        self._tracking = False
+        self._swept = False
+        self._counts = {}
+        self._candidates = {}
+        self._queue = []
+        self._queued = None
+        self._seen_changes = 0
 
         # initialize board if not done already
         if len(self) > 0:
+            self.width = len(self)
+            self.height = len(self[0])
+            self._adjacency = adjacency(self.width, self.height)
             return
         
-        for x in range(WIDTH):
+        self.width = width
+        self.height = height
+        self._adjacency = adjacency(width, height)
+        for x in range(width):
             col = []
-            for y in range(HEIGHT):
+            for y in range(height):
                 col.append(Tile.UNKNOWN)
             self.append(col)
 
-        
+    def adjacent(self, x, y):
+        """
+        returns the positions adjacent to (x, y) on this board (a shared tuple, see Adjacency)
+        """
+        return self._adjacency.adjacent[x * self.height + y]
+
+    def restrict(self, x, y, mask):
+        """
+        narrows the possibilities of tile (x, y) to those in mask, recording the change
+        returns True if the tile changed
+        """
+        old = self[x][y]
+        new = old & mask
+        if new == old:
+            return False
+        self[x][y] = new
+        self.changes.append(self._adjacency.tiles[x * self.height + y])
+        if self._tracking:
+            for tile in (Tile.GOLD, Tile.WUMPUS):
+                if old & tile and not new & tile:
+                    self._counts[tile] -= 1
+        return True
+
+    def _track(self):
+        # start incremental propagation by finding the tiles that could hold the gold or wumpus
+        self._tracking = True
+        # which tiles are in the queue, by flat index
+        self._queued = bytearray(self.width * self.height)
+        for tile in (Tile.GOLD, Tile.WUMPUS):
+            self._candidates[tile] = [(x, y) for x in range(self.width) for y in range(self.height) if self[x][y] & tile]
+            self._counts[tile] = len(self._candidates[tile])
+
+    def _enqueue(self, x, y):
+        i = x * self.height + y
+        if not self._queued[i]:
+            self._queued[i] = 1
+            self._queue.append(self._adjacency.tiles[i])
+
+    def _find(self, tile):
+        # returns the first position that could still hold tile (gold or wumpus), dropping stale candidates
+        candidates = [pos for pos in self._candidates[tile] if self[pos[0]][pos[1]] & tile]
+        self._candidates[tile] = candidates
+        return candidates[0] if candidates else None
 
     def reduce(self, scent, x, y):
         """
@@ -186,24 +716,32 @@ class Board(list):
         Note: when 0b1000 is sensed, this means the current tile contains gold and says nothing
         about surrounding tiles.
         """
+        if not self._tracking:
+            self._track()
+        # the new scent itself needs to be checked by the next eliminate
+        self._enqueue(x, y)
+
         if (scent & 0b1000 != 0):
-            self[x][y] = Tile.GOLD
+            self.restrict(x, y, Tile.GOLD)
             self.gold_pos = (x, y)
             return
         
-        for x_adj, y_adj in adjacent_positions(x, y):
-            self[x_adj][y_adj] &= scent
+        for x_adj, y_adj in self.adjacent(x, y):
+            self.restrict(x_adj, y_adj, scent)
         
         # since there is just 1 gold and 1 wumpus, we can further reduce from these scents
-        if scent & Tile.GOLD or scent & Tile.WUMPUS:
-            # create a mask that is zero only in gold and/or wumpus location respectively if they are in the scent
-            mask = ~(scent & (Tile.GOLD | Tile.WUMPUS))
-            
-            # apply mask to every location except for the 4 adjacent to where the scent is
-            for _x in range(WIDTH):
-                for _y in range(HEIGHT):
-                    if abs(x - _x) + abs(y - _y) != 1:
-                        self[_x][_y] &= mask
+        for tile in (Tile.GOLD, Tile.WUMPUS):
+            if not scent & tile:
+                continue
+            # clear tile from every location except for the 4 adjacent to where the scent is
+            # (only the tiles that could still hold it need to be visited)
+            adjacent = []
+            for _x, _y in self._candidates[tile]:
+                if abs(x - _x) + abs(y - _y) != 1:
+                    self.restrict(_x, _y, ~tile)
+                elif self[_x][_y] & tile:
+                    adjacent.append((_x, _y))
+            self._candidates[tile] = adjacent
             
     def deduce(self, x, y, scents):
         """
@@ -213,25 +751,26 @@ class Board(list):
         """
         # intuition: consider adjacent positions, and if any of them sensed something that is definitely 
         # not at any of its other adjacent positions, then it must be at the current position
-        for _x, _y in adjacent_positions(x, y):
+        for _x, _y in self.adjacent(x, y):
             if scents[_x][_y] == 0:
                 # definitely safe if adjacent tile had no scent
                 return Tile.EMPTY
             if scents[_x][_y] & Tile.UNSNIFFED:
                 continue
 
-            for tile in [Tile.PIT, Tile.WUMPUS, Tile.GOLD]:
+            for tile in (Tile.PIT, Tile.WUMPUS, Tile.GOLD):
                 if (scents[_x][_y] & tile) == 0:
                     # skip if this tile type was not scented here
                     continue
-                possible_pos = []
+                possible = False
 
-                for __x, __y in adjacent_positions(_x, _y):
-                    # add neighbors that are not the current tile
-                    if self[__x][__y] & tile and (__x, __y) != (x, y):
-                        possible_pos.append((__x, __y))
+                for __x, __y in self.adjacent(_x, _y):
+                    # look for neighbors other than the current tile that could be the source
+                    if self[__x][__y] & tile and (__x != x or __y != y):
+                        possible = True
+                        break
 
-                if len(possible_pos) == 0:
+                if not possible:
                     # no other options for where that scent could be coming from
                     return tile
         return Tile.UNKNOWN
@@ -241,83 +780,789 @@ class Board(list):
         For each board location, this checks to see if current information about the board
         state, combined with past scent information, can be used to deduce what the tile contains 
         through elimination
+
+        Deductions are repeated until nothing changes, so the result does not depend on the order
+        in which tiles are visited (and matches the whole-board BitBoard.eliminate).
+        Only scents that are new or next to a tile that changed since the last call are re-checked.
         """
-        def get_unique_pos(tile):
-            # returns the (x, y) pair if there is only (exactly) one possible location for the tile on the board
-            possible_pos = []
-            for x in range(WIDTH):
-                if len(possible_pos) > 1:
-                        break
-                for y in range(HEIGHT):
-                    if self[x][y] & tile:
-                        possible_pos.append((x, y))
-            if len(possible_pos) == 1:
-                return possible_pos[0]
-            return None
+        if not self._tracking:
+            self._track()
+        if not self._swept:
+            # the first call checks every scent, later calls only what changed
+            self._swept = True
+            self._seen_changes = len(self.changes)
+            for x in range(self.width):
+                for y in range(self.height):
+                    self._enqueue(x, y)
+
+        while True:
+            # re-check every sniffed tile next to a tile that changed
+            while self._seen_changes < len(self.changes):
+                x, y = self.changes[self._seen_changes]
+                self._seen_changes += 1
+                for adj_x, adj_y in self.adjacent(x, y):
+                    self._enqueue(adj_x, adj_y)
+
+            if not self._queue:
+                # if we do not know where the wumpus or gold is, see if there is only option for where it can be
+                # (tiles are only ever narrowed, so that contradictory knowledge cannot make this loop forever)
+                if self.gold_pos is None and self._counts[Tile.GOLD] == 1:
+                    self.gold_pos = self._find(Tile.GOLD)
+                if self.gold_pos is not None:
+                    self.restrict(self.gold_pos[0], self.gold_pos[1], Tile.GOLD)
+                if self.wumpus_pos is None and self._counts[Tile.WUMPUS] == 1:
+                    self.wumpus_pos = self._find(Tile.WUMPUS)
+                if self.wumpus_pos is not None:
+                    self.restrict(self.wumpus_pos[0], self.wumpus_pos[1], Tile.WUMPUS)
+                if self._seen_changes == len(self.changes):
+                    break
+                continue
 
-        # use scents to eliminate if adjacent tiles to a scent have been determined
-        # intuition: if a tile had the scent of a pit but three adjacent tiles are known to not be pits, then make
-        # the one possible title a guaranteed pit (same for wumpus and gold)
-        # do this for every tile with a nonzero scent
-        for x in range(WIDTH):
-            for y in range(HEIGHT):
-                if scents[x][y] == Tile.UNSNIFFED:
+            x, y = self._queue.pop()
+            self._queued[x * self.height + y] = 0
+            if scents[x][y] == Tile.UNSNIFFED:
+                continue
+
+            # use scents to eliminate if adjacent tiles to a scent have been determined
+            # intuition: if a tile had the scent of a pit but three adjacent tiles are known to not be pits, then make
+            # the one possible title a guaranteed pit (same for wumpus and gold)
+            for tile in (Tile.PIT, Tile.GOLD, Tile.WUMPUS):
+                if (scents[x][y] & tile) == 0:
+                    # did not sense this tile type here
                     continue
 
-                for tile in [Tile.PIT, Tile.GOLD, Tile.WUMPUS]:
-                    if (scents[x][y] & tile) == 0:
-                        # did not sense this tile type here
-                        continue
-
-                    possible_pos = []
-                    for _x, _y in adjacent_positions(x, y):
-                        if self[_x][_y] & tile:
-                            possible_pos.append((_x, _y))
-
-                    if len(possible_pos) == 1:
-                        _x, _y = possible_pos[0]
-                        self[_x][_y] = tile
-
-        # if we do not know where the wumpus or gold is, see if there is only option for where it can be
-        self.gold_pos = self.gold_pos or get_unique_pos(Tile.GOLD)
-        if self.gold_pos is not None:
-            self[self.gold_pos[0]][self.gold_pos[1]] = Tile.GOLD
-        self.wumpus_pos = self.wumpus_pos or get_unique_pos(Tile.WUMPUS)
-        if self.wumpus_pos is not None:
-            self[self.wumpus_pos[0]][self.wumpus_pos[1]] = Tile.WUMPUS
+                possible = 0
+                for pos in self.adjacent(x, y):
+                    if self[pos[0]][pos[1]] & tile:
+                        possible += 1
+                        found = pos
+
+                if possible == 1:
+                    self.restrict(found[0], found[1], tile)
+
+    def new_scents(self):
+        """
+        returns a scents[width][height] grid matching this board, with every tile unsniffed
+        """
+        scents = []
+        for x in range(self.width):
+            col = []
+            for y in range(self.height):
+                col.append(Tile.UNSNIFFED)
+            scents.append(col)
+        return scents
     
     def __str__(self):
         """
         string of board with (0, 0) in lower left
         """
         s = ""
-        for y in range(HEIGHT - 1, -1, -1):
-            for x in range(WIDTH):
+        for y in range(self.height - 1, -1, -1):
+            for x in range(self.width):
                 s += str(self[x][y]) + " "
             s += "\n"
         return s
-    
+
+
+def _set_bits(bits):
+    """
+    yields the index of every set bit in the (possibly very large) non-negative integer bits
+    """
+    # scanning the binary string keeps the search for each bit in C, even for huge boards
+    s = bin(bits)
+    last = len(s) - 1
+    pos = s.find("1", 2)
+    while pos != -1:
+        yield last - pos
+        pos = s.find("1", pos + 1)
+
+
+class _Column:
+    """
+    view of column x of a packed grid (BitBoard or BitScents), so that grid[x][y] can be read
+    and assigned exactly like the nested lists of Board
+    """
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.grid.height:
+            raise IndexError("column index out of range")
+        return self.grid.cells[self.x * self.grid.stride + y]
+
+    def __setitem__(self, y, value):
+        if not 0 <= y < self.grid.height:
+            raise IndexError("column index out of range")
+        self.grid.set(self.x, y, value)
+
+    def __len__(self):
+        return self.grid.height
+
+    def __iter__(self):
+        for y in range(self.grid.height):
+            yield self[y]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class _PackedGrid:
+    """
+    shared indexing for grids stored one byte per tile in cells, where tile (x, y) is index
+    x * (height + 1) + y (the spare index at the top of each column is never a tile)
+    """
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.width:
+            raise IndexError("board index out of range")
+        return _Column(self, x)
+
+    def __len__(self):
+        return self.width
+
+    def __iter__(self):
+        for x in range(self.width):
+            yield self[x]
+
+    def __eq__(self, other):
+        return [list(col) for col in self] == [list(col) for col in other]
+
+    def __repr__(self):
+        return repr([list(col) for col in self])
+
+
+class BitScents(_PackedGrid):
+    """
+    scents grid used with a BitBoard. Besides the scent of every tile, this keeps one bit plane
+    per tile type (pit, wumpus, gold) with a bit set at every sniffed tile that sensed that type.
+    """
+
+    def __init__(self, width=WIDTH, height=HEIGHT):
+        self.width = width
+        self.height = height
+        self.stride = height + 1
+        self.cells = bytearray([Tile.UNSNIFFED] * (width * self.stride))
+        self.sniffed = 0
+        self.planes = [0, 0, 0]
+
+    @classmethod
+    def from_grid(cls, grid):
+        """
+        builds BitScents from a scents[width][height] nested list
+        """
+        scents = cls(len(grid), len(grid[0]))
+        for x in range(scents.width):
+            for y in range(scents.height):
+                scents.set(x, y, grid[x][y])
+        return scents
+
+    def set(self, x, y, scent):
+        i = x * self.stride + y
+        bit = 1 << i
+        self.cells[i] = scent
+        sniffed = not (scent & Tile.UNSNIFFED)
+        if sniffed:
+            self.sniffed |= bit
+        else:
+            self.sniffed &= ~bit
+        for t in range(3):
+            if sniffed and scent & (1 << t):
+                self.planes[t] |= bit
+            else:
+                self.planes[t] &= ~bit
+
+
+class BitBoard(_PackedGrid):
+    """
+    Board backend that keeps one packed integer bitboard per hypothesis: planes[0] has a bit set
+    for every tile that could be a pit, planes[1] for the wumpus and planes[2] for gold
+    (bit t of a Tile value is plane t). reduce and eliminate then work on the whole board at once
+    with a few shifts and masks instead of looping over tiles.
+
+    That keeps the board small, but eliminate sweeps every tile on each call, where
+    Board.eliminate only re-checks the scents next to what changed, so BitBoard is slower per
+    sniff than Board at every size tests/bench_boards.py measures (over 5 times at 256x256).
+    Use it to save memory, not time.
+
+    cells mirrors the planes one byte per tile so that board[x][y] reads stay cheap, and
+    BitBoard can be used anywhere a Board is (including the changes log, see Board).
+    """
+
+    def __init__(self, columns=None, width=WIDTH, height=HEIGHT):
+        """
+        BitBoard() creates a width x height board of unknown tiles,
+        BitBoard(columns) copies the tiles of a Board or nested list
+        """
+        if columns:
+            width = len(columns)
+            height = len(columns[0])
+        self.width = width
+        self.height = height
+        self.stride = height + 1
+        self._adjacency = adjacency(width, height)
+        self.gold_pos = None
+        self.wumpus_pos = None
+        self.changes = []
+
+        # full has a bit set for every tile on the board
+        column = (1 << height) - 1
+        self.full = 0
+        for x in range(width):
+            self.full |= column << (x * self.stride)
+
+        self.planes = [self.full, self.full, self.full]
+        self.cells = bytearray(width * self.stride)
+        for i in _set_bits(self.full):
+            self.cells[i] = Tile.UNKNOWN
+
+        if columns:
+            for x in range(width):
+                for y in range(height):
+                    self.set(x, y, columns[x][y])
+
+    def adjacent(self, x, y):
+        """
+        returns the positions adjacent to (x, y) on this board (a shared tuple, see Adjacency)
+        """
+        return self._adjacency.adjacent[x * self.height + y]
+
+    def restrict(self, x, y, mask):
+        """
+        narrows the possibilities of tile (x, y) to those in mask, recording the change
+        returns True if the tile changed
+        """
+        old = self.cells[x * self.stride + y]
+        if old & mask == old:
+            return False
+        self.set(x, y, old & mask)
+        self.changes.append(self._adjacency.tiles[x * self.height + y])
+        return True
+
+    def set(self, x, y, value):
+        """
+        sets the possibilities of tile (x, y) to value (without recording a change)
+        """
+        i = x * self.stride + y
+        bit = 1 << i
+        self.cells[i] = value & Tile.UNKNOWN
+        for t in range(3):
+            if value & (1 << t):
+                self.planes[t] |= bit
+            else:
+                self.planes[t] &= ~bit
+
+    def _neighbours(self, bits):
+        # every tile adjacent to a set bit (the spare bit in each column stops carries between columns)
+        s = self.stride
+        return ((bits << 1) | (bits >> 1) | (bits << s) | (bits >> s)) & self.full
+
+    def _update(self, planes):
+        # replaces the planes, flipping the matching bit of cells for each tile that changed
+        changed = 0
+        for t in range(3):
+            diff = self.planes[t] ^ planes[t]
+            changed |= diff
+            for i in _set_bits(diff):
+                self.cells[i] ^= 1 << t
+        self.planes = planes
+        s = self.stride
+        tiles = self._adjacency.tiles
+        for i in _set_bits(changed):
+            # i is x * stride + y, so i - x is the flat index x * height + y
+            self.changes.append(tiles[i - i // s])
+
+    def reduce(self, scent, x, y):
+        """
+        same as Board.reduce, but masks the whole board at once
+        """
+        if (scent & 0b1000 != 0):
+            self.restrict(x, y, Tile.GOLD)
+            self.gold_pos = (x, y)
+            return
+
+        near = self._neighbours(1 << (x * self.stride + y))
+        planes = self.planes[:]
+        for t in range(3):
+            if not scent & (1 << t):
+                planes[t] &= ~near
+
+        # since there is just 1 gold and 1 wumpus, a scent of either means it is one of the 4 adjacent tiles
+        for t in (1, 2):
+            if scent & (1 << t):
+                planes[t] &= near
+        self._update(planes)
+
+    # deduce only inspects a few tiles, so the Board version works unchanged through board[x][y]
+    deduce = Board.deduce
+
+    def eliminate(self, scents):
+        """
+        same as Board.eliminate (repeating until nothing changes), but each round finds every
+        scent with exactly one possible source with shifts of the whole board
+
+        scents may be BitScents (from new_scents) or a scents[width][height] nested list
+        """
+        if not isinstance(scents, BitScents):
+            scents = BitScents.from_grid(scents)
+        s = self.stride
+        planes = self.planes[:]
+
+        changed = True
+        while changed:
+            changed = False
+            for t in range(3):
+                if not scents.planes[t]:
+                    continue
+                possible = planes[t]
+                # neighbours of each tile in every direction that could hold this tile type
+                up = possible >> 1
+                down = possible << 1
+                right = possible >> s
+                left = possible << s
+                at_least_two = (up & down) | (right & left) | ((up | down) & (right | left))
+                sources = scents.planes[t] & (up | down | right | left) & ~at_least_two
+                if not sources:
+                    continue
+                # the only possible neighbour of each of those scents must be this tile type
+                forced = self._neighbours(sources) & possible
+                for u in range(3):
+                    if u != t and planes[u] & forced:
+                        planes[u] &= ~forced
+                        changed = True
+
+            # if we do not know where the wumpus or gold is, see if there is only option for where it can be
+            for t, attr in ((2, "gold_pos"), (1, "wumpus_pos")):
+                possible = planes[t]
+                pos = getattr(self, attr)
+                if pos is None and possible and possible & (possible - 1) == 0:
+                    i = possible.bit_length() - 1
+                    pos = (i // s, i % s)
+                    setattr(self, attr, pos)
+                if pos is None:
+                    continue
+                bit = 1 << (pos[0] * s + pos[1])
+                for u in range(3):
+                    if u != t and planes[u] & bit:
+                        planes[u] &= ~bit
+                        changed = True
+
+        self._update(planes)
+
+    def new_scents(self):
+        """
+        returns BitScents matching this board, with every tile unsniffed
+        """
+        return BitScents(self.width, self.height)
+
+    __str__ = Board.__str__
+
+
+def make_board(width=WIDTH, height=HEIGHT, backend="list"):
+    """
+    returns a width x height board of unknown tiles using the given backend:
+    "list" (Board), "bits" (BitBoard) or "numpy" (NumpyBoard from npboard.py, which needs numpy
+    and so is only imported when asked for; it is not available on micropython)
+    """
+    if backend == "list":
+        return Board(width=width, height=height)
+    if backend == "bits":
+        return BitBoard(width=width, height=height)
+    if backend == "numpy":
+        try:
+            from wumpus.npboard import NumpyBoard
+        except ImportError:
+            from npboard import NumpyBoard
+        return NumpyBoard(width=width, height=height)
+    raise ValueError("unknown board backend " + repr(backend))
+
+
+MASK64 = (1 << 64) - 1
+
+
+def zobrist_keys(count, seed=0x9E3779B97F4A7C15):
+    """
+    returns count pseudo random 64 bit keys (xorshift64, so they are the same on every platform)
+    """
+    keys = []
+    state = seed
+    for _ in range(count):
+        state ^= (state << 13) & MASK64
+        state ^= state >> 7
+        state ^= (state << 17) & MASK64
+        keys.append(state)
+    return keys
+
+
+class Deduction:
+    """
+    what a Robot deduced from one knowledge state: the tiles eliminate narrowed (as (x, y, value)),
+    the gold and wumpus positions it ended with, and once asked for, the explore position chosen next
+    """
+
+    def __init__(self, changes, gold_pos, wumpus_pos):
+        self.changes = changes
+        self.gold_pos = gold_pos
+        self.wumpus_pos = wumpus_pos
+        self.explored = False
+        self.explore_pos = None
+
+
+class TranspositionTable:
+    """
+    Bounded LRU map from a Robot's knowledge state to its Deduction, so a state that comes up again
+    (in another world, or for another robot sharing the table) skips eliminate and
+    get_explore_position:
+
+        table = TranspositionTable()
+        for world in worlds:
+            WorldRobot(world, table=table).start()
+        table.hits, table.misses
+
+    A state is the board and scents, hashed incrementally by the Robot with Zobrist keys (an xor of
+    one key per tile and value), along with the board size, start position and the gold and wumpus
+    positions the board already knows. Different states share a 64 bit hash with a probability of
+    about n * n / 2**65 among n states, which is taken as never.
+    """
+
+    # keys per tile, for each of its 8 possible board values and 32 scents
+    BOARD_VALUES = 8
+    SCENT_VALUES = 32
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._keys = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def keys(self, width, height):
+        """
+        returns the Zobrist keys of a width x height board: the key of value v on tile t (x * height + y)
+        is keys[t * BOARD_VALUES + v] for the board and keys[offset + t * SCENT_VALUES + v] for scents,
+        where offset is width * height * BOARD_VALUES
+        """
+        size = width * height
+        if size not in self._keys:
+            self._keys[size] = zobrist_keys(size * (self.BOARD_VALUES + self.SCENT_VALUES))
+        return self._keys[size]
+
+    def get(self, key):
+        """
+        returns the Deduction of key, making it the most recently used, or None
+        """
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries[key] = entry
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        while len(self.entries) > self.capacity:
+            # the oldest entry comes first
+            del self.entries[next(iter(self.entries))]
+            self.evictions += 1
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def __str__(self):
+        return "%d hits, %d misses (%.1f%% hit rate), %d of %d entries used, %d evicted" % (
+            self.hits, self.misses, 100 * self.hit_rate(), len(self.entries), self.capacity, self.evictions)
+
+
+class MissionLog:
+    """
+    The log a Robot writes with log_actions. Messages are kept in a ring buffer of capacity entries
+    as a format string and its arguments, and only formatted (message % args) when the buffer is
+    written to path, so logging a message costs about as much as appending to a list.
+
+    log_board records what is known of the board without formatting it either: the first record of
+    a board copies its tiles, later ones only the tiles changed since (see Board.changes), and the
+    board is drawn from these when written out.
+
+    policy decides when the buffer is written (besides flush, which Robot.start calls at the end of
+    every mission):
+        ALWAYS  after every message, like a plain log file
+        FULL    whenever the buffer fills up (the default), so nothing is lost but the file is only
+                opened once every capacity messages
+        END     only when flushed; once the buffer is full the oldest messages are dropped, so
+                the file holds the last capacity messages of the mission
+    """
+
+    ALWAYS = 0
+    FULL = 1
+    END = 2
+
+    def __init__(self, path="log.txt", capacity=256, policy=FULL):
+        self.path = path
+        self.capacity = capacity
+        self.policy = policy
+        # ring buffer of (message, args, tiles) entries, where tiles is None, a copy of a board or
+        # the (x, y, value) of the tiles changed since the last board record
+        self.entries = [None] * capacity
+        self.first = 0
+        self.size = 0
+        self.dropped = 0
+        # the board being recorded, how much of its changes log is recorded, and the board as of
+        # the oldest buffered entry (which the records are applied to as they are written or dropped)
+        self._source = None
+        self._seen = 0
+        self._board = None
+        # start a new file
+        with open(path, "w") as f:
+            f.write("")
+
+    def log(self, message, *args):
+        self._add(message, args, None)
+
+    def log_board(self, message, board):
+        """
+        records message followed by the current knowledge of board (drawn like str(board))
+        """
+        if board is not self._source:
+            self._source = board
+            tiles = Board([[int(value) for value in col] for col in board])
+        else:
+            tiles = [(x, y, board[x][y]) for x, y in board.changes[self._seen:]]
+        self._seen = len(board.changes)
+        self._add(message, (), tiles)
+
+    def _add(self, message, args, tiles):
+        if self.size == self.capacity:
+            if self.policy == MissionLog.END:
+                self._apply(self.entries[self.first][2])
+                self.entries[self.first] = None
+                self.first = (self.first + 1) % self.capacity
+                self.size -= 1
+                self.dropped += 1
+            else:
+                self.flush()
+        self.entries[(self.first + self.size) % self.capacity] = (message, args, tiles)
+        self.size += 1
+        if self.policy == MissionLog.ALWAYS:
+            self.flush()
+
+    def _apply(self, tiles):
+        # brings the recorded board up to date with a board record
+        if isinstance(tiles, Board):
+            self._board = tiles
+        elif tiles is not None:
+            for x, y, value in tiles:
+                self._board[x][y] = value
+
+    def _format(self, entry):
+        # returns the text of entry
+        message, args, tiles = entry
+        if args:
+            message = message % args
+        if tiles is None:
+            return message
+        self._apply(tiles)
+        return message + "\n" + str(self._board)
+
+    def flush(self):
+        """
+        formats the buffered messages and appends them to the file, emptying the buffer
+        """
+        if not self.size:
+            return
+        lines = []
+        if self.dropped:
+            lines.append("(%d earlier messages dropped)" % self.dropped)
+            self.dropped = 0
+        while self.size:
+            lines.append(self._format(self.entries[self.first]))
+            self.entries[self.first] = None
+            self.first = (self.first + 1) % self.capacity
+            self.size -= 1
+        with open(self.path, "a") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+class Profiler:
+    """
+    Times a Robot's missions by phase (robot = MyRobot(profile=Profiler()), or profile=True):
+
+        planning   get_explore_position, yolo and the PathPlanner searches
+        inference  board.reduce and eliminate
+        sensing    receive_scent
+        actuation  forward, rot_cw, rot_ccw, rot_180 and shoot
+        other      the rest of start, ie. the robot's bookkeeping between the phases above
+
+    A call's time leaves out the other phases it calls into (get_explore_position running
+    eliminate counts as inference), and calls made within the same phase count as part of the
+    outermost one.
+
+    For each phase, counts, totals and maxima hold the number of calls and their total and longest
+    times in nanoseconds, and histograms[phase][b] the number of calls that took less than 2**b
+    microseconds (and at least 2**(b - 1)), with everything longer in the last bucket. Times come
+    from time.perf_counter_ns, or time.ticks_us on MicroPython. The counts keep adding up over
+    every mission of every robot the profiler is given to, until reset.
+    """
+
+    PHASES = ("planning", "inference", "sensing", "actuation", "other")
+    BUCKETS = 24
+
+    def __init__(self):
+        self.reset()
+        # [phase, time spent in other phases] of each timed call in progress, outermost first
+        self._stack = []
+
+    def reset(self):
+        self.counts = {}
+        self.totals = {}
+        self.maxima = {}
+        self.histograms = {}
+        for phase in self.PHASES:
+            self.counts[phase] = 0
+            self.totals[phase] = 0
+            self.maxima[phase] = 0
+            self.histograms[phase] = [0] * self.BUCKETS
+
+    def attach(self, robot, actions=True):
+        """
+        times robot's methods (and those of its board and planner) from now on
+        actions False leaves start, sensing and actuation alone, for robots whose actions are
+        coroutines (which time them with now and since instead, see asyncrobot.py)
+        """
+        timed = [("planning", robot, ("get_explore_position", "yolo")),
+                 ("planning", robot.planner, ("route", "route_to_any", "distance_field")),
+                 ("inference", robot.board, ("reduce",)),
+                 ("inference", robot, ("eliminate",))]
+        if actions:
+            timed += [("sensing", robot, ("receive_scent",)),
+                      ("actuation", robot, ("forward", "rot_cw", "rot_ccw", "rot_180", "shoot")),
+                      ("other", robot, ("start",))]
+        for phase, owner, names in timed:
+            for name in names:
+                setattr(owner, name, self.wrap(phase, getattr(owner, name)))
+
+    def wrap(self, phase, method):
+        """
+        returns method timed as a call of phase
+        """
+        stack = self._stack
+
+        def timed(*args, **kwargs):
+            if stack and stack[-1][0] == phase:
+                return method(*args, **kwargs)
+            call = [phase, 0]
+            stack.append(call)
+            start = _ticks()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = _ticks_diff(_ticks(), start)
+                stack.pop()
+                if stack:
+                    stack[-1][1] += elapsed
+                self.record(phase, (elapsed - call[1]) * _TICK_NS)
+
+        return timed
+
+    # the current time in ticks, for since
+    now = staticmethod(_ticks)
+
+    def since(self, phase, start):
+        """
+        adds a call of phase that started at start (from now)
+        """
+        self.record(phase, _ticks_diff(_ticks(), start) * _TICK_NS)
+
+    def record(self, phase, ns):
+        """
+        adds a call of phase that took ns nanoseconds
+        """
+        self.counts[phase] += 1
+        self.totals[phase] += ns
+        if ns > self.maxima[phase]:
+            self.maxima[phase] = ns
+        bucket = 0
+        limit = 1000
+        while ns >= limit and bucket < self.BUCKETS - 1:
+            bucket += 1
+            limit *= 2
+        self.histograms[phase][bucket] += 1
+
+    def report(self):
+        """
+        returns a table of the calls, total, mean and longest time (in microseconds) and share of
+        the total time of each phase
+        """
+        total = sum(self.totals.values()) or 1
+        lines = ["%-10s %8s %12s %10s %10s %6s" % ("phase", "calls", "total us", "mean us", "max us", "%")]
+        for phase in self.PHASES:
+            calls = self.counts[phase]
+            lines.append("%-10s %8d %12.0f %10.1f %10.1f %6.1f" % (
+                phase, calls, self.totals[phase] / 1000, self.totals[phase] / 1000 / (calls or 1),
+                self.maxima[phase] / 1000, 100 * self.totals[phase] / total))
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.report()
+
+
 class Robot:
     """
     Note: scents keeps track of the scent values recieved at each location on the board. 
     A 0 in scents means no scent has been recieved at that location yet. (we do not need to record
     the abscence of scent since this immediately gives us all the information it ever could about 
     surrounding tiles)
+
+    FORWARD_COST, TURN_COST and TURN_180_COST are the expected times of forward, a 90 degree turn
+    and rot_180, used to plan the quickest routes. Turning is free by default; subclasses whose
+    turns take real time should set them (in any consistent unit).
+
+    get_explore_position keeps a frontier of candidate tiles up to date with the changes to board
+    and scents, so scents must only be changed through sniff (or call rehash after changing them).
+
+    With a TranspositionTable, the robot looks up what it deduces from each knowledge state
+    before working it out.
+
+    speculate works out ahead what the robot would do after each of possible_scents, so it can
+    set off as soon as the scent arrives (AsyncRobot does this while it waits for actions and scents).
+
+    Several robots on one board can explore together as a Team (see team.py).
     """
 
-    def __init__(self, board=None, x=0, y=0, dx=1, dy=0, state=States.INITIAL, log_actions=False):
+    FORWARD_COST = 1
+    TURN_COST = 0
+    TURN_180_COST = 0
+
+    def __init__(self, board=None, x=0, y=0, dx=1, dy=0, state=States.INITIAL, log_actions=False, width=WIDTH, height=HEIGHT, table=None,
+                 trace=None, profile=None):
         """
-        board[WIDTH][HEIGHT] of int may be specified if the robot has initial knowledge of the terrain - 
+        board[width][height] of int may be specified if the robot has initial knowledge of the terrain - 
             default: each tile except (0,0) has every possibility
+        width, height dimensions of the default board (ignored if board is given)
         x, y initial coordinates
         dx, dy initial direction
         state can be specified to initialize the robot at different situations
+        table a TranspositionTable to share deductions through (see TranspositionTable)
+        log_actions True to log to log.txt, or the MissionLog to log to
+        trace a TraceRecorder (see trace.py) to record the mission to
+        profile True or a Profiler to time the robot's phases with (see Profiler), kept as self.profile
 
         """
-        self.board = board or Board()
+        self.board = board or Board(width=width, height=height)
+        self.width = self.board.width
+        self.height = self.board.height
         # robot must start at a safe location, so mark it as such
         # Note: it could start at the gold
-        self.board[x][y] &= 0b1100    
+        self.board.restrict(x, y, 0b1100)
         
         self.x = x
         self.y = y
@@ -329,67 +1574,267 @@ class Robot:
 
         self.start_pos = (x, y)
 
-        # initialize scents with 0
-        self.scents = []
-        for j in range(WIDTH):
-            col = []
-            for i in range(HEIGHT):
-                col.append(Tile.UNSNIFFED)
-            self.scents.append(col)
+        # initialize scents as unsniffed (the board decides how the scents grid is stored)
+        self.scents = self.board.new_scents()
+
+        self.planner = PathPlanner(self.board, self.FORWARD_COST, self.TURN_COST, self.TURN_180_COST)
+
+        self.table = table
+        # the Zobrist hash of board and scents (see TranspositionTable), worked out when first needed
+        self._zobrist = None
+        self._deduction = None
+        # candidate explore positions (see _update_frontier), set up when first needed
+        self._frontier = None
+        self._rescore = set()
+        # what speculate worked out for the next scent, as (x, y, number of board changes, {scent: (deduction, path)}),
+        # the branch of it taken by the scent just received, and the route planned there for move_to
+        self._speculation = None
+        self._branch = None
+        self._planned = None
+        # the Team this robot explores with, which picks its explore positions (see team.py)
+        self.team = None
 
         # initialize logs
-        if self.log_actions:
-            with open("log.txt", "w") as f:
-                f.write("")
+        self.mission_log = None
+        if log_actions is True:
+            self.mission_log = MissionLog()
+        elif log_actions:
+            self.mission_log = log_actions
+
+        self.trace = trace
+        if trace is not None:
+            trace.start(self)
+
+        self.profile = Profiler() if profile is True else profile
+        if self.profile is not None:
+            self.profile.attach(self)
 
     def start(self):
         self.log("STARTING")
         try:
             while self.state < States.GOLD_KNOWN:
-                explore_pos = self.get_explore_position()
-                # if there are no safe places to explore, shoot the wumpus and explore from that location
-                if explore_pos is None:
-                    self.log("No explore position: " + str(self.board.wumpus_pos))
-                    if self.board.wumpus_pos is not None and self.has_arrow:
-                        # we know where the wumpus is, and still have an arrow to use
-                        explore_pos = self.board.wumpus_pos
-                        self.shoot_at(*self.board.wumpus_pos)
-                    else:
-                        # we are in a situation where we must enter a potentially dangerous tile
-                        # so we will just yolo it and hope for the best
-                        # Note: this can only arise in boards where the robot must be able to know that it is solvable for it to be solvable
-                        explore_pos = self.yolo()
-                self.move_to(*explore_pos)
-                self.sniff()
-                self.board.eliminate(self.scents)
-                if self.board.gold_pos is not None:
-                    self.state = States.GOLD_KNOWN
-                    break
-
-            assert(self.board.gold_pos is not None)
-           
-            self.log("FOUND GOLD")
-
-            self.board.gold_pos
-            while not self.move_to(*self.board.gold_pos):
-                # shoot wumpus or continue yoloing as neccessary until the path to gold is clear
-                if self.board.wumpus_pos is not None and self.has_arrow:
-                    self.shoot_at(*self.board.wumpus_pos)
-                else:
-                    self.move_to(*self.yolo())
-
-            self.state = States.HAS_GOLD
-            if self.log_actions:
-                self.log("RETRIEVED GOLD")
-
-            # now we have the gold, so return to origin
-            self.move_to(*self.start_pos)
-            self.state = States.FINISHED
+                self.explore_step()
+            self.retrieve_gold()
         except Exception as e:
             if self.log_actions:
-                self.log("ERROR: " + str(e))
+                self.log("ERROR: %s", e)
             raise e
+        finally:
+            self._finish()
+
+    def retrieve_gold(self):
+        """
+        the rest of start once the gold has been located: moves to the gold (shooting the wumpus or
+        taking risks if the way there is blocked) and back to the start
+        """
+        assert(self.board.gold_pos is not None)
+       
+        self.log("FOUND GOLD")
+
+        while not self.move_to(*self.board.gold_pos):
+            # shoot wumpus or continue yoloing as neccessary until the path to gold is clear
+            if self.board.wumpus_pos is not None and self.has_arrow:
+                self.shoot_at(*self.board.wumpus_pos)
+            else:
+                self.move_to(*self.yolo())
+
+        self.state = States.HAS_GOLD
+        if self.log_actions:
+            self.log("RETRIEVED GOLD")
+
+        # now we have the gold, so return to origin
+        self.move_to(*self.start_pos)
+        self.state = States.FINISHED
+
+    def _finish(self):
+        # the end of a mission, however it went
+        if self.mission_log is not None:
+            self.mission_log.flush()
+        if self.trace is not None:
+            self.trace.end(self)
         
+    def explore_step(self):
+        """
+        makes one decision of the exploring part of start: picks where to sniff next (shooting or
+        taking a risk if nothing is known to be safe), moves there and sniffs, and sets the state to
+        GOLD_KNOWN once the gold has been located
+        """
+        self._approach()
+        self.sniff()
+        self._learn()
+
+    def _approach(self):
+        # moves to the next position to explore, shooting or taking a risk if nothing is known to be safe
+        explore_pos = self.get_explore_position()
+        # if there are no safe places to explore, shoot the wumpus and explore from that location
+        if explore_pos is None:
+            self.log("No explore position: %s", self.board.wumpus_pos)
+            if self.board.wumpus_pos is not None and self.has_arrow:
+                # we know where the wumpus is, and still have an arrow to use
+                explore_pos = self.board.wumpus_pos
+                self.shoot_at(*self.board.wumpus_pos)
+            else:
+                # we are in a situation where we must enter a potentially dangerous tile
+                # so we will just yolo it and hope for the best
+                # Note: this can only arise in boards where the robot must be able to know that it is solvable for it to be solvable
+                explore_pos = self.yolo()
+        self.move_to(*explore_pos)
+
+    def _learn(self):
+        # deduces what the latest scent tells about the board
+        self.eliminate()
+        if self.board.gold_pos is not None:
+            self.state = States.GOLD_KNOWN
+
+    def eliminate(self):
+        """
+        narrows the board with board.eliminate(scents), or with what that did the last time the
+        table saw the same knowledge, or with what speculate worked out for the scent just received
+        """
+        board = self.board
+        if self._branch is not None:
+            deduction, path = self._branch
+            self._branch = None
+            self._deduce(deduction)
+            if path is not None:
+                self._planned = (len(board.changes), self.x, self.y, self.dx, self.dy, deduction.explore_pos, path)
+        elif self.table is None:
+            board.eliminate(self.scents)
+            return
+        else:
+            key = self._knowledge()
+            deduction = self.table.get(key)
+            if deduction is None:
+                first = len(board.changes)
+                board.eliminate(self.scents)
+                changes = [(x, y, board[x][y]) for x, y in board.changes[first:]]
+                deduction = Deduction(changes, board.gold_pos, board.wumpus_pos)
+                self.table.put(key, deduction)
+            else:
+                self._deduce(deduction)
+        # the explore position can be reused for as long as the board is left as it is
+        self._deduction = deduction
+        self._deduced_at = len(board.changes)
+
+    def _deduce(self, deduction):
+        # narrows the board as deduction says eliminate would
+        board = self.board
+        for x, y, value in deduction.changes:
+            board.restrict(x, y, value)
+        board.gold_pos = deduction.gold_pos
+        board.wumpus_pos = deduction.wumpus_pos
+
+    def possible_scents(self):
+        """
+        returns the scents the robot could receive where it stands, as far as the board tells
+        (those made of types that some adjacent tile may hold, and at a tile that may hold the
+        gold, each of them with 0b1000 set)
+        """
+        board = self.board
+        possible = 0
+        for adj_x, adj_y in board.adjacent(self.x, self.y):
+            possible |= board[adj_x][adj_y]
+        possible &= Tile.UNKNOWN
+        scents = [scent for scent in range(8) if scent & possible == scent]
+        if board[self.x][self.y] & Tile.GOLD:
+            # the gold scent comes with the scents of the adjacent tiles, which eliminate still uses
+            scents += [0b1000 | scent for scent in scents]
+        return scents
+
+    def speculate(self, scent):
+        """
+        works out what the robot would deduce if it received scent where it stands, where it would
+        explore next and the route there, without changing the robot. If that scent arrives before
+        the board changes, sniff and the following move use what was worked out instead of
+        deducing and planning on the spot, so this is for time the robot would otherwise spend
+        waiting (see AsyncRobot.think). Call it for each of possible_scents.
+        """
+        changes = len(self.board.changes)
+        speculation = self._speculation
+        if speculation is None or speculation[:3] != (self.x, self.y, changes):
+            speculation = self._speculation = (self.x, self.y, changes, {})
+        branch = _Branch(self)
+        branch._perceive(scent)
+        board = branch.board
+        first = len(board.changes)
+        board.eliminate(branch.scents)
+        deduction = Deduction([(x, y, int(board[x][y])) for x, y in board.changes[first:]], board.gold_pos,
+                              board.wumpus_pos)
+        path = None
+        if board.gold_pos is None:
+            deduction.explored = True
+            deduction.explore_pos = branch._explore_position()
+            if deduction.explore_pos is not None:
+                path = branch.planner.route(self.x, self.y, self.dx, self.dy, *deduction.explore_pos)
+        speculation[3][scent] = (deduction, path)
+
+    def _speculated(self, scent):
+        # what speculate worked out for scent where the robot stands, if the board is as it was then
+        speculation = self._speculation
+        self._speculation = None
+        if speculation is None or speculation[:3] != (self.x, self.y, len(self.board.changes)):
+            return None
+        return speculation[3].get(scent)
+
+    def _knowledge(self):
+        # returns the table key of the current knowledge, bringing the hash up to date with the changes
+        board = self.board
+        height = self.height
+        keys = self.table.keys(self.width, height)
+        if self._zobrist is None:
+            self._hash_all()
+        zobrist = self._zobrist
+        hashed = self._hashed
+        for x, y in board.changes[self._hashed_changes:]:
+            tile = x * height + y
+            value = board[x][y]
+            if hashed[tile] != value:
+                zobrist ^= keys[tile * TranspositionTable.BOARD_VALUES + hashed[tile]]
+                zobrist ^= keys[tile * TranspositionTable.BOARD_VALUES + value]
+                hashed[tile] = value
+        self._hashed_changes = len(board.changes)
+        self._zobrist = zobrist
+        return (zobrist, self.width, height, self.start_pos, board.gold_pos, board.wumpus_pos)
+
+    def rehash(self):
+        """
+        starts over the bookkeeping on board and scents (the frontier of explore positions, and the
+        Zobrist hash with a table), which is needed after changing scents other than through sniff
+        """
+        self._frontier = None
+        self._deduction = None
+        self._zobrist = None
+
+    def _hash_all(self):
+        # works out the Zobrist hash of board and scents from scratch
+        keys = self.table.keys(self.width, self.height)
+        offset = self.width * self.height * TranspositionTable.BOARD_VALUES
+        zobrist = 0
+        self._hashed = []
+        for x in range(self.width):
+            for y in range(self.height):
+                tile = x * self.height + y
+                value = self.board[x][y]
+                zobrist ^= keys[tile * TranspositionTable.BOARD_VALUES + value]
+                zobrist ^= keys[offset + tile * TranspositionTable.SCENT_VALUES + self.scents[x][y]]
+                self._hashed.append(value)
+        self._hashed_changes = len(self.board.changes)
+        self._zobrist = zobrist
+
+    def _set_scent(self, x, y, scent):
+        # scents[x][y] = scent, keeping the hash and the frontier up to date (the team's too)
+        if self.team is not None:
+            self.team.rescore(x, y)
+        self._deduction = None
+        self._rescore.add((x, y))
+        if self._zobrist is not None:
+            keys = self.table.keys(self.width, self.height)
+            tile = x * self.height + y
+            offset = self.width * self.height * TranspositionTable.BOARD_VALUES
+            self._zobrist ^= keys[offset + tile * TranspositionTable.SCENT_VALUES + self.scents[x][y]]
+            self._zobrist ^= keys[offset + tile * TranspositionTable.SCENT_VALUES + scent]
+        self.scents[x][y] = scent
+
     def get_explore_position(self):
         """
         returns the (x, y) pair for the best position to visit next
@@ -398,31 +1843,83 @@ class Robot:
         means more expected information from a scent at that location. Ties are broken by the nearest tile to the robot winning.
         """
         if self.log_actions:
-            self.log("current board knowledge:\n" + str(self.board))
-
-        max_sum = 0
-        best_pos = None
-        for x in range(WIDTH):
-            for y in range(HEIGHT):
-                potential = (x, y)
-                # skip tiles that are not known to be safe
-                if self.board[x][y] & 0b011:
-                    continue
-
-                # skip tiles that we already sniffed at 
-                if not (self.scents[x][y] & Tile.UNSNIFFED):
-                    continue
-                
-                sum = 0
-                for adj in adjacent_positions(x, y):
-                    sum += self.board[adj[0]][adj[1]]
-                    # a tile is highly valuable if it is adjacent to a tile that scented gold
-                    if (self.scents[adj[0]][adj[1]] & Tile.GOLD) and (self.board[x][y] & Tile.GOLD):
-                        sum += 100
-                if sum > max_sum or (best_pos is not None and sum == max_sum and self.distance(self.start_pos, potential) < self.distance(self.start_pos, best_pos)):
-                    max_sum = sum
-                    best_pos = potential
-        return best_pos
+            self.mission_log.log_board("current board knowledge:", self.board)
+
+        if self.team is not None:
+            return self.team.explore_position(self)
+        deduction = self._deduction
+        if deduction is not None and self._deduced_at == len(self.board.changes):
+            if not deduction.explored:
+                deduction.explored = True
+                deduction.explore_pos = self._explore_position()
+            return deduction.explore_pos
+        return self._explore_position()
+
+    def _explore_position(self):
+        # the top of the frontier heap, dropping the entries whose tile has been rescored since
+        self._update_frontier()
+        heap = self._frontier
+        scores = self._scores
+        while heap:
+            score, _, x, y = heap[0]
+            if scores[x * self.height + y] == -score:
+                return (x, y)
+            heapq.heappop(heap)
+        return None
+
+    def _score(self, x, y):
+        # the explore score of (x, y), or None if it is not a candidate (unsafe, sniffed, or scoring 0,
+        # which get_explore_position never picks)
+        board = self.board
+        if board[x][y] & 0b011 or not self.scents[x][y] & Tile.UNSNIFFED:
+            return None
+        sum = 0
+        for adj_x, adj_y in board.adjacent(x, y):
+            sum += board[adj_x][adj_y]
+            # a tile is highly valuable if it is adjacent to a tile that scented gold
+            if (self.scents[adj_x][adj_y] & Tile.GOLD) and (board[x][y] & Tile.GOLD):
+                sum += 100
+        return sum or None
+
+    def _push(self, x, y):
+        # rescores (x, y), adding it to the frontier heap if its score changed
+        # (entries order by highest score, then nearest to the start, then x and y like a scan of the board)
+        tile = x * self.height + y
+        score = self._score(x, y)
+        if score != self._scores[tile]:
+            self._scores[tile] = score
+            if score is not None:
+                start_x, start_y = self.start_pos
+                heapq.heappush(self._frontier, (-score, abs(x - start_x) + abs(y - start_y), x, y))
+
+    def _update_frontier(self):
+        # keeps a heap of the candidate tiles for get_explore_position. A tile's score only depends
+        # on itself and its neighbours, so after the first full scan only the tiles at and next
+        # to those that changed (on the board or in scents) since the last update are rescored.
+        # Stale entries stay in the heap until they reach the top.
+        board = self.board
+        if self._frontier is None:
+            self._frontier = []
+            self._scores = [None] * (self.width * self.height)
+            for x in range(self.width):
+                for y in range(self.height):
+                    self._push(x, y)
+        else:
+            # rescoring a tile again leaves it as it is, so tiles next to several changes need no
+            # deduplicating (which would allocate on every step)
+            changes = board.changes
+            for n in range(self._frontier_changes, len(changes)):
+                self._push_around(*changes[n])
+            for x, y in self._rescore:
+                self._push_around(x, y)
+        self._frontier_changes = len(board.changes)
+        self._rescore.clear()
+
+    def _push_around(self, x, y):
+        # rescores (x, y) and the tiles next to it
+        self._push(x, y)
+        for adj_x, adj_y in self.board.adjacent(x, y):
+            self._push(adj_x, adj_y)
 
     def distance(self, pos1, pos2):
         return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
@@ -433,10 +1930,16 @@ class Robot:
         calls receive_scent, stores that scent, and uses it for deduction
         Override receive_scent, not sniff for different system subclasses
         """
-        scent = self.receive_scent()
+        self._perceive(self.receive_scent())
+
+    def _perceive(self, scent):
+        # stores the scent received at the robot's position and uses it for deduction
+        if self.trace is not None:
+            self.trace.percept(self, scent)
         if self.log_actions:
-            self.log(f"recieved scent {scent} at {self.x}, {self.y}")
-        self.scents[self.x][self.y] = scent
+            self.log("recieved scent %d at %d, %d", scent, self.x, self.y)
+        self._branch = self._speculated(scent)
+        self._set_scent(self.x, self.y, scent)
         self.board.reduce(scent, self.x, self.y)
 
     def _rotate(self, dx, dy):
@@ -453,20 +1956,24 @@ class Robot:
 
     def move_to(self, x, y):
         """
-        Uses the shortest valid path (if it exists) to move to board[x][y]
+        Uses the quickest valid route (if it exists) to move to board[x][y]
         returns False if unable to make the movement
         """
         if self.log_actions:
-            self.log(f"moving to {x}, {y} from {self.x}, {self.y}")
+            self.log("moving to %d, %d from %d, %d", x, y, self.x, self.y)
 
-        if not (0 <= x < WIDTH and 0 <= y < HEIGHT):
+        if not (0 <= x < self.width and 0 <= y < self.height):
             return False
+        if self.trace is not None:
+            self.trace.target(self, x, y)
         
         # if already at the target location, return true
         if self.x == x and self.y == y:
             return True
         
-        path = shortest_path(self.x, self.y, x, y, self.board)
+        path = self._planned_route(x, y)
+        if path is None:
+            path = self.planner.route(self.x, self.y, self.dx, self.dy, x, y)
         if path is None:
             return False
         
@@ -475,6 +1982,14 @@ class Robot:
         return len(path) > 0
 
 
+    def _planned_route(self, x, y):
+        # the route speculate planned to (x, y), if the robot and board are as they were then
+        planned = self._planned
+        self._planned = None
+        if planned is None or planned[:6] != (len(self.board.changes), self.x, self.y, self.dx, self.dy, (x, y)):
+            return None
+        return planned[6]
+
     def follow_path(self, path):
         """
         Given a path of directions [(dx1, dy1), (dx2, dy2), ...]
@@ -484,6 +1999,11 @@ class Robot:
             self._rotate(dx, dy)
             self._forward()
 
+    def _give_up(self):
+        # the board is not solvable: spins in place for good
+        while True:
+            self._rot_cw()
+
     def yolo(self):
         """
         call this if there are no known safe places to explore
@@ -499,52 +2019,45 @@ class Robot:
         """
         if self.log_actions:
             self.log("resorting to yolo - this board had better be solvable :)")
-        # first, find out all the positions we know absolutely are bad to move into
-        forbidden = []
-        for x in range(WIDTH):
-            col = []
-            for y in range(HEIGHT):
-                tile = self.board.deduce(x, y, self.scents)
-                # forbid tiles known to be pits
-                if tile == Tile.PIT:
-                    col.append(True)
-                else:
-                    col.append(False)
-            forbidden.append(col)
-
-        # then, consider the collection of positions that we have not sniffed at, but might be safe, and are reachable
-        # by moving through only known safe tiles
+        # consider the collection of positions that we have not sniffed at, but might be safe, and are reachable
+        # by moving through only known safe tiles.
+        # A single flood fill from the robot finds them all: reachable tiles either have a path through safe tiles,
+        # or are dangerous but next to one (and so are blocked in the distance field)
+        # (paths also need the robot's own tile to be safe, which it may not be if it moved into a risky tile)
+        field = self.planner.distance_field(self.x, self.y)
+        max_value = self.width * self.height
+        robot_safe = not self.board[self.x][self.y] & 0b011
         potential_safe = []
-        for x in range(WIDTH):
-            for y in range(HEIGHT):
-                if (self.scents[x][y] & Tile.UNSNIFFED) and not forbidden[x][y] and len(shortest_path(self.x, self.y, x, y, self.board)) > 0:
-                    potential_safe.append((x, y))
+        for x in range(self.width):
+            for y in range(self.height):
+                cost = field[x * self.height + y]
+                if not robot_safe or not (self.scents[x][y] & Tile.UNSNIFFED) or cost == 0 or cost == max_value:
+                    continue
+                # skip positions we know absolutely are bad to move into (known to be pits)
+                if self.board.deduce(x, y, self.scents) == Tile.PIT:
+                    continue
+                potential_safe.append((x, y))
 
         risk_pos = None
         # if there are multiple positions, we need to figure out which one could possibly be blocking
         # the gold - and that must be correct to move into since we assume the board is solvable
         if len(potential_safe) > 1:
-            # remove any positions that are neither adjacent to positions which can contain gold, 
-            # nor could contain gold themselves
-            filtered = False
-            while not filtered:
-                filtered = True
-                for pos in potential_safe:
-                    possible_path_to_gold = (self.board[pos[0]][pos[1]] & Tile.GOLD != 0)
-                    for adj in adjacent_positions(*pos):
-                        if self.board[adj[0]][adj[1]] & Tile.GOLD:
-                            possible_path_to_gold = True
-                    if not possible_path_to_gold:
-                        potential_safe.remove(pos)
-                        filtered = False
-                        break
+            # keep only positions that are adjacent to positions which can contain gold, or could contain gold themselves
+            filtered = []
+            for pos in potential_safe:
+                possible_path_to_gold = (self.board[pos[0]][pos[1]] & Tile.GOLD != 0)
+                for adj in self.board.adjacent(*pos):
+                    if self.board[adj[0]][adj[1]] & Tile.GOLD:
+                        possible_path_to_gold = True
+                if possible_path_to_gold:
+                    filtered.append(pos)
+            potential_safe = filtered
         if len(potential_safe) == 0:
             # this board is guaranteed not solvable
             # don't let the wumpus have the last laugh :)
             if self.log_actions:
                 self.log("this board is not solvable :(")
-            while True:
-                self._rot_cw()
+            self._give_up()
         else:
             # there is either just one position, or multiple equally good guesses
             risk_pos = potential_safe[0]
@@ -552,44 +2065,50 @@ class Robot:
         if self.board[risk_pos[0]][risk_pos[1]] & Tile.WUMPUS:
             self.shoot_at(*risk_pos)
         # mark the tile as safe since that's what we will assume from now on
-        self.board[risk_pos[0]][risk_pos[1]] = self.board[risk_pos[0]][risk_pos[1]] & 0b0100
+        self.board.restrict(risk_pos[0], risk_pos[1], 0b0100)
         return risk_pos
 
-    def log(self, message):
+    def log(self, message, *args):
+        """
+        logs message % args (formatted only when the log is written out, see MissionLog)
+        """
         if not self.log_actions:
             return
-        with open("log.txt", "a") as f:
-            f.write(message + "\n")
+        self.mission_log.log(message, *args)
 
     def shoot_at(self, x, y):
         """
         shoots at the location (x, y) and updates the board
         """
-        # move to adjacent position
+        # move to the adjacent position that is quickest to reach and aim from,
+        # only risking a dangerous one if no safe one can be reached
         if self.distance((self.x, self.y), (x, y)) > 1:
-            for adj_x, adj_y in adjacent_positions(x, y):
-                path = shortest_path(self.x, self.y, adj_x, adj_y, self.board)
-                if len(path) > 0:
-                    self.follow_path(path)
-                    break
-        
+            goals = [(adj_x, adj_y, x - adj_x, y - adj_y) for adj_x, adj_y in self.board.adjacent(x, y)]
+            safe_goals = [goal for goal in goals if not self.board[goal[0]][goal[1]] & 0b011]
+            path, _ = self.planner.route_to_any(self.x, self.y, self.dx, self.dy, safe_goals)
+            if not path:
+                path, _ = self.planner.route_to_any(self.x, self.y, self.dx, self.dy, goals)
+            self.follow_path(path)
+
         aim_x = x - self.x
         aim_y = y - self.y
         self._rotate(aim_x, aim_y)
-        self.log(f"Shooting at {x}, {y}")
+        self.log("Shooting at %d, %d", x, y)
 
         if self.has_arrow:
-            self.shoot()
+            if self.trace is not None:
+                self.trace.shoot(self)
+            self._perform(self.shoot)
         else:
             return
         self.has_arrow = False
 
         # zero out the wumpus bit from the target position by setting the bit to 1 then flipping it
-        self.board[x][y] = self.board[x][y] & ~0b11
+        self.board.restrict(x, y, ~0b11)
 
         # also zero out wumpus bit from adjacent scents, due to a bug in the simulation code
-        for adj_x, adj_y in adjacent_positions(x, y):
-            self.scents[adj_x][adj_y] = self.scents[adj_x][adj_y] & ~0b10
+        for adj_x, adj_y in self.board.adjacent(x, y):
+            self._set_scent(adj_x, adj_y, self.scents[adj_x][adj_y] & ~0b10)
 
         # should technically recieve a scream signal before doing this,
         # but there is not good in know where the wumpus is now that we don't have an arrow
@@ -605,7 +2124,9 @@ class Robot:
         self.dx = self.dy
         self.dy = -tmp_dx
 
-        self.rot_cw()
+        if self.trace is not None:
+            self.trace.rot_cw(self)
+        self._perform(self.rot_cw)
     
     def _rot_ccw(self):
         """
@@ -616,7 +2137,9 @@ class Robot:
         self.dx = -self.dy
         self.dy = tmp_dx
 
-        self.rot_ccw()
+        if self.trace is not None:
+            self.trace.rot_ccw(self)
+        self._perform(self.rot_ccw)
 
   
     def _rot_180(self):
@@ -626,7 +2149,9 @@ class Robot:
         self.dx = -self.dx
         self.dy = -self.dy
 
-        self.rot_180()
+        if self.trace is not None:
+            self.trace.rot_180(self)
+        self._perform(self.rot_180)
 
     def _forward(self):
         """
@@ -636,7 +2161,13 @@ class Robot:
         self.x += self.dx
         self.y += self.dy
 
-        self.forward()
+        if self.trace is not None:
+            self.trace.forward(self)
+        self._perform(self.forward)
+
+    def _perform(self, action):
+        # carries out action (one of the methods below)
+        action()
 
     def rot_180(self):
         self.rot_cw()
@@ -659,3 +2190,23 @@ class Robot:
 
 
     
+
+
+class _Branch(Robot):
+    # a copy of what a robot knows, for Robot.speculate to work out a scent on without changing the robot
+
+    def __init__(self, robot):
+        # plan routes like the robot
+        self.FORWARD_COST, self.TURN_COST, self.TURN_180_COST = robot.FORWARD_COST, robot.TURN_COST, robot.TURN_180_COST
+        board = robot.board
+        copy = type(board)([[int(value) for value in col] for col in board])
+        copy.gold_pos = board.gold_pos
+        copy.wumpus_pos = board.wumpus_pos
+        start_x, start_y = robot.start_pos
+        super().__init__(board=copy, x=start_x, y=start_y, state=robot.state)
+        self.x, self.y, self.dx, self.dy = robot.x, robot.y, robot.dx, robot.dy
+        self.has_arrow = robot.has_arrow
+        for x in range(self.width):
+            for y in range(self.height):
+                if robot.scents[x][y] != Tile.UNSNIFFED:
+                    self.scents[x][y] = robot.scents[x][y]